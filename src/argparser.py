@@ -4,7 +4,7 @@ from argparse import Namespace
 from io import TextIOWrapper
 from typing import Any
 
-from config import GlobalConfig
+from config import DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES, GlobalConfig
 from logger import Logger
 
 
@@ -18,6 +18,15 @@ class ArgParser:
     help_mode: bool = False  # help mode
     force_solve_system: bool = False
     verbose: bool = False
+    trace: bool = False
+    trace_max_size: int | None = None
+    cache: bool = False
+    cache_dir: str = DEFAULT_CACHE_DIR
+    cache_size_mb: int = DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)
+    autodiff: bool = False
+    scipy: bool = False
+    time_budget: float | None = None
+    evaluation_budget: int | None = None
 
     def _register_args(self) -> None:
         self.parser.add_argument("-h", "--help", action="store_true", help="shows help")
@@ -33,6 +42,59 @@ class ArgParser:
             help="try to solve system even if it is not convergent",
             default=False,
         )
+        self.parser.add_argument(
+            "--trace",
+            action="store_true",
+            help="record iteration traces and save them next to result files",
+            default=False,
+        )
+        self.parser.add_argument(
+            "--trace-max-size",
+            type=int,
+            help="keep only the last N iterates of a trace",
+            default=None,
+        )
+        self.parser.add_argument(
+            "--cache",
+            action="store_true",
+            help="keep prepared equations in an on-disk cache",
+            default=False,
+        )
+        self.parser.add_argument(
+            "--cache-dir",
+            help=f"on-disk cache directory for --cache (default {DEFAULT_CACHE_DIR})",
+            default=DEFAULT_CACHE_DIR,
+        )
+        self.parser.add_argument(
+            "--cache-size-mb",
+            type=int,
+            help="on-disk cache size limit",
+            default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+        )
+        self.parser.add_argument(
+            "--autodiff",
+            action="store_true",
+            help="compute derivatives by automatic differentiation instead of sympy",
+            default=False,
+        )
+        self.parser.add_argument(
+            "--scipy",
+            action="store_true",
+            help="solve with scipy.optimize when the precision fits in float64",
+            default=False,
+        )
+        self.parser.add_argument(
+            "--time-budget",
+            type=float,
+            help="give up a solve after this many seconds",
+            default=None,
+        )
+        self.parser.add_argument(
+            "--evaluation-budget",
+            type=int,
+            help="give up a solve after this many function evaluations",
+            default=None,
+        )
 
     def __init__(self) -> None:
         self.parser = argparse.ArgumentParser(add_help=False)
@@ -54,6 +116,36 @@ class ArgParser:
 
         GlobalConfig().FORCE_SOLVE_SYSTEM = self.force_solve_system
 
+        self.trace = self.args.trace or False
+        self.trace_max_size = self.args.trace_max_size
+        if self.trace_max_size is not None and self.trace_max_size <= 0:
+            self.parser.error("--trace-max-size must be positive")
+        GlobalConfig().RECORD_TRACE = self.trace
+        GlobalConfig().TRACE_MAX_SIZE = self.trace_max_size
+
+        self.cache = self.args.cache or False
+        self.cache_dir = self.args.cache_dir
+        self.cache_size_mb = self.args.cache_size_mb
+        if self.cache_size_mb <= 0:
+            self.parser.error("--cache-size-mb must be positive")
+        GlobalConfig().CACHE_DIR = self.cache_dir if self.cache else None
+        GlobalConfig().CACHE_MAX_BYTES = self.cache_size_mb * 1024 * 1024
+
+        self.autodiff = self.args.autodiff or False
+        GlobalConfig().AUTODIFF = self.autodiff
+
+        self.scipy = self.args.scipy or False
+        GlobalConfig().SCIPY = self.scipy
+
+        self.time_budget = self.args.time_budget
+        self.evaluation_budget = self.args.evaluation_budget
+        if self.time_budget is not None and self.time_budget <= 0:
+            self.parser.error("--time-budget must be positive")
+        if self.evaluation_budget is not None and self.evaluation_budget <= 0:
+            self.parser.error("--evaluation-budget must be positive")
+        GlobalConfig().TIME_BUDGET = self.time_budget
+        GlobalConfig().EVALUATION_BUDGET = self.evaluation_budget
+
         return 0
 
     def print_help(self) -> None:
@@ -0,0 +1,157 @@
+from typing import Dict, List
+
+import sympy as sp  # type: ignore
+
+from utils.equations import SYSTEM_PRESETS, EquationSystem, MultivariableEquation
+
+
+class Problem:
+    """
+    a single equation benchmark problem with a known root
+    """
+
+    name: str
+    category: str
+    equation_str: str
+    interval_l: str
+    interval_r: str
+    # reference root, None if the interval is not expected to have a single one
+    root: str | None
+
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        equation_str: str,
+        interval_l: str,
+        interval_r: str,
+        root: str | None,
+    ):
+        self.name = name
+        self.category = category
+        self.equation_str = equation_str
+        self.interval_l = interval_l
+        self.interval_r = interval_r
+        self.root = root
+
+
+class SystemProblem:
+    name: str
+    category: str
+    system: EquationSystem
+    starting_xs: Dict[str, str]
+
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        system: EquationSystem,
+        starting_xs: Dict[str, str],
+    ):
+        self.name = name
+        self.category = category
+        self.system = system
+        self.starting_xs = starting_xs
+
+
+PROBLEMS: List[Problem] = [
+    # polynomials
+    Problem(
+        "cubic", "polynomial", "x**3 - x - 1", "1", "2", "1.3247179572447460259609"
+    ),
+    Problem(
+        "quintic", "polynomial", "x**5 - 3*x + 1", "0", "0.5", "0.33473414194335268707"
+    ),
+    Problem(
+        "quintic_product",
+        "polynomial",
+        "(x - 1)*(x - 2)*(x - 3)*(x - 4)*(x - 5)",
+        "3.5",
+        "4.5",
+        "4",
+    ),
+    # transcendental
+    Problem(
+        "cos_fixed_point",
+        "transcendental",
+        "cos(x) - x",
+        "0",
+        "1",
+        "0.7390851332151606416",
+    ),
+    Problem(
+        "omega", "transcendental", "x*exp(x) - 1", "0", "1", "0.56714329040978387300"
+    ),
+    Problem(
+        "log_linear",
+        "transcendental",
+        "log(x) + x",
+        "0.1",
+        "1",
+        "0.56714329040978387300",
+    ),
+    Problem(
+        "sin_linear",
+        "transcendental",
+        "sin(x) - x/2",
+        "1.5",
+        "2.5",
+        "1.8954942670339809471",
+    ),
+    # ill-conditioned
+    Problem(
+        "steep_power",
+        "ill-conditioned",
+        "x**20 - 0.5",
+        "0",
+        "1",
+        "0.96593632892484555107",
+    ),
+    Problem(
+        "close_roots",
+        "ill-conditioned",
+        "(x - 1)*(x - 1.001)",
+        "1.0005",
+        "1.5",
+        "1.001",
+    ),
+    Problem("flat", "ill-conditioned", "0.000001*(x - 0.3)", "0", "1", "0.3"),
+    # multiple roots
+    Problem("triple_root", "multiple roots", "(x - 1)**3", "0", "2.5", "1"),
+    Problem("quintuple_root", "multiple roots", "(x - 1)**5", "0.2", "1.9", "1"),
+    Problem("double_root", "multiple roots", "(x - 1)**2", "0", "2.5", None),
+]
+
+
+def generated_system(n: int) -> EquationSystem:
+    """
+    n-dimensional contraction x_i = c_i - 0.2 * mean(x_j^2) + 0.05 * sin(x_(i+1))
+    """
+    xs = sp.symbols(f"x1:{n + 1}")
+    mean_square = sum(x**2 for x in xs) / n
+    equations = []
+    for i, x in enumerate(xs):
+        phi = (
+            sp.Rational(1, 2)
+            + sp.Rational(i, 10 * n)
+            - sp.Rational(1, 5) * mean_square
+            + sp.Rational(1, 20) * sp.sin(xs[(i + 1) % n])
+        )
+        equations.append(MultivariableEquation(sp.Lambda(xs, x - phi), x, phi))
+    return EquationSystem(equations)
+
+
+def _start(system: EquationSystem, value: str) -> Dict[str, str]:
+    return {symbol.name: value for symbol in system.symbols}
+
+
+SYSTEM_PROBLEMS: List[SystemProblem] = [
+    SystemProblem(
+        "preset_1", "preset", SYSTEM_PRESETS[0], _start(SYSTEM_PRESETS[0], "0.5")
+    ),
+    SystemProblem("preset_2", "preset", SYSTEM_PRESETS[1], {"x": "0.5", "y": "1"}),
+    *(
+        SystemProblem(f"generated_{n}", "generated", system, _start(system, "0.5"))
+        for n, system in ((n, generated_system(n)) for n in (3, 6, 10))
+    ),
+]
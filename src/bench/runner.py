@@ -0,0 +1,359 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, Type
+
+import sympy as sp  # type: ignore
+
+from bench.problems import PROBLEMS, SYSTEM_PROBLEMS, Problem, SystemProblem
+from config import GlobalConfig
+from logger import GlobalLogger
+from solvers.auto_solver import AutoSolver
+from solvers.chord_solver import ChordSolver
+from solvers.deflated_newton_solver import DeflatedNewtonSolver
+from solvers.fixed_point_iteration_solver import FixedPointIterationSolver
+from solvers.fixed_point_iteration_system_solver import FixedPointIterationSystemSolver
+from solvers.gauss_seidel_system_solver import GaussSeidelSystemSolver, SORSystemSolver
+from solvers.high_precision_newton_solver import HighPrecisionNewtonSolver
+from solvers.homotopy_system_solver import HomotopySystemSolver
+from solvers.krawczyk_system_solver import KrawczykSystemSolver
+from solvers.levenberg_marquardt_system_solver import LevenbergMarquardtSystemSolver
+from solvers.newton_solver import NewtonSolver
+from solvers.scipy_solver import scipy_solver
+from solvers.scipy_system_solver import scipy_system_solver
+from solvers.solver import Solver
+from solvers.system_solver import SystemSolver
+from utils.equations import Equation, SolutionMethod, SystemSolutionMethod
+from utils.math import check_single_root
+from utils.perf import Evaluation, PerfCounters, Stage, counted, stage
+from utils.validation import to_sp_float
+
+BASELINE_VERSION = 1
+DEFAULT_PRECISION = "1e-8"
+
+# a run is slower than its baseline if it takes TIME_TOLERANCE times longer
+# and more than TIME_NOISE_FLOOR seconds longer
+TIME_TOLERANCE = 1.25
+TIME_NOISE_FLOOR = 0.005
+# error / residual may grow this many times before it counts as a regression,
+# and changes below ERROR_NOISE_FLOOR are ignored
+ERROR_TOLERANCE = 10
+ERROR_NOISE_FLOOR = 1e-12
+
+SOLVERS: Dict[SolutionMethod, Type[Solver]] = {
+    SolutionMethod.CHORD: ChordSolver,
+    SolutionMethod.NEWTON: NewtonSolver,
+    SolutionMethod.FIXED_POINT_ITERATION: FixedPointIterationSolver,
+    SolutionMethod.AUTO: AutoSolver,
+    SolutionMethod.HIGH_PRECISION_NEWTON: HighPrecisionNewtonSolver,
+    SolutionMethod.DEFLATED_NEWTON: DeflatedNewtonSolver,
+}
+SYSTEM_SOLVERS: Dict[SystemSolutionMethod, Type[SystemSolver]] = {
+    SystemSolutionMethod.FIXED_POINT_ITERATION: FixedPointIterationSystemSolver,
+    SystemSolutionMethod.GAUSS_SEIDEL: GaussSeidelSystemSolver,
+    SystemSolutionMethod.SOR: SORSystemSolver,
+    SystemSolutionMethod.LEVENBERG_MARQUARDT: LevenbergMarquardtSystemSolver,
+    SystemSolutionMethod.HOMOTOPY: HomotopySystemSolver,
+    SystemSolutionMethod.KRAWCZYK: KrawczykSystemSolver,
+}
+
+logger = GlobalLogger()
+
+
+class BenchmarkRecord:
+    """
+    one (problem, method) run. status is "ok" or the reason the solve failed
+    """
+
+    problem: str
+    category: str
+    method: str
+    status: str
+    # best of the repeats, seconds
+    seconds: float
+    stage_times: Dict[str, float]
+    evaluations: Dict[str, int]
+    iterations: int | None
+    # |x - root| (single equations with a known root)
+    error: float | None
+    # max |f_i(x)|
+    residual: float | None
+
+    def __init__(
+        self,
+        problem: str,
+        category: str,
+        method: str,
+        status: str,
+        seconds: float,
+        stage_times: Dict[str, float],
+        evaluations: Dict[str, int],
+        iterations: int | None = None,
+        error: float | None = None,
+        residual: float | None = None,
+    ):
+        self.problem = problem
+        self.category = category
+        self.method = method
+        self.status = status
+        self.seconds = seconds
+        self.stage_times = stage_times
+        self.evaluations = evaluations
+        self.iterations = iterations
+        self.error = error
+        self.residual = residual
+
+    @property
+    def key(self) -> str:
+        return f"{self.problem}/{self.method}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "problem": self.problem,
+            "category": self.category,
+            "method": self.method,
+            "status": self.status,
+            "seconds": self.seconds,
+            "stage_times": self.stage_times,
+            "evaluations": self.evaluations,
+            "iterations": self.iterations,
+            "error": self.error,
+            "residual": self.residual,
+        }
+
+    @staticmethod
+    def from_dict(obj: Dict[str, Any]) -> "BenchmarkRecord":
+        return BenchmarkRecord(
+            obj["problem"],
+            obj["category"],
+            obj["method"],
+            obj["status"],
+            obj["seconds"],
+            obj["stage_times"],
+            obj["evaluations"],
+            obj["iterations"],
+            obj["error"],
+            obj["residual"],
+        )
+
+
+def _solve_single(
+    problem: Problem, method: SolutionMethod, precision: sp.Float
+) -> BenchmarkRecord:
+    """
+    same pipeline as the single equation tab
+    """
+    with PerfCounters().activate() as perf:
+        start = time.perf_counter()
+        status, iterations, error, residual = "ok", None, None, None
+        try:
+            equation = Equation(
+                to_sp_float(problem.interval_l),
+                to_sp_float(problem.interval_r),
+                equation_str=problem.equation_str,
+            )
+            solver: Solver = SOLVERS[method]()
+            if GlobalConfig().SCIPY:
+                solver = scipy_solver(method, equation, precision) or solver
+            with stage(Stage.CONVERGENCE_CHECK):
+                # deflated newton looks for every root, like in the single tab
+                if method != SolutionMethod.DEFLATED_NEWTON and not check_single_root(
+                    counted(equation.f, Evaluation.F),
+                    equation.interval_l,
+                    equation.interval_r,
+                ):
+                    raise ValueError("there is not exactly 1 root in the interval")
+                if not solver.check_convergence(equation):
+                    raise ValueError("method does not converge")
+            res = solver.solve(equation, precision)
+            if res is None:
+                raise ValueError(
+                    solver.stop_reason.value if solver.stop_reason else "no convergence"
+                )
+            x, iterations = res
+            residual = abs(float(equation.f(x)))
+            if problem.root is not None:
+                error = abs(float(x - sp.Float(problem.root)))
+        except Exception as e:
+            # a crashing method is a result too
+            status = str(e) or e.__class__.__name__
+        seconds = time.perf_counter() - start
+    return _record(problem, method, status, seconds, perf, iterations, error, residual)
+
+
+def _solve_system(
+    problem: SystemProblem, method: SystemSolutionMethod, precision: sp.Float
+) -> BenchmarkRecord:
+    """
+    same pipeline as the system tab (without forced solves)
+    """
+    starting_xs = {k: to_sp_float(v) for k, v in problem.starting_xs.items()}
+    with PerfCounters().activate() as perf:
+        start = time.perf_counter()
+        status, iterations, residual = "ok", None, None
+        try:
+            solver: SystemSolver = SYSTEM_SOLVERS[method]()
+            if GlobalConfig().SCIPY:
+                solver = scipy_system_solver(method, starting_xs, precision) or solver
+            with stage(Stage.CONVERGENCE_CHECK):
+                if not solver.check_convergence(problem.system, starting_xs):
+                    raise ValueError("method does not converge")
+            res = solver.solve(problem.system, starting_xs, precision)
+            if res is None:
+                raise ValueError(
+                    solver.stop_reason.value if solver.stop_reason else "no convergence"
+                )
+            xs, iterations = res
+            residual = max(abs(float(y)) for y in problem.system.apply(xs))
+        except Exception as e:
+            # a crashing method is a result too
+            status = str(e) or e.__class__.__name__
+        seconds = time.perf_counter() - start
+    return _record(problem, method, status, seconds, perf, iterations, None, residual)
+
+
+def _record(
+    problem: Problem | SystemProblem,
+    method: SolutionMethod | SystemSolutionMethod,
+    status: str,
+    seconds: float,
+    perf: PerfCounters,
+    iterations: int | None,
+    error: float | None,
+    residual: float | None,
+) -> BenchmarkRecord:
+    return BenchmarkRecord(
+        problem.name,
+        problem.category,
+        method.name,
+        status,
+        seconds,
+        {s.value: t for s, t in perf.stage_times.items()},
+        {e.value: n for e, n in perf.evaluations.items()},
+        iterations,
+        error,
+        residual,
+    )
+
+
+def _best_of(run: Callable[[], BenchmarkRecord], repeat: int) -> BenchmarkRecord:
+    best = run()
+    for _ in range(repeat - 1):
+        record = run()
+        if record.seconds < best.seconds:
+            best = record
+    return best
+
+
+def run_benchmarks(
+    precision: str = DEFAULT_PRECISION,
+    repeat: int = 1,
+    name_filter: str | None = None,
+    on_record: Callable[[BenchmarkRecord], None] | None = None,
+) -> List[BenchmarkRecord]:
+    """
+    runs every method on every problem whose name contains name_filter
+    """
+    if repeat <= 0:
+        raise ValueError("repeat must be positive")
+    eps = to_sp_float(precision)
+    records: List[BenchmarkRecord] = []
+
+    def add(record: BenchmarkRecord) -> None:
+        logger.debug(
+            "benchmark", record.key, record.status, record.seconds, record.evaluations
+        )
+        records.append(record)
+        if on_record:
+            on_record(record)
+
+    for problem in PROBLEMS:
+        if name_filter and name_filter not in problem.name:
+            continue
+        for method in SolutionMethod:
+            add(_best_of(lambda: _solve_single(problem, method, eps), repeat))
+    for system_problem in SYSTEM_PROBLEMS:
+        if name_filter and name_filter not in system_problem.name:
+            continue
+        for system_method in SystemSolutionMethod:
+            add(
+                _best_of(
+                    lambda: _solve_system(system_problem, system_method, eps), repeat
+                )
+            )
+    return records
+
+
+def save_records(
+    file_path: str, records: List[BenchmarkRecord], precision: str
+) -> None:
+    with open(file_path, "w") as f:
+        json.dump(
+            {
+                "version": BASELINE_VERSION,
+                "precision": precision,
+                "records": [record.to_dict() for record in records],
+            },
+            f,
+            indent=4,
+        )
+
+
+def load_records(file_path: str) -> List[BenchmarkRecord]:
+    with open(file_path) as f:
+        obj = json.load(f)
+    if obj.get("version") != BASELINE_VERSION:
+        raise ValueError(f"unsupported baseline version {obj.get('version')}")
+    return [BenchmarkRecord.from_dict(record) for record in obj["records"]]
+
+
+def compare(
+    records: List[BenchmarkRecord],
+    baseline: List[BenchmarkRecord],
+    time_tolerance: float = TIME_TOLERANCE,
+) -> List[str]:
+    """
+    @returns human readable regressions of records against the baseline
+    """
+    by_key = {record.key: record for record in baseline}
+    regressions = []
+    for record in records:
+        base = by_key.get(record.key)
+        if base is None:
+            continue
+        if base.status == "ok" and record.status != "ok":
+            regressions.append(f"{record.key}: now fails ({record.status})")
+            continue
+        if record.status != "ok":
+            continue
+        if (
+            record.seconds > base.seconds * time_tolerance
+            and record.seconds - base.seconds > TIME_NOISE_FLOOR
+        ):
+            regressions.append(
+                f"{record.key}: {base.seconds:.4f}s -> {record.seconds:.4f}s"
+            )
+        evaluations, base_evaluations = (
+            sum(record.evaluations.values()),
+            sum(base.evaluations.values()),
+        )
+        if evaluations > base_evaluations:
+            regressions.append(
+                f"{record.key}: {base_evaluations} -> {evaluations} evaluations"
+            )
+        if (
+            record.iterations is not None
+            and base.iterations is not None
+            and record.iterations > base.iterations
+        ):
+            regressions.append(
+                f"{record.key}: {base.iterations} -> {record.iterations} iterations"
+            )
+        for name in ("error", "residual"):
+            value, base_value = getattr(record, name), getattr(base, name)
+            if value is None or base_value is None:
+                continue
+            if value > base_value * ERROR_TOLERANCE and value > ERROR_NOISE_FLOOR:
+                regressions.append(
+                    f"{record.key}: {name} {base_value:.3e} -> {value:.3e}"
+                )
+    return regressions
@@ -0,0 +1,108 @@
+import argparse
+import sys
+
+from bench.runner import (
+    DEFAULT_PRECISION,
+    TIME_TOLERANCE,
+    BenchmarkRecord,
+    compare,
+    load_records,
+    run_benchmarks,
+    save_records,
+)
+from config import DEFAULT_CACHE_DIR, GlobalConfig
+from logger import GlobalLogger, LogLevel
+
+if __name__ != "__main__":
+    exit(0)
+
+
+def print_record(record: BenchmarkRecord) -> None:
+    evaluations = " ".join(f"{k}={v}" for k, v in record.evaluations.items())
+    error = f"{record.error:.2e}" if record.error is not None else "-"
+    residual = f"{record.residual:.2e}" if record.residual is not None else "-"
+    print(
+        f"{record.key:<45} {record.seconds:>9.4f}s "
+        f"it={record.iterations if record.iterations is not None else '-':<6} "
+        f"err={error:<9} res={residual:<9} {evaluations}"
+        + ("" if record.status == "ok" else f"  [{record.status}]")
+    )
+
+
+def run() -> int:
+    parser = argparse.ArgumentParser(
+        description="runs every solution method on the benchmark problems"
+    )
+    parser.add_argument(
+        "-b", "--baseline", help="baseline json to compare against", default=None
+    )
+    parser.add_argument("-o", "--output", help="save results as json", default=None)
+    parser.add_argument("-p", "--precision", default=DEFAULT_PRECISION)
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=1, help="keep the best of N runs"
+    )
+    parser.add_argument(
+        "-k", "--filter", default=None, help="only problems containing this"
+    )
+    parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=TIME_TOLERANCE,
+        help="slowdown factor that counts as a regression",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        help="use the on-disk cache of prepared equations (cold runs by default)",
+    )
+    parser.add_argument(
+        "--autodiff",
+        action="store_true",
+        help="derivatives by automatic differentiation instead of sympy",
+    )
+    parser.add_argument(
+        "--scipy",
+        action="store_true",
+        help="scipy.optimize for the methods it has, where the precision allows",
+    )
+    parser.add_argument(
+        "--time-budget", type=float, default=None, help="seconds per solve"
+    )
+    parser.add_argument(
+        "--evaluation-budget",
+        type=int,
+        default=None,
+        help="function evaluations per solve",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    if args.repeat <= 0:
+        parser.error("--repeat must be positive")
+    if args.time_budget is not None and args.time_budget <= 0:
+        parser.error("--time-budget must be positive")
+    if args.evaluation_budget is not None and args.evaluation_budget <= 0:
+        parser.error("--evaluation-budget must be positive")
+    GlobalLogger().set_min_level(LogLevel.DEBUG if args.verbose else LogLevel.WARNING)
+    GlobalConfig().CACHE_DIR = args.cache
+    GlobalConfig().AUTODIFF = args.autodiff
+    GlobalConfig().SCIPY = args.scipy
+    GlobalConfig().TIME_BUDGET = args.time_budget
+    GlobalConfig().EVALUATION_BUDGET = args.evaluation_budget
+
+    baseline = load_records(args.baseline) if args.baseline else None
+    records = run_benchmarks(args.precision, args.repeat, args.filter, print_record)
+    print(f"total: {sum(r.seconds for r in records):.3f}s")
+    if args.output:
+        save_records(args.output, records, args.precision)
+    if baseline is None:
+        return 0
+    regressions = compare(records, baseline, args.time_tolerance)
+    for regression in regressions:
+        print("REGRESSION", regression)
+    print(f"{len(regressions)} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+sys.exit(run())
@@ -1,3 +1,5 @@
+import os
+
 from mpmath import mp  # type: ignore
 
 from utils.meta import singleton
@@ -5,6 +7,12 @@ from utils.meta import singleton
 EPS = 0.0001
 PRECISION = 69
 
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "compmathlab2",
+)
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
 
 # ------- порошок уходи --------
 
@@ -14,6 +22,20 @@ mp.dps = PRECISION
 @singleton
 class GlobalConfig:
     FORCE_SOLVE_SYSTEM: bool = False
+    # iteration traces, see utils.trace
+    RECORD_TRACE: bool = False
+    TRACE_MAX_SIZE: int | None = None
+    # prepared equations, see utils.disk_cache. off (None) unless asked for
+    CACHE_DIR: str | None = None
+    CACHE_MAX_BYTES: int = DEFAULT_CACHE_MAX_BYTES
+    # derivatives by forward mode autodiff instead of sympy, see utils.autodiff
+    AUTODIFF: bool = False
+    # float64 solves by scipy.optimize where the precision allows it, see
+    # solvers.scipy_solver
+    SCIPY: bool = False
+    # limits of a single solve, see solvers.monitor. None for no limit
+    TIME_BUDGET: float | None = None
+    EVALUATION_BUDGET: int | None = None
 
     def __init__(self) -> None:
         pass
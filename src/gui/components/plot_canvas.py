@@ -1,20 +1,75 @@
-from typing import Dict, List
+import time
+from typing import Any, Callable, Dict, Hashable, List, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 import sympy as sp  # type: ignore
+from matplotlib.artist import Artist
 from matplotlib.axes import Axes
+from matplotlib.contour import QuadContourSet
 from matplotlib.figure import Figure
 from matplotlib.lines import Line2D
 
 from logger import GlobalLogger
 from utils.equations import EquationSystem
+from utils.numeric import FloatArray, lambdify_numpy
+from utils.sampling import ContourCache, Viewport, adaptive_sample, viewport_around
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas  # type: ignore # isort: skip
 
-
 logger = GlobalLogger()
 
+# share of the y range (by percentile) kept in view, so that poles don't flatten the plot
+Y_VIEW_PERCENTILES = (1, 99)
+VIEW_PADDING = 0.05
+
+contour_cache = ContourCache()
+
+TRAJECTORY_MAX_FPS = 30
+TRAJECTORY_MAX_POINTS = 2048
+
+
+class DecimatingBuffer:
+    """
+    bounded storage of 2d points. when it fills up every second point is dropped
+    and from then on only every (2 * stride)-th point is stored; the latest point
+    is always kept
+    """
+
+    xs: FloatArray
+    ys: FloatArray
+    size: int = 0
+    stride: int = 1
+    seen: int = 0
+    last: Tuple[float, float] | None = None
+
+    def __init__(self, capacity: int = TRAJECTORY_MAX_POINTS) -> None:
+        self.xs = np.empty(capacity, dtype=np.float64)
+        self.ys = np.empty(capacity, dtype=np.float64)
+
+    def clear(self) -> None:
+        self.size, self.stride, self.seen, self.last = 0, 1, 0, None
+
+    def append(self, x: float, y: float) -> None:
+        if self.seen % self.stride == 0:
+            if self.size == self.xs.size:
+                half = self.size // 2
+                self.xs[:half] = self.xs[: self.size : 2]
+                self.ys[:half] = self.ys[: self.size : 2]
+                self.size = half
+                self.stride *= 2
+            if self.seen % self.stride == 0:
+                self.xs[self.size], self.ys[self.size] = x, y
+                self.size += 1
+        self.seen += 1
+        self.last = (x, y)
+
+    def data(self) -> Tuple[FloatArray, FloatArray]:
+        xs, ys = self.xs[: self.size], self.ys[: self.size]
+        if self.last is not None and (self.seen - 1) % self.stride != 0:
+            xs, ys = np.append(xs, self.last[0]), np.append(ys, self.last[1])
+        return xs, ys
+
 
 class PlotCanvas(FigureCanvas):
     figure: Figure
@@ -24,66 +79,177 @@ class PlotCanvas(FigureCanvas):
     y_axis_symbol: str | None = None
 
     line: Line2D | None = None
-    x_data: List[float] = []
-    y_data: List[float] = []
+    trajectory: DecimatingBuffer
+    # blitting state of the polygon chain
+    background: Any = None
+    last_frame: float = 0.0
+
+    # reused between replots instead of clearing the axes
+    function_lines: Dict[str, Line2D]
+    interval_span: Artist | None = None
+    points: List[Line2D]
+    contours: List[QuadContourSet]
+    contour_key: Tuple[Hashable, Viewport] | None = None
+    system: EquationSystem | None = None
+    # ax.clear() drops axes callbacks, so they are kept here and reconnected
+    xlim_listeners: List[Callable[[Axes], None]]
 
     def __init__(self) -> None:
         self.figure, self.ax = plt.subplots()
         super().__init__(self.figure)
+        self.function_lines = {}
+        self.points = []
+        self.contours = []
+        self.xlim_listeners = []
+        self.trajectory = DecimatingBuffer()
+        self.mpl_connect("draw_event", self._on_draw)
         self.ax.autoscale(False)
+        self._setup_axes()
+
+    def _setup_axes(self) -> None:
+        self.ax.axhline(0, color="gray", lw=0.5)
+        self.ax.axvline(0, color="gray", lw=0.5)
+        self.ax.grid(True)
+        for listener in self.xlim_listeners:
+            self.ax.callbacks.connect("xlim_changed", listener)
+
+    def add_xlim_listener(self, listener: Callable[[Axes], None]) -> None:
+        self.xlim_listeners.append(listener)
+        self.ax.callbacks.connect("xlim_changed", listener)
 
     def clear(self) -> None:
-        self.x_data.clear()
-        self.y_data.clear()
+        self.trajectory.clear()
+        self.line = None
         self.ax.clear()
+        self.function_lines.clear()
+        self.interval_span = None
+        self.points.clear()
+        self.contours.clear()
+        self.contour_key = None
+        self.system = None
+        self._setup_axes()
+
+    def clear_points(self) -> None:
+        for point in self.points:
+            point.remove()
+        self.points.clear()
+
+    def _fit_view(self) -> None:
+        xs = [line.get_xdata() for line in self.function_lines.values()]
+        ys = [line.get_ydata() for line in self.function_lines.values()]
+        if not xs:
+            return
+        x_vals = np.concatenate(xs).astype(float)
+        y_vals = np.concatenate(ys).astype(float)
+        y_vals = y_vals[np.isfinite(y_vals)]
+        if x_vals.size == 0 or y_vals.size == 0:
+            return
+        y_lo, y_hi = np.percentile(y_vals, Y_VIEW_PERCENTILES)
+        pad = (y_hi - y_lo) * VIEW_PADDING or 1.0
+        self.ax.set_xlim(float(np.nanmin(x_vals)), float(np.nanmax(x_vals)))
+        self.ax.set_ylim(float(y_lo - pad), float(y_hi + pad))
 
     def plot_function(
-        self, x_vals: List[float], y_vals: List[float], label: str
+        self,
+        x_vals: FloatArray | List[float],
+        y_vals: FloatArray | List[float],
+        label: str,
     ) -> None:
-        self.ax.plot(x_vals, y_vals, label=label)
-        self.ax.axhline(0, color="gray", lw=0.5)
-        self.ax.axvline(0, color="gray", lw=0.5)
-        self.ax.grid(True)
-        self.ax.legend()
-        self.draw()
+        line = self.function_lines.get(label)
+        if line is None:
+            (line,) = self.ax.plot(x_vals, y_vals, label=label)
+            self.function_lines[label] = line
+            self.ax.legend()
+        else:
+            line.set_data(x_vals, y_vals)
+        self._fit_view()
+        self.draw_idle()
+
+    def set_function_data(
+        self, label: str, x_vals: FloatArray, y_vals: FloatArray
+    ) -> None:
+        """
+        replaces samples of an already plotted function, keeping the current view
+        """
+        line = self.function_lines.get(label)
+        if line is None:
+            return
+        line.set_data(x_vals, y_vals)
+        self.draw_idle()
 
     def highlight_x_interval(self, l: float, r: float) -> None:
-        self.ax.axvspan(
+        if self.interval_span is not None:
+            self.interval_span.remove()
+        self.interval_span = self.ax.axvspan(
             l, r, facecolor="yellow", alpha=0.5, label="selected x interval"
         )
         self.ax.legend()
-        self.draw()
+        self.draw_idle()
 
-    def plot_system(self, system: EquationSystem) -> None:
+    def plot_system(
+        self, system: EquationSystem, focus: List[Dict[str, float]] | None = None
+    ) -> None:
+        """
+        plots the system around the focus points (e.g. the starting point);
+        the contours are only recomputed when the system or the viewport changes
+        """
         if len(system.symbols) > 2:
             return
-        self.clear()
-        self.ax.grid(True)
-        self.ax.axhline(0, color="gray", lw=0.5)
-        self.ax.axvline(0, color="gray", lw=0.5)
         if len(system.symbols) == 1:
+            self.clear()
             for e in system.equations:
                 logger.debug(e, e.f.expr, e.f.expr.free_symbols)
-                xs = list(np.linspace(-10, 10, 1000).astype(float))
-                ys = [e.f(x) for x in xs]
-                self.plot_function(xs, ys, "f(x)")
+                f_xs, f_ys = adaptive_sample(lambdify_numpy(e.f), -10, 10)
+                self.plot_function(f_xs, f_ys, e.f_str())
         elif len(system.symbols) == 2:
-            x, y = system.symbols
-            for e in system.equations:
-                fn_np = sp.lambdify((x, y), e.f(x, y), "numpy")
-                xs = list(np.linspace(-10, 10, 400).astype(float))
-                ys = list(np.linspace(-10, 10, 400).astype(float))
-                X, Y = np.meshgrid(xs, ys)
-                Z = fn_np(X, Y)
-                self.ax.contour(X, Y, Z, levels=[0], colors="r")
-            if self.x_axis_symbol is None or self.y_axis_symbol is None:
-                logger.warning(
-                    "plot_system: x_axis_symbol or y_axis_symbol is None; assessing sorted order"
-                )
-                self.set_x_y_symbols(*sorted(map(str, system.symbols)))
-            self.ax.set_xlabel(x.name)
-            self.ax.set_ylabel(y.name)
-            self.draw()
+            if system is not self.system:
+                self.clear()
+                self.system = system
+            self.clear_points()
+            self.focus_on(focus or [])
+
+    def focus_on(self, points: List[Dict[str, float]]) -> None:
+        """
+        moves the viewport of a 2-variable system so that it contains the points
+        """
+        system = self.system
+        if system is None:
+            return
+        x_name, y_name = self.x_axis_symbol, self.y_axis_symbol
+        if x_name is None or y_name is None:
+            logger.warning(
+                "plot_system: x_axis_symbol or y_axis_symbol is None; assessing sorted order"
+            )
+            x_name, y_name = sorted(map(str, system.symbols))
+            self.set_x_y_symbols(x_name, y_name)
+        viewport = viewport_around(
+            [
+                (float(p[x_name]), float(p[y_name]))
+                for p in points
+                if x_name in p and y_name in p
+            ]
+        )
+        system_key = (x_name, y_name, tuple(e.f_str() for e in system.equations))
+        if self.contour_key == (system_key, viewport):
+            return
+        self.contour_key = (system_key, viewport)
+
+        x, y = sp.Symbol(x_name), sp.Symbol(y_name)
+        xs, ys, zs = contour_cache.get(
+            system_key,
+            lambda: [
+                lambdify_numpy(sp.Lambda((x, y), e.f(x, y))) for e in system.equations
+            ],
+            viewport,
+        )
+        for contour in self.contours:
+            contour.remove()
+        self.contours = [self.ax.contour(xs, ys, z, levels=[0], colors="r") for z in zs]
+        self.ax.set_xlim(viewport[0], viewport[1])
+        self.ax.set_ylim(viewport[2], viewport[3])
+        self.ax.set_xlabel(x_name)
+        self.ax.set_ylabel(y_name)
+        self.draw_idle()
 
     def set_x_y_symbols(self, x_axis_symbol: str, y_axis_symbol: str) -> None:
         logger.debug(
@@ -97,8 +263,8 @@ class PlotCanvas(FigureCanvas):
 
     def plot_point(self, x: float, y: float) -> None:
         logger.debug(f"plotting point ({x}, {y})")
-        self.ax.plot(x, y, marker="o", markersize=5)
-        self.draw()
+        self.points.extend(self.ax.plot(x, y, marker="o", markersize=5))
+        self.draw_idle()
 
     def plot_point_multi(self, point: Dict[str, float]) -> None:
         if self.x_axis_symbol is None or self.y_axis_symbol is None:
@@ -111,9 +277,32 @@ class PlotCanvas(FigureCanvas):
             return
         self.plot_point(point[self.x_axis_symbol], point[self.y_axis_symbol])
 
+    def _on_draw(self, event: Any) -> None:
+        # a full redraw skips animated artists and invalidates the saved background
+        if self.line is None:
+            return
+        self.background = self.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+
+    def _blit_polygon_chain(self) -> None:
+        if self.line is None:
+            return
+        self.line.set_data(*self.trajectory.data())
+        if self.background is None:
+            self.draw()
+            return
+        self.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        self.blit(self.ax.bbox)
+        self.last_frame = time.perf_counter()
+
     def start_polygon_chain(self) -> None:
-        (self.line,) = self.ax.plot([], [], marker="o", linestyle="-")
-        plt.ion()
+        self.trajectory.clear()
+        (self.line,) = self.ax.plot([], [], marker="o", linestyle="-", animated=True)
+        # removed together with the points on replot
+        self.points.append(self.line)
+        self.background = None
+        self.last_frame = 0.0
 
     def add_to_polygon_chain(self, xs: Dict[str, float]) -> None:
         if self.x_axis_symbol is None or self.y_axis_symbol is None:
@@ -128,13 +317,18 @@ class PlotCanvas(FigureCanvas):
         ):
             return
         # logger.debug(f"plotting point {xs=}")
-        self.x_data.append(xs[self.x_axis_symbol])
-        self.y_data.append(xs[self.y_axis_symbol])
-        self.line.set_data(self.x_data, self.y_data)
-        self.draw()
+        self.trajectory.append(
+            float(xs[self.x_axis_symbol]), float(xs[self.y_axis_symbol])
+        )
+        if time.perf_counter() - self.last_frame >= 1 / TRAJECTORY_MAX_FPS:
+            self._blit_polygon_chain()
 
     def end_polygon_chain(self) -> None:
+        if self.line is not None:
+            self.line.set_data(*self.trajectory.data())
+            # back to a regular artist, so that it stays on the following redraws
+            self.line.set_animated(False)
         self.line = None
-        self.x_data.clear()
-        self.y_data.clear()
-        plt.ioff()
+        self.background = None
+        self.trajectory.clear()
+        self.draw_idle()
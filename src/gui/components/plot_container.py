@@ -1,12 +1,28 @@
-from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+
+import sympy as sp  # type: ignore
+from matplotlib.axes import Axes
 
 # bug, import works
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT  # type: ignore
+from PyQt6.QtCore import QTimer, pyqtSignal
 from PyQt6.QtWidgets import QVBoxLayout, QWidget
 
 from gui.components.plot_canvas import PlotCanvas
+from logger import GlobalLogger
+from utils.numeric import FloatArray, NumpyFn
+from utils.sampling import TileCache
+
+FN_LABEL = "f(x)"
+# pan/zoom events closer than this are merged into one resample
+RESAMPLE_DEBOUNCE_MS = 150
+
 
-X_POINTS_PER_PLOT = 1000
+logger = GlobalLogger()
+
+# shared between containers, so replotting the same function is instant too
+tile_cache = TileCache()
 
 
 class PlotContainer(QWidget):
@@ -14,7 +30,15 @@ class PlotContainer(QWidget):
     canvas: PlotCanvas
     interval_l: float
     interval_r: float
-    fn: Callable[[float], float]
+    fn: NumpyFn | None = None
+    fn_key: sp.Lambda | None = None
+
+    resampled = pyqtSignal(int, object)
+    resample_timer: QTimer
+    executor: ThreadPoolExecutor
+    # bumped on every request, results of outdated requests are dropped
+    generation: int = 0
+    closed: bool = False
 
     def __init__(self) -> None:
         super().__init__()
@@ -26,11 +50,81 @@ class PlotContainer(QWidget):
         layout.addWidget(self.canvas)
         self.setLayout(layout)
 
-        # self.canvas.ax.callbacks.connect("xlim_changed", replot_fn) # TODO
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # the executor outlives the python side of the widget otherwise
+        executor = self.executor
+        self.destroyed.connect(
+            lambda: executor.shutdown(wait=False, cancel_futures=True)
+        )
+        self.resample_timer = QTimer(self)
+        self.resample_timer.setSingleShot(True)
+        self.resample_timer.setInterval(RESAMPLE_DEBOUNCE_MS)
+        self.resample_timer.timeout.connect(self._resample)
+        self.resampled.connect(self._on_resampled)
+        self.canvas.add_xlim_listener(self._on_xlim_changed)
+
+    def shutdown(self) -> None:
+        """
+        stops resampling, pending requests are dropped
+        """
+        self.closed = True
+        self.resample_timer.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
     def set_fn(
-        self, fn: Callable[[float], float], interval_l: float, interval_r: float
+        self, fn_key: sp.Lambda, fn: NumpyFn, interval_l: float, interval_r: float
     ) -> None:
+        """
+        plots fn over the interval (with 10% margins) and keeps it sampled on pan/zoom,
+        fn_key is the expression it was compiled from
+        """
         self.fn = fn
+        self.fn_key = fn_key
         self.interval_l = interval_l
         self.interval_r = interval_r
+        self.generation += 1
+        w = interval_r - interval_l
+        xs, ys = tile_cache.sample(
+            fn_key, fn, interval_l - w * 0.1, interval_r + w * 0.1
+        )
+        self.canvas.clear_points()
+        self.canvas.plot_function(xs, ys, FN_LABEL)
+        self.canvas.highlight_x_interval(interval_l, interval_r)
+
+    def _on_xlim_changed(self, ax: Axes) -> None:
+        if self.fn is None:
+            return
+        self.generation += 1
+        l, r = ax.get_xlim()
+        if tile_cache.has_view(self.fn_key, l, r):
+            # zooming back to a seen range, every tile is cached
+            self.resample_timer.stop()
+            self.canvas.set_function_data(
+                FN_LABEL, *tile_cache.sample(self.fn_key, self.fn, l, r)
+            )
+        else:
+            self.resample_timer.start()
+
+    def _resample(self) -> None:
+        fn, fn_key = self.fn, self.fn_key
+        if fn is None or self.closed:
+            return
+        l, r = self.canvas.ax.get_xlim()
+        generation = self.generation
+        logger.debug("resampling", fn_key, "on", [l, r])
+
+        def task() -> None:
+            try:
+                # emitted from the worker thread, delivered on the gui thread
+                self.resampled.emit(generation, tile_cache.sample(fn_key, fn, l, r))
+            except Exception as e:
+                logger.warning(f"resampling {fn_key} failed: {e}")
+
+        self.executor.submit(task)
+
+    def _on_resampled(
+        self, generation: int, samples: Tuple[FloatArray, FloatArray]
+    ) -> None:
+        if generation != self.generation:
+            return
+        self.canvas.set_function_data(FN_LABEL, *samples)
@@ -1,3 +1,4 @@
+from PyQt6.QtGui import QCloseEvent
 from PyQt6.QtWidgets import QMainWindow, QTabWidget, QVBoxLayout, QWidget
 
 from gui.views.single_tab import SingleTab
@@ -5,6 +6,9 @@ from gui.views.system_tab import SystemTab
 
 
 class EquationSolverApp(QMainWindow):
+    single_tab: SingleTab
+    system_tab: SystemTab
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -17,8 +21,15 @@ class EquationSolverApp(QMainWindow):
         layout = QVBoxLayout()
 
         tab_widget = QTabWidget()
-        tab_widget.addTab(SingleTab(), "Single")
-        tab_widget.addTab(SystemTab(), "System")
+        self.single_tab = SingleTab()
+        self.system_tab = SystemTab()
+        tab_widget.addTab(self.single_tab, "Single")
+        tab_widget.addTab(self.system_tab, "System")
         layout.addWidget(tab_widget)
 
         central_widget.setLayout(layout)
+
+    def closeEvent(self, event: QCloseEvent | None) -> None:
+        self.single_tab.shutdown()
+        self.system_tab.shutdown()
+        super().closeEvent(event)
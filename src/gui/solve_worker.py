@@ -0,0 +1,100 @@
+import time
+from typing import Any, Callable, List
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from logger import GlobalLogger
+
+# progress is batched, so that long runs don't flood the gui event queue
+PROGRESS_INTERVAL = 1 / 30
+# how long closing the window waits for a cancelled solve, ms. cancellation is
+# only noticed between stages and iterations
+STOP_TIMEOUT_MS = 5000
+
+
+logger = GlobalLogger()
+
+
+class SolveCancelledError(Exception):
+    pass
+
+
+class SolveWorker(QThread):
+    """
+    runs task(worker) off the gui thread. the task reports back through the
+    report_* methods; the signals are delivered on the gui thread
+    """
+
+    # (last iteration, iterates since the previous progress signal)
+    progress = pyqtSignal(int, list)
+    # e.g. the parsed equation, before the solve starts
+    prepared = pyqtSignal(object)
+    warned = pyqtSignal(str)
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    task: Callable[["SolveWorker"], Any]
+    cancel_requested: bool = False
+    pending: List[Any]
+    iteration: int = 0
+    last_progress: float = 0.0
+
+    def __init__(self, task: Callable[["SolveWorker"], Any]) -> None:
+        super().__init__()
+        self.task = task
+        self.pending = []
+
+    def cancel(self) -> None:
+        self.cancel_requested = True
+
+    def stop(self) -> bool:
+        """
+        cancels the solve and waits for the thread to finish
+        @returns False if it didn't finish in STOP_TIMEOUT_MS
+        """
+        self.cancel()
+        self.quit()
+        return self.wait(STOP_TIMEOUT_MS)
+
+    def check_cancelled(self) -> None:
+        if self.cancel_requested:
+            raise SolveCancelledError()
+
+    def report_prepared(self, obj: Any) -> None:
+        self.check_cancelled()
+        self.prepared.emit(obj)
+
+    def report_warning(self, message: str) -> None:
+        self.warned.emit(message)
+
+    def report_iteration(self, x: Any, iteration: int) -> None:
+        """
+        matches the on_iteration hooks of the solvers
+        """
+        self.check_cancelled()
+        self.pending.append(x)
+        self.iteration = iteration
+        now = time.perf_counter()
+        if now - self.last_progress >= PROGRESS_INTERVAL:
+            self._flush_progress()
+            self.last_progress = now
+
+    def _flush_progress(self) -> None:
+        if self.pending:
+            self.progress.emit(self.iteration, self.pending)
+            self.pending = []
+
+    def run(self) -> None:
+        try:
+            result = self.task(self)
+        except SolveCancelledError:
+            logger.info("solve cancelled")
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            logger.debug(f"solve failed: {e}")
+            self.failed.emit(str(e))
+            return
+        self._flush_progress()
+        self.succeeded.emit(result)
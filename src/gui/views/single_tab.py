@@ -1,6 +1,5 @@
-from typing import Callable, Tuple
+from typing import Any, List, Tuple
 
-import numpy as np
 import sympy as sp  # type: ignore
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
@@ -19,16 +18,23 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
-from config import EPS
+from config import EPS, GlobalConfig
 from gui.components.plot_container import PlotContainer
 from gui.guiutils import show_error_message
+from gui.solve_worker import SolveWorker
 from logger import GlobalLogger
+from solvers.auto_solver import AutoSolver
 from solvers.chord_solver import ChordSolver
+from solvers.deflated_newton_solver import DeflatedNewtonSolver
 from solvers.fixed_point_iteration_solver import FixedPointIterationSolver
+from solvers.high_precision_newton_solver import HighPrecisionNewtonSolver
 from solvers.newton_solver import NewtonSolver
+from solvers.scipy_solver import scipy_solver
 from solvers.solver import Solver
 from utils.equations import Equation, SolutionMethod
 from utils.math import check_single_root
+from utils.perf import Evaluation, PerfCounters, Stage, counted, stage
+from utils.trace import TraceRecorder
 from utils.validation import is_float, to_sp_float
 from utils.writer import ResWriter, SolutionResult
 
@@ -47,6 +53,9 @@ class SingleTab(QWidget):
     result_table: QTableWidget
     plot_container: PlotContainer
     save_to_file_button: QPushButton
+    cancel_button: QPushButton
+    progress_label: QLabel
+    solve_worker: SolveWorker | None = None
 
     def __init__(self) -> None:
         super().__init__()
@@ -80,6 +89,12 @@ class SingleTab(QWidget):
         self.solve_button = QPushButton("Solve")
         self.solve_button.clicked.connect(self.solve_equation)
         vbox0.addWidget(self.solve_button)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_solve)
+        vbox0.addWidget(self.cancel_button)
+        self.progress_label = QLabel()
+        vbox0.addWidget(self.progress_label)
         # vbox0.addStretch()
         grid0.addLayout(vbox0, 0, 0, 7, 1)
         vbox0.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -126,18 +141,11 @@ class SingleTab(QWidget):
         grid0.setColumnStretch(1, 0)
         self.setLayout(grid0)
 
-    def set_result(
-        self,
-        equation: Equation,
-        x: sp.Float,
-        y: sp.Float,
-        iterations: int,
-        solution_method: SolutionMethod,
-    ) -> None:
-        self.result = SolutionResult(equation, x, y, iterations, solution_method)
-        self.result_table.setItem(0, 0, QTableWidgetItem(str(x)))
-        self.result_table.setItem(1, 0, QTableWidgetItem(str(y)))
-        self.result_table.setItem(2, 0, QTableWidgetItem(str(iterations)))
+    def set_result(self, result: SolutionResult) -> None:
+        self.result = result
+        self.result_table.setItem(0, 0, QTableWidgetItem(str(result.x)))
+        self.result_table.setItem(1, 0, QTableWidgetItem(str(result.y)))
+        self.result_table.setItem(2, 0, QTableWidgetItem(str(result.iterations)))
 
     def _parse_values(self) -> Tuple[str, sp.Float, sp.Float, sp.Float, SolutionMethod]:
         equation = self.equation_input.text()
@@ -171,7 +179,7 @@ class SingleTab(QWidget):
             self._parse_values()
         )
         equation = Equation(interval_l, interval_r, equation_str=equation_str)
-        self.plot_function(equation.f, equation.interval_l, equation.interval_r)
+        self.plot_function(equation)
         return equation, precision, solution_method
 
     def manual_plot(self) -> None:
@@ -189,54 +197,156 @@ class SingleTab(QWidget):
         )
         if not file_path:
             return
-        res_writer = ResWriter(file_path)
-        res_writer.write_solution(self.result)
-        res_writer.destroy()
+        with ResWriter(file_path) as res_writer:
+            res_writer.write_solution(self.result)
 
     def solve_equation(self) -> None:
+        if self.solve_worker is not None:
+            return
         try:
-            equation, precision, solution_method = self.parse_validate_plot()
+            equation_str, interval_l, interval_r, precision, solution_method = (
+                self._parse_values()
+            )
         except ValueError as e:
             show_error_message(str(e))
             return
-        logger.debug("interval", equation.interval_l, equation.interval_r)
+        logger.debug("interval", interval_l, interval_r)
         logger.debug("precision", precision)
 
-        solver = Solver()
-        if not check_single_root(equation.f, equation.interval_l, equation.interval_r):
-            show_error_message("there is not exactly 1 root in the interval")
-            return
+        def task(worker: SolveWorker) -> SolutionResult:
+            with PerfCounters().activate() as perf:
+                return solve(worker, perf)
 
-        if solution_method == SolutionMethod.CHORD:
-            logger.debug("using chord")
-            solver = ChordSolver()
-        elif solution_method == SolutionMethod.NEWTON:
-            logger.debug("using newton")
-            solver = NewtonSolver()
-        elif solution_method == SolutionMethod.FIXED_POINT_ITERATION:
-            logger.debug("using fixed point iteration")
-            solver = FixedPointIterationSolver()
-
-        if not solver.check_convergence(equation):
-            show_error_message("method does not converge")
-            return
-        try:
-            res = solver.solve(equation, precision)
-            if res is None:
+        def solve(worker: SolveWorker, perf: PerfCounters) -> SolutionResult:
+            equation = Equation(interval_l, interval_r, equation_str=equation_str)
+            worker.report_prepared(equation)
+
+            solver = Solver()
+            # deflated newton looks for every root, there may be any number of them
+            if solution_method != SolutionMethod.DEFLATED_NEWTON:
+                with stage(Stage.CONVERGENCE_CHECK):
+                    single_root = check_single_root(
+                        counted(equation.f, Evaluation.F),
+                        equation.interval_l,
+                        equation.interval_r,
+                    )
+                worker.check_cancelled()
+                if not single_root:
+                    raise ValueError("there is not exactly 1 root in the interval")
+
+            if solution_method == SolutionMethod.CHORD:
+                logger.debug("using chord")
+                solver = ChordSolver()
+            elif solution_method == SolutionMethod.NEWTON:
+                logger.debug("using newton")
+                solver = NewtonSolver()
+            elif solution_method == SolutionMethod.FIXED_POINT_ITERATION:
+                logger.debug("using fixed point iteration")
+                solver = FixedPointIterationSolver()
+            elif solution_method == SolutionMethod.AUTO:
+                logger.debug("racing all methods")
+                solver = AutoSolver()
+            elif solution_method == SolutionMethod.HIGH_PRECISION_NEWTON:
+                logger.debug("using high precision newton")
+                solver = HighPrecisionNewtonSolver()
+            elif solution_method == SolutionMethod.DEFLATED_NEWTON:
+                logger.debug("using deflated newton")
+                solver = DeflatedNewtonSolver()
+            if GlobalConfig().SCIPY:
+                fast = scipy_solver(solution_method, equation, precision)
+                if fast is not None:
+                    logger.info(f"using scipy {fast.method}")
+                    solver = fast
+
+            with stage(Stage.CONVERGENCE_CHECK):
+                converges = solver.check_convergence(equation)
+            worker.check_cancelled()
+            if not converges:
                 raise ValueError("method does not converge")
+            if isinstance(solver, FixedPointIterationSolver):
+                logger.info(
+                    f"q = {equation.q} ({equation.phi_form}), a-priori bound: "
+                    f"{solver.iteration_bound(equation, precision)} iterations"
+                )
+            trace = None
+            if GlobalConfig().RECORD_TRACE:
+                trace = TraceRecorder(
+                    ["x"], ["f(x)"], max_size=GlobalConfig().TRACE_MAX_SIZE
+                )
+            res = solver.solve(equation, precision, worker.report_iteration, trace)
+            if res is None:
+                if isinstance(solver, DeflatedNewtonSolver):
+                    raise ValueError("no roots found in the interval")
+                reason = f": {solver.stop_reason.value}" if solver.stop_reason else ""
+                raise ValueError(f"method does not converge{reason}")
             x, iterations = res
-            self.set_result(equation, x, equation.f(x), iterations, solution_method)
-            self.plot_container.canvas.plot_point(x, equation.f(x))
-        except Exception as e:
-            show_error_message(str(e))
-            return
+            if isinstance(solver, AutoSolver) and solver.winner is not None:
+                method = solver.winner
+            else:
+                method = solution_method
+            roots = None
+            if isinstance(solver, DeflatedNewtonSolver):
+                roots = solver.roots
+                logger.info(
+                    f"{len(roots)} root(s): "
+                    + ", ".join(f"{float(x):.10g} (x{m})" for x, m in roots)
+                )
+            return SolutionResult(
+                equation, x, equation.f(x), iterations, method, trace, perf, roots
+            )
+
+        def on_succeeded(result: SolutionResult) -> None:
+            self.set_result(result)
+            if result.roots is None:
+                self.plot_container.canvas.plot_point(result.x, result.y)
+                return
+            for x, _ in result.roots:
+                self.plot_container.canvas.plot_point(x, result.equation.f(x))
+
+        worker = SolveWorker(task)
+        worker.prepared.connect(self.plot_function)
+        worker.succeeded.connect(on_succeeded)
+        self._start_solve(worker)
+
+    def _start_solve(self, worker: SolveWorker) -> None:
+        self.solve_worker = worker
+        worker.progress.connect(self._on_progress)
+        worker.succeeded.connect(lambda _: self.progress_label.setText(""))
+        worker.failed.connect(lambda _: self.progress_label.setText(""))
+        worker.failed.connect(show_error_message)
+        worker.cancelled.connect(lambda: self.progress_label.setText("Cancelled"))
+        worker.finished.connect(self._on_solve_finished)
+        self.solve_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress_label.setText("Solving...")
+        worker.start()
 
-    def plot_function(
-        self, fn: Callable[[sp.Float], sp.Float], l: sp.Float, r: sp.Float
-    ) -> None:
-        w = r - l
-        xs = np.linspace(l - w * 0.1, r + w * 0.1, 1000)
-        ys = [fn(x) for x in xs]
-        self.plot_container.canvas.clear()
-        self.plot_container.canvas.plot_function(list(xs), ys, "f(x)")
-        self.plot_container.canvas.highlight_x_interval(l, r)
+    def _on_progress(self, iteration: int, xs: List[Any]) -> None:
+        self.progress_label.setText(f"Iteration {iteration}: x = {float(xs[-1]):.10g}")
+
+    def _on_solve_finished(self) -> None:
+        if self.solve_worker is not None:
+            self.solve_worker.deleteLater()
+        self.solve_worker = None
+        self.solve_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def shutdown(self) -> None:
+        """
+        releases the background work of the tab, when the window closes
+        """
+        if self.solve_worker is not None and not self.solve_worker.stop():
+            logger.warning("the solve is still running, it is left to finish")
+        self.plot_container.shutdown()
+
+    def cancel_solve(self) -> None:
+        if self.solve_worker is not None:
+            self.solve_worker.cancel()
+
+    def plot_function(self, equation: Equation) -> None:
+        self.plot_container.set_fn(
+            equation.f,
+            equation.f_numpy(),
+            float(equation.interval_l),
+            float(equation.interval_r),
+        )
@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 import sympy as sp  # type: ignore
 from PyQt6.QtCore import Qt
@@ -20,8 +20,14 @@ from PyQt6.QtWidgets import (
 from config import EPS, GlobalConfig
 from gui.components.plot_container import PlotContainer
 from gui.guiutils import show_error_message
+from gui.solve_worker import SolveWorker
 from logger import GlobalLogger
 from solvers.fixed_point_iteration_system_solver import FixedPointIterationSystemSolver
+from solvers.gauss_seidel_system_solver import GaussSeidelSystemSolver, SORSystemSolver
+from solvers.homotopy_system_solver import HomotopySystemSolver
+from solvers.krawczyk_system_solver import KrawczykSystemSolver
+from solvers.levenberg_marquardt_system_solver import LevenbergMarquardtSystemSolver
+from solvers.scipy_system_solver import scipy_system_solver
 from solvers.system_solver import SystemSolver
 from utils.equations import (
     SYSTEM_PRESETS,
@@ -29,6 +35,8 @@ from utils.equations import (
     EquationSystemSolution,
     SystemSolutionMethod,
 )
+from utils.perf import PerfCounters, Stage, stage
+from utils.trace import TraceRecorder
 from utils.validation import is_float, to_sp_float
 from utils.writer import ResWriter, SystemSolutionResult
 
@@ -49,6 +57,9 @@ class SystemTab(QWidget):
     result_table: QTableWidget
     plot_container: PlotContainer
     equations_vbox: QVBoxLayout
+    cancel_button: QPushButton
+    progress_label: QLabel
+    solve_worker: SolveWorker | None = None
 
     def __init__(self) -> None:
         super().__init__()
@@ -90,6 +101,12 @@ class SystemTab(QWidget):
         self.solve_button = QPushButton("Solve")
         self.solve_button.clicked.connect(self.solve_equations)
         vbox0.addWidget(self.solve_button)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_solve)
+        vbox0.addWidget(self.cancel_button)
+        self.progress_label = QLabel()
+        vbox0.addWidget(self.progress_label)
 
         grid0.addLayout(vbox0, 0, 0, 7, 1)
         vbox0.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -178,21 +195,11 @@ class SystemTab(QWidget):
                 *sorted(map(str, system.symbols))
             )
 
-    def set_result(
-        self,
-        xs: EquationSystemSolution,
-        ys: List[sp.Float],
-        iterations: int,
-        solution_method: SystemSolutionMethod,
-    ) -> None:
-        if self.equation_system is None:
-            return
-        self.result = SystemSolutionResult(
-            self.equation_system, xs, ys, iterations, solution_method
-        )
-        self.result_table.setItem(0, 0, QTableWidgetItem(str(xs)))
-        self.result_table.setItem(0, 1, QTableWidgetItem(str(ys)))
-        self.result_table.setItem(0, 2, QTableWidgetItem(str(iterations)))
+    def set_result(self, result: SystemSolutionResult) -> None:
+        self.result = result
+        self.result_table.setItem(0, 0, QTableWidgetItem(str(result.solution)))
+        self.result_table.setItem(0, 1, QTableWidgetItem(str(result.ys)))
+        self.result_table.setItem(0, 2, QTableWidgetItem(str(result.iterations)))
 
     def _parse_validate_system(self) -> EquationSystem | None:
         return self.equation_system
@@ -234,27 +241,38 @@ class SystemTab(QWidget):
         system, precision, solution_method, starting_xs = self._parse_validate_values()
         if system is None:
             raise ValueError("Equation system could not be parsed")
-        self.plot_container.canvas.plot_system(system)
-        self.plot_container.canvas.plot_point_multi(starting_xs)
+        self.plot_container.canvas.plot_system(system, [self._to_floats(starting_xs)])
+        self.plot_container.canvas.plot_point_multi(self._to_floats(starting_xs))
         return system, precision, solution_method, starting_xs
 
     def manual_plot(self) -> None:
         logger.debug("plotting")
+        try:
+            starting_xs: Dict[str, float] | None = self._to_floats(
+                self._parse_validate_starting_xs()
+            )
+        except ValueError:
+            starting_xs = None
+
         try:
             system = self._parse_validate_system()
             if system is None:
                 raise ValueError("Equation system could not be parsed")
-            self.plot_container.canvas.plot_system(system)
+            self.plot_container.canvas.plot_system(
+                system, [starting_xs] if starting_xs else []
+            )
         except ValueError as e:
             show_error_message(str(e))
 
-        try:
-            starting_xs = self._parse_validate_starting_xs()
+        if starting_xs:
             self.plot_container.canvas.plot_point_multi(starting_xs)
-        except ValueError:
-            pass
+
+    def _to_floats(self, xs: Dict[str, sp.Float]) -> Dict[str, float]:
+        return {k: float(v) for k, v in xs.items()}
 
     def solve_equations(self) -> None:
+        if self.solve_worker is not None:
+            return
         try:
             system, precision, solution_method, starting_xs = self.parse_validate_plot()
         except ValueError as e:
@@ -262,34 +280,135 @@ class SystemTab(QWidget):
             return
         logger.debug("precision", precision)
 
-        solver = SystemSolver()
-        if solution_method == SystemSolutionMethod.FIXED_POINT_ITERATION:
-            logger.debug("using fixed point iteration")
-            solver = FixedPointIterationSystemSolver()
-
-        if not solver.check_convergence(system, starting_xs):
-            show_error_message("method does not converge")
-            if GlobalConfig().FORCE_SOLVE_SYSTEM:
+        def task(worker: SolveWorker) -> SystemSolutionResult:
+            with PerfCounters().activate() as perf:
+                return solve(worker, perf)
+
+        def solve(worker: SolveWorker, perf: PerfCounters) -> SystemSolutionResult:
+            solver = SystemSolver()
+            if solution_method == SystemSolutionMethod.FIXED_POINT_ITERATION:
+                logger.debug("using fixed point iteration")
+                solver = FixedPointIterationSystemSolver()
+            elif solution_method == SystemSolutionMethod.GAUSS_SEIDEL:
+                logger.debug("using gauss-seidel")
+                solver = GaussSeidelSystemSolver()
+            elif solution_method == SystemSolutionMethod.SOR:
+                logger.debug("using successive over-relaxation")
+                solver = SORSystemSolver()
+            elif solution_method == SystemSolutionMethod.LEVENBERG_MARQUARDT:
+                logger.debug("using levenberg-marquardt")
+                solver = LevenbergMarquardtSystemSolver()
+            elif solution_method == SystemSolutionMethod.HOMOTOPY:
+                logger.debug("using homotopy continuation")
+                solver = HomotopySystemSolver()
+            elif solution_method == SystemSolutionMethod.KRAWCZYK:
+                logger.debug("using krawczyk's method")
+                solver = KrawczykSystemSolver()
+            if GlobalConfig().SCIPY:
+                fast = scipy_system_solver(solution_method, starting_xs, precision)
+                if fast is not None:
+                    logger.info(f"using scipy {fast.method}")
+                    solver = fast
+
+            with stage(Stage.CONVERGENCE_CHECK):
+                converges = solver.check_convergence(system, starting_xs)
+            worker.check_cancelled()
+            if not converges:
+                if not GlobalConfig().FORCE_SOLVE_SYSTEM:
+                    raise ValueError("method does not converge")
+                worker.report_warning("method does not converge")
                 logger.warning("system is non convergent, force solving due to flag")
-            else:
-                return
-        try:
-            self.plot_container.canvas.start_polygon_chain()
-            self.plot_container.canvas.add_to_polygon_chain(starting_xs)
-            res = solver.solve(system, starting_xs, precision, self._plot_iteration)
+            trace = None
+            if GlobalConfig().RECORD_TRACE:
+                trace = TraceRecorder(
+                    sorted(starting_xs.keys()),
+                    [e.f_str() for e in system.equations],
+                    max_size=GlobalConfig().TRACE_MAX_SIZE,
+                )
+            res = solver.solve(
+                system, starting_xs, precision, worker.report_iteration, trace
+            )
             if res is None:
-                raise ValueError("method does not converge")
-            self.plot_container.canvas.end_polygon_chain()
-        except Exception as e:
-            show_error_message(str(e))
-            return
-        if not res:
-            return
-        xs, iterations = res
-        logger.debug(f"solution success, {xs=}, {iterations=}")
-        self.set_result(xs, system.apply(xs), iterations, solution_method)
-        if len(xs) == 2:
-            self.plot_container.canvas.plot_point(*[xs[sym] for sym in xs.keys()])
+                reason = f": {solver.stop_reason.value}" if solver.stop_reason else ""
+                raise ValueError(f"method does not converge{reason}")
+            xs, iterations = res
+            solutions = None
+            if isinstance(solver, (HomotopySystemSolver, KrawczykSystemSolver)):
+                solutions = solver.solutions
+            result = SystemSolutionResult(
+                system,
+                xs,
+                system.apply(xs),
+                iterations,
+                solution_method,
+                trace,
+                perf,
+                solutions,
+            )
+            logger.info(f"residual norm: {float(result.residual_norm()):.3e}")
+            return result
+
+        def on_succeeded(result: SystemSolutionResult) -> None:
+            xs, iterations = result.solution, result.iterations
+            logger.debug(f"solution success, {xs=}, {iterations=}")
+            self.set_result(result)
+            if len(xs) == 2:
+                solution = {str(k): float(v) for k, v in xs.items()}
+                # keep both the starting point and the solution in view
+                self.plot_container.canvas.focus_on(
+                    [self._to_floats(starting_xs), solution]
+                )
+                self.plot_container.canvas.plot_point_multi(solution)
+                for other in result.solutions or []:
+                    if other is not xs:
+                        self.plot_container.canvas.plot_point_multi(
+                            {str(k): float(v) for k, v in other.items()}
+                        )
+
+        self.plot_container.canvas.start_polygon_chain()
+        self.plot_container.canvas.add_to_polygon_chain(starting_xs)
+        worker = SolveWorker(task)
+        worker.warned.connect(show_error_message)
+        worker.succeeded.connect(on_succeeded)
+        self._start_solve(worker)
+
+    def _start_solve(self, worker: SolveWorker) -> None:
+        self.solve_worker = worker
+        worker.progress.connect(self._on_progress)
+        worker.succeeded.connect(lambda _: self.progress_label.setText(""))
+        worker.failed.connect(lambda _: self.progress_label.setText(""))
+        worker.failed.connect(show_error_message)
+        worker.cancelled.connect(lambda: self.progress_label.setText("Cancelled"))
+        worker.finished.connect(self._on_solve_finished)
+        self.solve_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress_label.setText("Solving...")
+        worker.start()
+
+    def _on_progress(self, iteration: int, xss: List[Any]) -> None:
+        for xs in xss:
+            self._plot_iteration(xs, iteration)
+        self.progress_label.setText(f"Iteration {iteration}")
+
+    def _on_solve_finished(self) -> None:
+        self.plot_container.canvas.end_polygon_chain()
+        if self.solve_worker is not None:
+            self.solve_worker.deleteLater()
+        self.solve_worker = None
+        self.solve_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def shutdown(self) -> None:
+        """
+        releases the background work of the tab, when the window closes
+        """
+        if self.solve_worker is not None and not self.solve_worker.stop():
+            logger.warning("the solve is still running, it is left to finish")
+        self.plot_container.shutdown()
+
+    def cancel_solve(self) -> None:
+        if self.solve_worker is not None:
+            self.solve_worker.cancel()
 
     def _plot_iteration(self, xs: EquationSystemSolution, iteration: int) -> None:
         # logger.debug(f"plot iteration {iteration=} {xs=}")
@@ -306,6 +425,5 @@ class SystemTab(QWidget):
         )
         if file_path == "":
             return
-        res_writer = ResWriter(file_path)
-        res_writer.write_system_solution(self.result)
-        res_writer.destroy()
+        with ResWriter(file_path) as res_writer:
+            res_writer.write_system_solution(self.result)
@@ -1,5 +1,6 @@
 from enum import Enum
 from io import TextIOWrapper
+from types import FunctionType
 from typing import Any
 
 from utils.meta import singleton
@@ -32,6 +33,12 @@ class Logger:
     def set_min_level(self, min_level: LogLevel) -> None:
         self.min_level = min_level
 
+    def is_enabled(self, level: LogLevel) -> bool:
+        """
+        guard for hot paths, e.g. to skip building log arguments in a loop
+        """
+        return level.value >= self.min_level.value
+
     def log(
         self,
         *args: Any,
@@ -39,9 +46,20 @@ class Logger:
         sep: str = " ",
         end: str = "\n",
     ) -> None:
+        """
+        args are only converted to strings if the level is enabled; python
+        functions among them (e.g. lambda: f"...") are called at that point,
+        so pass expensive messages as lambdas instead of f-strings
+        """
         if level.value < self.min_level.value:
             return
-        print(f"[{log_level_to_str(level)}]", *args, sep=sep, end=end, file=self.file)
+        print(
+            f"[{log_level_to_str(level)}]",
+            *(arg() if isinstance(arg, FunctionType) else arg for arg in args),
+            sep=sep,
+            end=end,
+            file=self.file,
+        )
 
     def debug(self, *args: Any, sep: str = " ", end: str = "\n") -> None:
         self.log(*args, level=LogLevel.DEBUG, sep=sep, end=end)
@@ -8,9 +8,6 @@ from argparser import ArgParser
 from gui.gui import EquationSolverApp
 from logger import GlobalLogger, Logger, LogLevel
 
-if __name__ != "__main__":
-    exit(0)
-
 
 def run() -> None:
     parser = ArgParser()
@@ -32,4 +29,5 @@ def run() -> None:
     sys.exit(app.exec())
 
 
-run()
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,196 @@
+import math
+import time
+from typing import Callable, Iterator, List, Tuple
+
+import sympy as sp  # type: ignore
+
+from logger import GlobalLogger
+from solvers.chord_solver import ChordSolver
+from solvers.fixed_point_iteration_solver import FixedPointIterationSolver
+from solvers.monitor import Budget, IterationMonitor, StopReason
+from solvers.newton_solver import NewtonSolver
+from solvers.solver import IterationRecord, Solver
+from utils.equations import Equation, SolutionMethod
+from utils.math import signs_equal
+from utils.perf import Stage, active, stage
+from utils.trace import TraceRecorder
+
+logger = GlobalLogger()
+
+
+class Racer:
+    method: SolutionMethod
+    solver: Solver
+    records: Iterator[IterationRecord]
+    monitor: IterationMonitor
+    # time spent in this racer's steps, seconds
+    elapsed: float = 0.0
+    steps: int = 0
+    # kept only when a trace is requested, to replay the winner's
+    history: List[IterationRecord]
+
+    def __init__(
+        self,
+        method: SolutionMethod,
+        solver: Solver,
+        records: Iterator[IterationRecord],
+        monitor: IterationMonitor,
+    ):
+        self.method = method
+        self.solver = solver
+        self.records = records
+        self.monitor = monitor
+        self.history = []
+
+
+class AutoSolver(Solver):
+    """
+    races the single equation methods by interleaving their iterations: the
+    racer that has used the least time takes the next step, so the solve takes
+    about as long as the best method would (times the number of racers).
+    the first root that passes verification wins and the other racers stop.
+
+    check_convergence() is only run up front for methods where it is cheap;
+    the others are raced unchecked and dropped if they fail, run away or their
+    monitor gives up on them. every racer keeps its own MAX_ITERATIONS, the
+    budget is shared
+    """
+
+    RACERS: List[Tuple[SolutionMethod, Callable[[], Solver]]] = [
+        (SolutionMethod.CHORD, ChordSolver),
+        (SolutionMethod.NEWTON, NewtonSolver),
+        (SolutionMethod.FIXED_POINT_ITERATION, FixedPointIterationSolver),
+    ]
+
+    # method that found the last root, None before that or if none did
+    winner: SolutionMethod | None = None
+
+    def _racers(self, equation: Equation, precision: sp.Float) -> List[Racer]:
+        racers = []
+        for method, make_solver in self.RACERS:
+            solver = make_solver()
+            if solver.CHEAP_CONVERGENCE_CHECK:
+                with stage(Stage.CONVERGENCE_CHECK):
+                    converges = solver.check_convergence(equation)
+                if not converges:
+                    logger.debug("auto: skipping", method.name)
+                    continue
+            racers.append(
+                Racer(
+                    method,
+                    solver,
+                    solver.iterate(equation, precision),
+                    IterationMonitor(
+                        precision,
+                        solver.MAX_ITERATIONS,
+                        predict=solver.stops_on_step(),
+                    ),
+                )
+            )
+        return racers
+
+    def _verified(self, equation: Equation, x: sp.Float, precision: sp.Float) -> bool:
+        """
+        x is in the interval and a root is within precision of it
+        """
+        l, r, f = equation.interval_l, equation.interval_r, equation.f
+        if not l <= x <= r:
+            return False
+        return bool(
+            abs(f(x)) <= precision
+            or not signs_equal(f(x - precision), f(x + precision))
+        )
+
+    def _ran_away(self, equation: Equation, x: sp.Float) -> bool:
+        l, r = equation.interval_l, equation.interval_r
+        if not x.is_real or not math.isfinite(float(x)):
+            return True
+        return bool(x < l - (r - l) or x > r + (r - l))
+
+    def solve(
+        self,
+        equation: Equation,
+        precision: sp.Float,
+        on_iteration: Callable[[sp.Float, int], None] | None = None,
+        trace: TraceRecorder | None = None,
+    ) -> Tuple[sp.Float, int] | None:
+        """
+        @returns (x, iterations of the winner)
+        """
+        self.winner, self.stop_reason = None, None
+        counters = active()
+        budget = Budget.from_config()
+        racers = self._racers(equation, precision)
+        total_steps = 0
+        try:
+            with stage(Stage.ITERATE):
+                while racers:
+                    self.stop_reason = budget.exceeded()
+                    if self.stop_reason is not None:
+                        logger.info(lambda: f"auto: {self.stop_reason.value}")
+                        return None
+                    racer = min(racers, key=lambda r: r.elapsed)
+                    start = time.perf_counter()
+                    reason = None
+                    try:
+                        record = next(racer.records)
+                        if racer.steps >= racer.solver.MAX_ITERATIONS:
+                            reason = StopReason.MAX_ITERATIONS
+                        elif self._ran_away(equation, record.x):
+                            reason = StopReason.DIVERGED
+                    except (ArithmeticError, ValueError, TypeError) as e:
+                        # e.g. f'(x) = 0 for newton, or a complex iterate
+                        logger.debug("auto:", racer.method.name, "failed:", e)
+                        reason = StopReason.DIVERGED
+                    if reason is not None:
+                        self._drop(racers, racer, reason)
+                        continue
+                    racer.steps += 1
+                    total_steps += 1
+                    if trace is not None:
+                        racer.history.append(record)
+                    if counters is not None:
+                        counters.record_iteration(record.iteration)
+                    if on_iteration:
+                        on_iteration(record.x, total_steps)
+                    converged = racer.solver.is_converged(
+                        record, precision
+                    ) and self._verified(equation, record.x, precision)
+                    racer.elapsed += time.perf_counter() - start
+                    if converged:
+                        self.winner = racer.method
+                        logger.info(
+                            lambda: f"auto: {racer.method.value} won after {racer.steps} "
+                            f"iterations ({total_steps} steps in total)"
+                        )
+                        if trace is not None:
+                            self._replay(racer.history, trace)
+                        return record.x, record.iteration
+                    reason = racer.monitor.observe([record.x], record.step)
+                    if reason is not None:
+                        self._drop(racers, racer, reason)
+        finally:
+            for racer in racers:
+                close = getattr(racer.records, "close", None)
+                if close is not None:
+                    close()
+        return None
+
+    def _drop(self, racers: List[Racer], racer: Racer, reason: StopReason) -> None:
+        logger.debug("auto: dropping", racer.method.name, "-", reason.value)
+        racers.remove(racer)
+        self.stop_reason = reason
+
+    def _replay(self, history: List[IterationRecord], trace: TraceRecorder) -> None:
+        for record in history:
+            trace.add(
+                record.iteration,
+                [record.x],
+                [record.fx] if trace.record_residuals else None,
+                record.step,
+                record.error,
+            )
+
+    def check_convergence(self, equation: Equation) -> bool:
+        # chord always keeps up with a single bracketed root
+        return True
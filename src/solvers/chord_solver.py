@@ -1,31 +1,39 @@
-from typing import Tuple
+from typing import Iterator
 
 import sympy as sp  # type: ignore
 
-from solvers.solver import Solver
+from solvers.solver import IterationRecord, Solver
 from utils.equations import Equation
 from utils.math import signs_equal
-
-
-MAX_ITERATIONS = 100
+from utils.perf import Evaluation, counted
 
 
 class ChordSolver(Solver):
-    def solve(self, equation: Equation, precision: sp.Float) -> Tuple[sp.Float, int] | None:
+    MAX_ITERATIONS = 100
+
+    def iterate(
+        self, equation: Equation, precision: sp.Float
+    ) -> Iterator[IterationRecord]:
         a, b = equation.interval_l, equation.interval_r
-        f = equation.f
+        f = counted(equation.f, Evaluation.F)
+        fa, fb = f(a), f(b)
         prev_x = a - 10 * precision
-        for i in range(MAX_ITERATIONS):
-            x = a - (b - a) / (f(b) - f(a)) * f(a)
-            if signs_equal(f(x), f(a)):
-                a = x
+        i = 0
+        while True:
+            i += 1
+            x = a - (b - a) / (fb - fa) * fa
+            fx = f(x)
+            if signs_equal(fx, fa):
+                a, fa = x, fx
             else:
-                b = x
-            if (
-                x - prev_x <= precision
-                or abs(a - b) <= precision
-                or abs(f(x)) <= precision
-            ):
-                return x, i + 1
+                b, fb = x, fx
+            # the root stays bracketed by [a, b]
+            yield IterationRecord(i, x, x - prev_x, abs(a - b), f, fx)
             prev_x = x
-        return None
+
+    def is_converged(self, record: IterationRecord, precision: sp.Float) -> bool:
+        return bool(
+            abs(record.step) <= precision
+            or record.error <= precision
+            or abs(record.fx) <= precision
+        )
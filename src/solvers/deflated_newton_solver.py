@@ -0,0 +1,180 @@
+from typing import Callable, Iterator, List, Tuple
+
+import sympy as sp  # type: ignore
+
+from logger import GlobalLogger
+from solvers.monitor import Budget, IterationMonitor
+from solvers.solver import IterationRecord, Solver
+from utils.equations import Equation
+from utils.perf import Evaluation, Stage, active, counted, stage
+from utils.trace import TraceRecorder
+
+# a root closer than this many precisions to a known one is the known one again
+DUPLICATE_FACTOR = 100
+
+logger = GlobalLogger()
+
+
+class DeflatedNewtonSolver(Solver):
+    """
+    finds all roots in the interval: newton's method runs on
+    g(x) = f(x) / prod (x - r)^m over the roots r found so far, so every run
+    converges to a new root. g is never built, only its logarithmic derivative
+    g'/g = f'/f - sum m / (x - r) is, so nothing is re-derived.
+
+    the multiplicity of the root being approached is estimated from
+    -(g'/g)^2 / (g'/g)' on every iteration; once the estimate settles on m > 1
+    the step is multiplied by m, which makes the convergence quadratic again.
+
+    each start point is reused until the search from it fails, then the next
+    one is tried. a search also fails when its monitor gives up on it; once
+    the budget runs out the roots found so far are kept
+    """
+
+    # per root
+    MAX_ITERATIONS = 50
+    MAX_ROOTS = 100
+    START_POINTS = 8
+
+    # (x, multiplicity) found by the last find_roots(), ascending
+    roots: List[Tuple[sp.Float, int]]
+    # iterations of the last find_roots(), over all searches
+    iterations: int = 0
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.roots = []
+
+    def _start_points(self, equation: Equation) -> List[sp.Float]:
+        # midpoints of equal subintervals, f may be undefined at the ends
+        l, r = equation.interval_l, equation.interval_r
+        h = (r - l) / self.START_POINTS
+        return [l + (k + sp.Rational(1, 2)) * h for k in range(self.START_POINTS)]
+
+    def _search(
+        self,
+        equation: Equation,
+        x: sp.Float,
+        deflated: List[Tuple[sp.Float, int]],
+        precision: sp.Float,
+        first_iteration: int,
+    ) -> Iterator[Tuple[IterationRecord, int | None]]:
+        """
+        deflated newton from x
+        @returns iterator of (record, multiplicity if x has converged else None);
+        stops without converging if the iterate fails or runs away
+        """
+        f, df, d2f = (
+            counted(equation.f, Evaluation.F),
+            counted(equation.df, Evaluation.DERIVATIVE),
+            counted(equation.d2f, Evaluation.DERIVATIVE),
+        )
+        l, r = equation.interval_l, equation.interval_r
+        prev_estimate = 0
+        for i in range(first_iteration, first_iteration + self.MAX_ITERATIONS):
+            fx = f(x)
+            if fx == 0:
+                yield IterationRecord(i, x, sp.Float(0), sp.Float(0), f, fx), max(
+                    prev_estimate, 1
+                )
+                return
+            dfx, d2fx = df(x), d2f(x)
+            if any(x == root for root, _ in deflated):
+                return
+            # g'/g and (g'/g)'
+            lg = dfx / fx - sum(m / (x - root) for root, m in deflated)
+            dlg = (d2fx * fx - dfx**2) / fx**2 + sum(
+                m / (x - root) ** 2 for root, m in deflated
+            )
+            if lg == 0 or dlg == 0 or not (lg.is_real and dlg.is_real):
+                return
+            estimate = max(int(sp.Float(-(lg**2) / dlg).round()), 1)
+            m = estimate if estimate == prev_estimate else 1
+            prev_estimate = estimate
+            step = -m / lg
+            x = x + step
+            if not x.is_finite or x < l - (r - l) or x > r + (r - l):
+                return
+            converged = abs(step) <= precision
+            yield IterationRecord(i, x, step, abs(step), f), (
+                estimate if converged else None
+            )
+            if converged:
+                return
+
+    def find_roots(
+        self,
+        equation: Equation,
+        precision: sp.Float,
+        on_iteration: Callable[[sp.Float, int], None] | None = None,
+        trace: TraceRecorder | None = None,
+    ) -> List[Tuple[sp.Float, int]]:
+        """
+        @returns [(x, multiplicity)] of the roots in the interval, ascending
+        """
+        counters = active()
+        l, r = equation.interval_l, equation.interval_r
+        # roots outside of the interval are deflated too, so newton isn't drawn back
+        deflated: List[Tuple[sp.Float, int]] = []
+        iterations = 0
+        budget = Budget.from_config()
+        self.stop_reason = None
+        with stage(Stage.ITERATE):
+            for start in self._start_points(equation):
+                while len(deflated) < self.MAX_ROOTS and self.stop_reason is None:
+                    root = None
+                    monitor = IterationMonitor(precision, self.MAX_ITERATIONS, budget)
+                    for record, multiplicity in self._search(
+                        equation, start, deflated, precision, iterations + 1
+                    ):
+                        iterations = record.iteration
+                        if counters is not None:
+                            counters.record_iteration(iterations)
+                        if trace is not None:
+                            trace.add(
+                                iterations,
+                                [record.x],
+                                [record.fx] if trace.record_residuals else None,
+                                record.step,
+                                record.error,
+                            )
+                        if on_iteration:
+                            on_iteration(record.x, iterations)
+                        if multiplicity is not None:
+                            root = (record.x, multiplicity)
+                        elif monitor.observe([record.x], record.step) is not None:
+                            logger.debug("deflated newton:", monitor.reason)
+                            break
+                    self.stop_reason = budget.exceeded()
+                    if root is None or any(
+                        abs(root[0] - x) <= DUPLICATE_FACTOR * precision
+                        for x, _ in deflated
+                    ):
+                        break
+                    logger.debug(
+                        "deflated newton: root", root[0], "of multiplicity", root[1]
+                    )
+                    deflated.append(root)
+        if self.stop_reason is not None:
+            logger.warning(
+                lambda: f"deflated newton: {self.stop_reason.value}, there may be more roots"
+            )
+        self.roots = sorted((x, m) for x, m in deflated if l <= x <= r)
+        self.iterations = iterations
+        return self.roots
+
+    def solve(
+        self,
+        equation: Equation,
+        precision: sp.Float,
+        on_iteration: Callable[[sp.Float, int], None] | None = None,
+        trace: TraceRecorder | None = None,
+    ) -> Tuple[sp.Float, int] | None:
+        """
+        @returns (the leftmost root, iterations of the whole search);
+        all roots are in self.roots
+        """
+        roots = self.find_roots(equation, precision, on_iteration, trace)
+        if not roots:
+            return None
+        return roots[0][0], self.iterations
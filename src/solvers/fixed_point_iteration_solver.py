@@ -1,11 +1,12 @@
-from typing import Tuple
+from typing import Iterator
 
 import sympy as sp  # type: ignore
 
 from logger import GlobalLogger
-from solvers.solver import Solver
+from solvers.solver import IterationRecord, Solver
 from utils.equations import Equation
-
+from utils.math import fixed_point_iteration_bound
+from utils.perf import Evaluation, counted
 
 logger = GlobalLogger()
 
@@ -13,6 +14,7 @@ logger = GlobalLogger()
 class FixedPointIterationSolver(Solver):
     MAX_ITERATIONS = 100000
     Q = 1  # 0 <= q < 1
+    CHEAP_CONVERGENCE_CHECK = True
 
     def __init__(self) -> None:
         super().__init__()
@@ -22,41 +24,41 @@ class FixedPointIterationSolver(Solver):
     ) -> sp.Float:
         return (l + r) / 2
 
-    def solve(
+    def iterate(
         self, equation: Equation, precision: sp.Float
-    ) -> Tuple[sp.Float, int] | None:
+    ) -> Iterator[IterationRecord]:
         logger.debug("solving fixed point iteration")
-        logger.debug(f"precision: {type(precision)} {precision}")
-        logger.debug(f"interval_l: {type(equation.interval_l)} {equation.interval_l}")
-        logger.debug(f"interval_r: {type(equation.interval_r)} {equation.interval_r}")
+        logger.debug("precision:", type(precision), precision)
+        logger.debug("interval_l:", type(equation.interval_l), equation.interval_l)
+        logger.debug("interval_r:", type(equation.interval_r), equation.interval_r)
+        logger.debug(
+            lambda: f"q = {equation.q} ({equation.phi_form}), "
+            f"at most {self.iteration_bound(equation, precision)} iterations"
+        )
 
         interval_l, interval_r, fn, phi = (
             equation.interval_l,
             equation.interval_r,
-            equation.f,
-            equation.phi,
+            counted(equation.f, Evaluation.F),
+            counted(equation.phi, Evaluation.PHI),
         )
         x = self.get_starting_point(fn, interval_l, interval_r)
         prev_x = x - 10 * precision
         iterations = 0
-        for _ in range(self.MAX_ITERATIONS):
+        while True:
             iterations += 1
             x = phi(x)
-            if abs(x - prev_x) <= precision:
-                return x, iterations
+            step = x - prev_x
+            yield IterationRecord(iterations, x, step, abs(step), fn)
             prev_x = x
-        return None
 
     def check_convergence(self, equation: Equation) -> bool:
-        l, r, dphi = (
-            equation.interval_l,
-            equation.interval_r,
-            equation.dphi,
-        )
-        d = (r - l) / self.SAMPLES_COUNT
-        x = l
-        while x <= r:
-            if abs(dphi(x)) > self.Q:
-                return False
-            x += d
-        return True
+        # q = max |phi'| is measured when phi is built
+        return equation.q < self.Q
+
+    def iteration_bound(self, equation: Equation, precision: sp.Float) -> int | None:
+        """
+        a-priori bound on the number of iterations, None if phi is not a contraction
+        """
+        x0 = self.get_starting_point(equation, equation.interval_l, equation.interval_r)
+        return fixed_point_iteration_bound(equation.q, x0, equation.phi(x0), precision)
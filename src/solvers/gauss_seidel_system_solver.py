@@ -0,0 +1,81 @@
+import math
+from typing import Dict, Iterator
+
+import numpy as np
+import sympy as sp  # type: ignore
+
+from logger import GlobalLogger
+from solvers.fixed_point_iteration_system_solver import FixedPointIterationSystemSolver
+from solvers.system_solver import SystemIterationRecord
+from utils.equations import EquationSystem, EquationSystemSolution
+
+# estimated omegas are kept in [1, OMEGA_MAX], close to 2 sor stops converging
+OMEGA_MAX = 1.9
+
+logger = GlobalLogger()
+
+
+class GaussSeidelSystemSolver(FixedPointIterationSystemSolver):
+    """
+    fixed point iteration that uses every updated component right away,
+    in the order of system.symbols
+    """
+
+    def apply(
+        self, system: EquationSystem, xs: EquationSystemSolution
+    ) -> EquationSystemSolution:
+        return system.sweep_phi(xs)
+
+
+class SORSystemSolver(GaussSeidelSystemSolver):
+    """
+    gauss-seidel with every update relaxed by omega. when omega is not given
+    it is estimated at the starting point from the spectral radius rho of the
+    jacobian of phi (the jacobi iteration matrix) as 2 / (1 + sqrt(1 - rho^2)),
+    which is optimal for linear consistently ordered systems
+    """
+
+    omega: sp.Float | None
+    # the omega of the current solve
+    _omega: sp.Float = sp.Float(1)
+
+    def __init__(self, omega: sp.Float | None = None) -> None:
+        super().__init__()
+        if omega is not None and not 0 < omega < 2:
+            raise ValueError("omega must be in (0, 2)")
+        self.omega = omega
+
+    def estimate_omega(
+        self, system: EquationSystem, starting_xs: Dict[sp.Symbol, sp.Float]
+    ) -> sp.Float:
+        # rows follow the equations, columns the symbols: both are in sweep order
+        jacobian = np.array(
+            [
+                [float(e.dphi(symbol, starting_xs)) for symbol in system.symbols]
+                for e in system.equations
+            ]
+        )
+        rho = float(max(abs(np.linalg.eigvals(jacobian))))
+        if not rho < 1:
+            return sp.Float(1)
+        omega = 2 / (1 + math.sqrt(1 - rho**2))
+        return sp.Float(min(max(omega, 1.0), OMEGA_MAX))
+
+    def apply(
+        self, system: EquationSystem, xs: EquationSystemSolution
+    ) -> EquationSystemSolution:
+        return system.sweep_phi(xs, self._omega)
+
+    def iterate(
+        self,
+        system: EquationSystem,
+        starting_xs: Dict[str, sp.Float],
+        precision: sp.Float,
+    ) -> Iterator[SystemIterationRecord]:
+        if self.omega is not None:
+            self._omega = self.omega
+        else:
+            xs = self._starting_xs_to_symbols(system, starting_xs)
+            self._omega = self.estimate_omega(system, xs)
+            logger.debug("sor: estimated omega", self._omega)
+        return super().iterate(system, starting_xs, precision)
@@ -0,0 +1,177 @@
+import math
+from typing import Callable, Iterator
+
+import sympy as sp  # type: ignore
+
+from solvers.solver import IterationRecord, Solver
+from utils.equations import Equation
+from utils.math import signs_equal
+from utils.perf import Evaluation, counted
+
+# digits of a float64 newton iteration
+FLOAT_DIGITS = 15
+# relative step at which the float64 stage stops
+FLOAT_TOLERANCE = 4 * 2.0**-52
+FLOAT_MAX_ITERATIONS = 200
+# extra digits carried on top of the ones asked for
+GUARD_DIGITS = 10
+MAX_DIGITS = 100000
+
+
+class HighPrecisionRecord(IterationRecord):
+    # working precision of the iterate, decimal digits
+    digits: int
+    # digits == the target precision
+    final: bool
+
+    def __init__(
+        self,
+        iteration: int,
+        x: sp.Float,
+        step: sp.Float,
+        error: sp.Float,
+        f: Callable[[sp.Float], sp.Float],
+        digits: int,
+        final: bool,
+    ):
+        super().__init__(iteration, x, step, error, f)
+        self.digits = digits
+        self.final = final
+
+
+def _float_fn(expr: sp.Expr, x: sp.Symbol) -> Callable[[float], float]:
+    """
+    float64 evaluator of expr, evalf is used wherever math can't evaluate it
+    """
+    try:
+        fast = sp.lambdify(x, expr, "math")
+    except Exception:
+        fast = None
+
+    def evaluate(v: float) -> float:
+        nonlocal fast
+        if fast is not None:
+            try:
+                return float(fast(v))
+            except (ArithmeticError, ValueError, TypeError):
+                pass
+            except NameError:
+                # functions math doesn't have, e.g. autodiff derivatives
+                fast = None
+        return float(expr.evalf(FLOAT_DIGITS, subs={x: v}))
+
+    return evaluate
+
+
+def _evaluate(expr: sp.Expr, x: sp.Symbol, value: sp.Float, digits: int) -> sp.Float:
+    """
+    expr at x = value, correct to digits; evalf works at its own precision
+    so the global mpmath one is never touched
+    """
+    res = expr.evalf(digits, subs={x: value})
+    if not res.is_Float:
+        raise ValueError(f"{expr} is not real at x = {sp.Float(value, 10)}")
+    return res
+
+
+class HighPrecisionNewtonSolver(Solver):
+    """
+    newton's method for roots with thousands of digits: a safeguarded float64
+    newton finds the root to ~15 digits, then every iteration doubles the working
+    precision (newton doubles the correct digits) until the target is reached.
+    all but the last couple of iterations run below the target precision, so
+    the total cost is close to a few evaluations at the target precision
+    """
+
+    MAX_ITERATIONS = 100
+
+    # target precision, decimal digits. None derives it from the requested precision
+    digits: int | None
+
+    def __init__(self, digits: int | None = None) -> None:
+        super().__init__()
+        if digits is not None and not 0 < digits <= MAX_DIGITS:
+            raise ValueError(f"digits must be in (0, {MAX_DIGITS}]")
+        self.digits = digits
+
+    def target_digits(self, precision: sp.Float) -> int:
+        if self.digits is not None:
+            return max(self.digits, FLOAT_DIGITS)
+        if precision <= 0:
+            raise ValueError("precision must be positive")
+        digits = int(sp.ceiling(-sp.log(precision, 10))) + GUARD_DIGITS
+        if digits > MAX_DIGITS:
+            raise ValueError(f"at most {MAX_DIGITS} digits are supported")
+        return max(digits, FLOAT_DIGITS)
+
+    def _float_iterate(self, equation: Equation) -> Iterator[HighPrecisionRecord]:
+        """
+        newton in float64, falling back to bisection whenever the step leaves
+        the bracket
+        """
+        x_symbol = equation.f.variables[0]
+        f = counted(_float_fn(equation.f.expr, x_symbol), Evaluation.F)
+        df = counted(_float_fn(equation.df.expr, x_symbol), Evaluation.DERIVATIVE)
+        f_high = lambda v: _evaluate(equation.f.expr, x_symbol, v, FLOAT_DIGITS)
+        lo, hi = float(equation.interval_l), float(equation.interval_r)
+        flo = f(lo)
+        x = (lo + hi) / 2
+        for i in range(1, FLOAT_MAX_ITERATIONS + 1):
+            fx, dfx = f(x), df(x)
+            if fx == 0:
+                return
+            if signs_equal(fx, flo):
+                lo, flo = x, fx
+            else:
+                hi = x
+            next_x = x - fx / dfx if dfx != 0 else math.nan
+            if not lo <= next_x <= hi:
+                next_x = (lo + hi) / 2
+            step, x = next_x - x, next_x
+            yield HighPrecisionRecord(
+                i,
+                sp.Float(x, FLOAT_DIGITS),
+                sp.Float(step, FLOAT_DIGITS),
+                sp.Float(hi - lo, FLOAT_DIGITS),
+                f_high,
+                FLOAT_DIGITS,
+                False,
+            )
+            if abs(step) <= FLOAT_TOLERANCE * max(1.0, abs(x)):
+                return
+
+    def iterate(
+        self, equation: Equation, precision: sp.Float
+    ) -> Iterator[IterationRecord]:
+        target = self.target_digits(precision)
+        x_symbol = equation.f.variables[0]
+        f_expr, df_expr = equation.f.expr, equation.df.expr
+        x = sp.Float((equation.interval_l + equation.interval_r) / 2, FLOAT_DIGITS)
+        i = 0
+        for record in self._float_iterate(equation):
+            i, x = record.iteration, record.x
+            yield record
+        digits = FLOAT_DIGITS
+        while True:
+            i += 1
+            digits = min(2 * digits, target)
+            x = sp.Float(x, digits)
+            f = lambda v, digits=digits: _evaluate(f_expr, x_symbol, v, digits)
+            df = lambda v, digits=digits: _evaluate(df_expr, x_symbol, v, digits)
+            fx = counted(f, Evaluation.F)(x)
+            dfx = counted(df, Evaluation.DERIVATIVE)(x)
+            if dfx == 0:
+                raise ValueError(f"f'(x) = 0 at x = {sp.Float(x, 10)}")
+            step = -fx / dfx
+            x = sp.Float(x + step, digits)
+            # the newton step just taken, it bounds the error of the previous x
+            yield HighPrecisionRecord(
+                i, x, step, abs(step), f, digits, digits == target
+            )
+
+    def is_converged(self, record: IterationRecord, precision: sp.Float) -> bool:
+        return bool(
+            isinstance(record, HighPrecisionRecord)
+            and record.final
+            and abs(record.step) <= precision
+        )
@@ -0,0 +1,307 @@
+import math
+from itertools import product
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import sympy as sp  # type: ignore
+
+from logger import GlobalLogger
+from solvers.monitor import Budget
+from solvers.system_solver import SystemSolver
+from utils.equations import EquationSystem, EquationSystemSolution
+from utils.numeric import ComplexArray, lambdify_batch
+from utils.perf import Evaluation, Stage, active, count, stage
+from utils.trace import TraceRecorder
+
+# prod of the degrees, the number of paths to track
+MAX_PATHS = 10000
+# the random gamma is seeded so that the same system always takes the same paths
+GAMMA_SEED = 2
+INITIAL_STEP = 0.01
+MIN_STEP = 1e-10
+MAX_STEP = 0.1
+# accepted steps in a row before a path's step is doubled
+STEP_INCREASE_AFTER = 3
+CORRECTOR_ITERATIONS = 3
+CORRECTOR_TOLERANCE = 1e-9
+# paths that get this far from the origin go to solutions at infinity
+DIVERGENCE_BOUND = 1e8
+# paths that stall after this t are finished by the endgame instead of failing
+ENDGAME_START = 0.9
+ENDGAME_ITERATIONS = 60
+RESIDUAL_TOLERANCE = 1e-8
+# relative size of the imaginary part of a solution that counts as rounding
+REAL_TOLERANCE = 1e-8
+# relative distance under which two endpoints are the same solution
+DUPLICATE_TOLERANCE = 1e-6
+
+TRACKING, FINISHED, STALLED, FAILED = range(4)
+
+logger = GlobalLogger()
+
+
+def _solve(a: ComplexArray, b: ComplexArray) -> ComplexArray:
+    """
+    batched a x = b, singular systems in the batch are solved by least squares
+    """
+    try:
+        x = np.linalg.solve(a, b[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        x = np.stack([np.linalg.lstsq(ai, bi, rcond=None)[0] for ai, bi in zip(a, b)])
+    # older numpy stubs only promise some complexfloating
+    return x.astype(np.complex128, copy=False)
+
+
+class HomotopySystemSolver(SystemSolver):
+    """
+    every isolated solution of a square polynomial system by homotopy
+    continuation: H(x, t) = (1 - t) * gamma * g(x) + t * f(x) deforms the total
+    degree start system g_i = x_i^d_i - 1, whose prod d_i solutions are known,
+    into f. a random complex gamma keeps the paths apart for t < 1.
+
+    all paths are tracked at once as numpy batches, each with its own adaptive
+    step: runge-kutta predictor along dx/dt = -H_x^-1 H_t, newton corrector.
+    paths that stall close to t = 1 (singular solutions) are finished by newton
+    on f from where they stopped, paths that blow up go to solutions at infinity
+    and are dropped, as are the paths still tracked when the budget runs out. the solutions are computed in complex float64, only the
+    real ones are kept
+    """
+
+    # tracking steps, over all paths at once
+    MAX_ITERATIONS = 5000
+
+    # real solutions found by the last find_solutions()
+    solutions: List[EquationSystemSolution]
+    # tracking steps of the last find_solutions()
+    iterations: int = 0
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.solutions = []
+
+    def degrees(self, system: EquationSystem) -> List[int]:
+        """
+        total degrees of the equations
+        @raises ValueError if the system is not square and polynomial
+        """
+        symbols = system.symbols
+        if len(system.equations) != len(symbols):
+            raise ValueError("homotopy continuation needs as many equations as symbols")
+        degrees = []
+        for e in system.equations:
+            if not e.f.expr.is_polynomial(*symbols):
+                raise ValueError(f"{e.f_str()} is not a polynomial")
+            degree = sp.Poly(e.f.expr, *symbols).total_degree()
+            if degree < 1:
+                raise ValueError(f"{e.f_str()} is constant")
+            degrees.append(degree)
+        if math.prod(degrees) > MAX_PATHS:
+            raise ValueError(
+                f"{math.prod(degrees)} paths to track, at most {MAX_PATHS} are supported"
+            )
+        return degrees
+
+    def _compile(
+        self, system: EquationSystem
+    ) -> Tuple[
+        Callable[[ComplexArray], ComplexArray], Callable[[ComplexArray], ComplexArray]
+    ]:
+        """
+        @returns (f, jacobian of f) over batches of points
+        """
+        symbols, n = system.symbols, len(system.symbols)
+        residuals = lambdify_batch(symbols, [e.f.expr for e in system.equations])
+        jacobian = lambdify_batch(
+            symbols,
+            [
+                e.f_gradient().get(symbol, sp.Integer(0))
+                for e in system.equations
+                for symbol in symbols
+            ],
+        )
+
+        def f(x: ComplexArray) -> ComplexArray:
+            count(Evaluation.F, n * x.shape[0])
+            return residuals(x)
+
+        def df(x: ComplexArray) -> ComplexArray:
+            count(Evaluation.DERIVATIVE, n * n * x.shape[0])
+            return jacobian(x).reshape(x.shape[0], n, n)
+
+        return f, df
+
+    def _start_points(self, degrees: List[int]) -> ComplexArray:
+        roots_of_unity = [np.exp(2j * np.pi * np.arange(d) / d) for d in degrees]
+        return np.array(list(product(*roots_of_unity)), dtype=np.complex128)
+
+    def _track(
+        self,
+        x: ComplexArray,
+        degrees: List[int],
+        f: Callable[[ComplexArray], ComplexArray],
+        df: Callable[[ComplexArray], ComplexArray],
+    ) -> Tuple[ComplexArray, npt.NDArray[np.int_]]:
+        """
+        tracks every path from t = 0 to t = 1
+        @returns (endpoints, statuses)
+        """
+        counters = active()
+        budget = Budget.from_config()
+        d = np.array(degrees)
+        rng = np.random.default_rng(GAMMA_SEED)
+        gamma = complex(np.exp(2j * np.pi * rng.random()))
+        diagonal = np.arange(len(degrees))
+
+        def h(x: ComplexArray, t: npt.NDArray[np.float64]) -> ComplexArray:
+            res: ComplexArray = t[:, None] * f(x) + (1 - t)[:, None] * gamma * (
+                x**d - 1
+            )
+            return res
+
+        def hx(x: ComplexArray, t: npt.NDArray[np.float64]) -> ComplexArray:
+            dg = np.zeros((x.shape[0], len(d), len(d)), dtype=np.complex128)
+            dg[:, diagonal, diagonal] = d * x ** (d - 1)
+            return (1 - t)[:, None, None] * gamma * dg + t[:, None, None] * df(x)
+
+        def velocity(x: ComplexArray, t: npt.NDArray[np.float64]) -> ComplexArray:
+            # dx/dt = -H_x^-1 H_t, H_t = f - gamma * g
+            return _solve(hx(x, t), -(f(x) - gamma * (x**d - 1)))
+
+        paths = x.shape[0]
+        t = np.zeros(paths)
+        dt = np.full(paths, INITIAL_STEP)
+        streak = np.zeros(paths, dtype=np.int_)
+        status = np.full(paths, TRACKING)
+        while np.any(status == TRACKING) and self.iterations < self.MAX_ITERATIONS:
+            self.stop_reason = budget.exceeded()
+            if self.stop_reason is not None:
+                logger.warning(
+                    lambda: f"homotopy: {self.stop_reason.value}, "
+                    f"{np.count_nonzero(status == TRACKING)} paths dropped"
+                )
+                break
+            self.iterations += 1
+            if counters is not None:
+                counters.record_iteration(self.iterations)
+            idx = np.nonzero(status == TRACKING)[0]
+            xa, ta = x[idx], t[idx]
+            last = dt[idx] >= 1 - ta
+            step = np.where(last, 1 - ta, dt[idx])
+            s = step[:, None]
+            k1 = velocity(xa, ta)
+            k2 = velocity(xa + s / 2 * k1, ta + step / 2)
+            k3 = velocity(xa + s / 2 * k2, ta + step / 2)
+            k4 = velocity(xa + s * k3, ta + step)
+            xp, tp = xa + s / 6 * (k1 + 2 * k2 + 2 * k3 + k4), np.where(
+                last, 1.0, ta + step
+            )
+            dx = np.zeros_like(xp)
+            for _ in range(CORRECTOR_ITERATIONS):
+                dx = _solve(hx(xp, tp), -h(xp, tp))
+                xp = xp + dx
+            size = np.linalg.norm(xp, axis=1)
+            accepted = np.isfinite(size) & (
+                np.linalg.norm(dx, axis=1) <= CORRECTOR_TOLERANCE * (1 + size)
+            )
+
+            ok, bad = idx[accepted], idx[~accepted]
+            x[ok], t[ok] = xp[accepted], tp[accepted]
+            streak[ok] += 1
+            grow = ok[streak[ok] >= STEP_INCREASE_AFTER]
+            dt[grow] = np.minimum(dt[grow] * 2, MAX_STEP)
+            streak[grow] = 0
+            status[ok[last[accepted]]] = FINISHED
+            status[ok[size[accepted] > DIVERGENCE_BOUND]] = FAILED
+
+            dt[bad] /= 2
+            streak[bad] = 0
+            stalled = bad[dt[bad] < MIN_STEP]
+            status[stalled] = np.where(t[stalled] >= ENDGAME_START, STALLED, FAILED)
+        status[status == TRACKING] = FAILED
+        return x, status
+
+    def _endgame(
+        self,
+        x: ComplexArray,
+        f: Callable[[ComplexArray], ComplexArray],
+        df: Callable[[ComplexArray], ComplexArray],
+    ) -> ComplexArray:
+        """
+        newton on f itself: polishes the endpoints and finishes the stalled paths,
+        which converges linearly at singular solutions
+        """
+        for _ in range(ENDGAME_ITERATIONS):
+            dx = _solve(df(x), -f(x))
+            x = x + dx
+            if np.all(
+                np.linalg.norm(dx, axis=1)
+                <= CORRECTOR_TOLERANCE * 1e-3 * (1 + np.linalg.norm(x, axis=1))
+            ):
+                break
+        return x
+
+    def find_solutions(self, system: EquationSystem) -> List[EquationSystemSolution]:
+        """
+        @returns the real solutions, sorted
+        """
+        degrees = self.degrees(system)
+        symbols = system.symbols
+        f, df = self._compile(system)
+        self.iterations, self.stop_reason = 0, None
+        with stage(Stage.ITERATE):
+            x, status = self._track(self._start_points(degrees), degrees, f, df)
+            ends = x[(status == FINISHED) | (status == STALLED)]
+            ends = self._endgame(ends, f, df) if len(ends) else ends
+        size = np.linalg.norm(ends, axis=1)
+        residual = np.linalg.norm(f(ends), axis=1) if len(ends) else size
+        finite = ends[
+            np.isfinite(size)
+            & (size < DIVERGENCE_BOUND)
+            & (residual <= RESIDUAL_TOLERANCE * (1 + size))
+        ]
+        real = finite[
+            np.max(np.abs(finite.imag), axis=1, initial=0)
+            <= REAL_TOLERANCE * (1 + np.linalg.norm(finite, axis=1))
+        ].real
+        unique: List[npt.NDArray[np.float64]] = []
+        for point in sorted(real, key=tuple):
+            if not any(
+                np.linalg.norm(point - other)
+                <= DUPLICATE_TOLERANCE * (1 + np.linalg.norm(point))
+                for other in unique
+            ):
+                unique.append(point)
+        logger.info(
+            lambda: f"homotopy: {len(x)} paths, {len(finite)} converged, "
+            f"{len(unique)} real solutions"
+        )
+        self.solutions = [
+            {symbol: sp.Float(float(v)) for symbol, v in zip(symbols, point)}
+            for point in unique
+        ]
+        return self.solutions
+
+    def solve(
+        self,
+        system: EquationSystem,
+        starting_xs: Dict[str, sp.Float],
+        precision: sp.Float,
+        on_iteration: Callable[[EquationSystemSolution, int], None] | None = None,
+        trace: TraceRecorder | None = None,
+    ) -> Tuple[EquationSystemSolution, int] | None:
+        """
+        @returns (the real solution closest to starting_xs, tracking steps);
+        all of them are in self.solutions. the paths are not traced
+        """
+        start = self._starting_xs_to_symbols(system, starting_xs)
+        solutions = self.find_solutions(system)
+        if not solutions:
+            return None
+        closest = min(
+            solutions,
+            key=lambda xs: max(abs(xs[symbol] - start[symbol]) for symbol in xs),
+        )
+        if on_iteration:
+            on_iteration(closest, self.iterations)
+        return closest, self.iterations
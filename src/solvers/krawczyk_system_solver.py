@@ -0,0 +1,420 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import sympy as sp  # type: ignore
+
+from logger import GlobalLogger
+from solvers.monitor import Budget
+from solvers.system_solver import SystemSolver
+from utils.equations import EquationSystem, EquationSystemSolution
+from utils.interval import (
+    Bounds,
+    EmptyDomainError,
+    IntervalVectorFn,
+    bounds,
+    compile_interval,
+    interval,
+)
+from utils.numeric import FloatArray
+from utils.perf import Evaluation, Stage, active, count, stage
+from utils.trace import TraceRecorder
+
+# half the side of the searched box around the starting point
+RADIUS = 4
+# boxes narrower than this that are neither certified nor excluded are given up on
+MIN_WIDTH = 1e-9
+# krawczyk steps on one box before it is split
+MAX_CONTRACTIONS = 50
+# a step that doesn't shrink the box below this fraction of its width is stalling
+CONTRACTION = 0.75
+# boxes are split off-center, so that roots at round coordinates
+# don't end up on the boundary between two boxes
+SPLIT = 0.4990234375
+# float64 unit roundoff, and a bound on what underflow can lose
+UNIT_ROUNDOFF = 2.0**-53
+UNDERFLOW = 1e-300
+# rounds with fewer boxes than this are not worth sending to other processes
+PARALLEL_MIN_BOXES = 64
+# workers are not forked: the solve runs on a qthread, and a fork copies the
+# locks other threads hold at that moment, never to be released
+START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+CERTIFIED, EXCLUDED, SPLIT_UP, UNDECIDED = range(4)
+
+# a box crosses process boundaries as float bounds, intervals can't be pickled
+type Box = Tuple[Bounds, ...]
+# (status, resulting boxes, krawczyk steps)
+type Outcome = Tuple[int, List[Box], int]
+# BoxProcessor arguments: symbols, residuals, flattened jacobian, precision
+type ProcessorArgs = Tuple[List[sp.Symbol], List[sp.Expr], List[sp.Expr], float]
+
+logger = GlobalLogger()
+
+
+def _center_radius(lo: FloatArray, hi: FloatArray) -> Tuple[FloatArray, FloatArray]:
+    """
+    [lo, hi] as c +- r, r is rounded up
+    """
+    c = lo + (hi - lo) / 2
+    return c, np.nextafter(np.maximum(hi - c, c - lo), np.inf)
+
+
+def _midpoint(box: Box) -> List[float]:
+    return [lo + (hi - lo) / 2 for lo, hi in box]
+
+
+def _to_box(lo: FloatArray, hi: FloatArray) -> Box:
+    return tuple((float(a), float(b)) for a, b in zip(lo, hi))
+
+
+class BoxProcessor:
+    """
+    decides one box: the krawczyk operator
+    K(X) = m - Y f(m) + (I - Y J(X)) (X - m), with m the midpoint of X and
+    Y ~ J(X)^-1, encloses every root of f in X. so K(X) disjoint from X
+    proves there are none, and K(X) in the interior of X proves there is
+    exactly one, which is then narrowed down by more krawczyk steps.
+
+    f(m) and J(X) are enclosed in interval arithmetic, the linear algebra on
+    top of them runs in numpy in midpoint-radius form, with the rounding
+    errors of float64 added to the radii
+    """
+
+    f: IntervalVectorFn
+    # f over the part of a box where it is defined
+    f_restricted: IntervalVectorFn
+    jacobian: IntervalVectorFn
+    n: int
+    precision: float
+
+    def __init__(
+        self,
+        symbols: List[sp.Symbol],
+        residuals: List[sp.Expr],
+        jacobian: List[sp.Expr],
+        precision: float,
+    ) -> None:
+        self.f = compile_interval(symbols, residuals)
+        self.f_restricted = compile_interval(symbols, residuals, restrict=True)
+        self.jacobian = compile_interval(symbols, jacobian)
+        self.n = len(symbols)
+        self.precision = precision
+
+    def _enclose(
+        self,
+        fn: IntervalVectorFn,
+        lo: FloatArray,
+        hi: FloatArray,
+    ) -> Tuple[FloatArray, FloatArray]:
+        ys = [bounds(y) for y in fn([interval(a, b) for a, b in zip(lo, hi)])]
+        return np.array([y[0] for y in ys]), np.array([y[1] for y in ys])
+
+    def _krawczyk(
+        self, lo: FloatArray, hi: FloatArray
+    ) -> Tuple[FloatArray, FloatArray] | None:
+        """
+        @returns the bounds of K(X), None if they can't be computed
+        """
+        n = self.n
+        m = lo + (hi - lo) / 2
+        # krawczyk's test needs f defined on the whole box, so f and J are
+        # not restricted here: boxes partly outside of the domain are split
+        fc, fr = _center_radius(*self._enclose(self.f, m, m))
+        jl, ju = self._enclose(self.jacobian, lo, hi)
+        jc, jr = _center_radius(jl.reshape(n, n), ju.reshape(n, n))
+        if not all(np.all(np.isfinite(a)) for a in (fc, fr, jc, jr)):
+            return None
+        try:
+            y = np.linalg.inv(jc)
+        except np.linalg.LinAlgError:
+            return None
+        ay = np.abs(y)
+        dc, dr = _center_radius(
+            np.nextafter(lo - m, -np.inf), np.nextafter(hi - m, np.inf)
+        )
+        # bounds the relative rounding error of the sums of products below
+        gamma = 2 * (n + 3) * UNIT_ROUNDOFF
+        # I - Y J(X) = mc +- mr
+        mc = np.eye(n) - y @ jc
+        mr = ay @ jr + gamma * (1 + ay @ np.abs(jc))
+        kc = m - y @ fc + mc @ dc
+        kr = (
+            ay @ fr
+            + np.abs(mc) @ dr
+            + mr @ (np.abs(dc) + dr)
+            + gamma * (np.abs(m) + ay @ np.abs(fc) + np.abs(mc) @ np.abs(dc))
+        )
+        kr = kr * (1 + gamma) + UNDERFLOW
+        return np.nextafter(kc - kr, -np.inf), np.nextafter(kc + kr, np.inf)
+
+    def __call__(self, box: Box) -> Outcome:
+        lo, hi = np.array([b[0] for b in box]), np.array([b[1] for b in box])
+        try:
+            fl, fu = self._enclose(self.f_restricted, lo, hi)
+            if np.any((fl > 0) | (fu < 0)):
+                return EXCLUDED, [], 0
+        except EmptyDomainError:
+            return EXCLUDED, [], 0
+        except (ArithmeticError, ValueError):
+            pass
+        certified = False
+        steps = 0
+        for steps in range(1, MAX_CONTRACTIONS + 1):
+            try:
+                with np.errstate(all="ignore"):
+                    k = self._krawczyk(lo, hi)
+            except (ArithmeticError, ValueError):
+                k = None
+            if k is None or np.any(np.isnan(k[0]) | np.isnan(k[1])):
+                break
+            kl, ku = k
+            if np.any((ku < lo) | (kl > hi)):
+                return EXCLUDED, [], steps
+            certified = certified or bool(np.all((lo < kl) & (ku < hi)))
+            width = np.max(hi - lo)
+            lo, hi = np.maximum(kl, lo), np.minimum(ku, hi)
+            stalled = np.max(hi - lo) > CONTRACTION * width
+            if stalled or (certified and np.max(hi - lo) <= self.precision):
+                break
+        if certified:
+            return CERTIFIED, [_to_box(lo, hi)], steps
+        if np.max(hi - lo) < MIN_WIDTH:
+            return UNDECIDED, [_to_box(lo, hi)], steps
+        # the widest side is split
+        i = int(np.argmax(hi - lo))
+        split = lo[i] + (hi[i] - lo[i]) * SPLIT
+        left_hi, right_lo = hi.copy(), lo.copy()
+        left_hi[i], right_lo[i] = split, split
+        return SPLIT_UP, [_to_box(lo, left_hi), _to_box(right_lo, hi)], steps
+
+
+_worker_processor: BoxProcessor | None = None
+
+
+def _init_worker(
+    symbols: List[sp.Symbol],
+    residuals: List[sp.Expr],
+    jacobian: List[sp.Expr],
+    precision: float,
+) -> None:
+    global _worker_processor
+    _worker_processor = BoxProcessor(symbols, residuals, jacobian, precision)
+
+
+def _process_in_worker(box: Box) -> Outcome:
+    assert _worker_processor is not None
+    return _worker_processor(box)
+
+
+class KrawczykSystemSolver(SystemSolver):
+    """
+    every solution of a square system in a box around the starting point,
+    each one proven to exist and be unique in its enclosure: the box is split
+    up until krawczyk's test (see BoxProcessor) either certifies or excludes
+    every part of it.
+
+    the boxes of a round are independent, large rounds are processed on a
+    process pool. the work is bounded by MAX_BOXES and the budget; whatever is
+    left when either runs out, and boxes that stay undecided down to MIN_WIDTH (e.g. around
+    singular solutions), are reported in self.undecided.
+
+    the arithmetic is float64 intervals, so enclosures don't get narrower than
+    a few ulps
+    """
+
+    # rounds of splitting, over all boxes at once
+    MAX_ITERATIONS = 1000
+    MAX_BOXES = 20000
+
+    # half the side of the searched box
+    radius: sp.Float
+    # how many processes work on a round, None for the number of cpus
+    workers: int | None
+
+    # found by the last find_solutions()
+    certified: List[Box]
+    undecided: List[Box]
+    solutions: List[EquationSystemSolution]
+    # boxes processed by the last find_solutions()
+    boxes: int = 0
+    # the last find_solutions() ran out of MAX_BOXES
+    exhausted: bool = False
+    iterations: int = 0
+
+    def __init__(
+        self, radius: sp.Float | None = None, workers: int | None = None
+    ) -> None:
+        super().__init__()
+        if radius is not None and not radius > 0:
+            raise ValueError("radius must be positive")
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be positive")
+        self.radius = radius if radius is not None else sp.Float(RADIUS)
+        self.workers = workers
+        self.certified = []
+        self.undecided = []
+        self.solutions = []
+
+    def _workers(self) -> int:
+        return self.workers or os.cpu_count() or 1
+
+    def _pool(self, processor_args: ProcessorArgs) -> ProcessPoolExecutor | None:
+        """
+        @returns None if a single process is asked for
+        """
+        workers = self._workers()
+        if workers < 2:
+            return None
+        return ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context(START_METHOD),
+            initializer=_init_worker,
+            initargs=processor_args,
+        )
+
+    def find_solutions(
+        self,
+        system: EquationSystem,
+        starting_xs: Dict[str, sp.Float],
+        precision: sp.Float,
+        on_iteration: Callable[[EquationSystemSolution, int], None] | None = None,
+    ) -> List[EquationSystemSolution]:
+        """
+        @returns the midpoints of the certified enclosures, sorted
+        """
+        symbols = system.symbols
+        n = len(symbols)
+        if len(system.equations) != n:
+            raise ValueError("krawczyk's method needs as many equations as symbols")
+        start = self._starting_xs_to_symbols(system, starting_xs)
+        residuals = [e.f.expr for e in system.equations]
+        jacobian = [
+            e.f_gradient().get(symbol, sp.Integer(0))
+            for e in system.equations
+            for symbol in symbols
+        ]
+        processor_args: ProcessorArgs = (symbols, residuals, jacobian, float(precision))
+        processor = BoxProcessor(*processor_args)
+        counters = active()
+        radius = float(self.radius)
+        frontier: List[Box] = [
+            tuple(
+                (float(start[symbol]) - radius, float(start[symbol]) + radius)
+                for symbol in symbols
+            )
+        ]
+        self.certified, self.undecided = [], []
+        self.boxes, self.exhausted, self.iterations = 0, False, 0
+        self.stop_reason = None
+        limits = Budget.from_config()
+        pool: ProcessPoolExecutor | None = None
+        try:
+            with stage(Stage.ITERATE):
+                while (
+                    frontier
+                    and self.boxes < self.MAX_BOXES
+                    and self.iterations < self.MAX_ITERATIONS
+                ):
+                    self.stop_reason = limits.exceeded()
+                    if self.stop_reason is not None:
+                        break
+                    self.iterations += 1
+                    if counters is not None:
+                        counters.record_iteration(self.iterations)
+                    budget = self.MAX_BOXES - self.boxes
+                    batch, frontier = frontier[:budget], frontier[budget:]
+                    if len(batch) >= PARALLEL_MIN_BOXES and pool is None:
+                        pool = self._pool(processor_args)
+                    if pool is not None and len(batch) >= PARALLEL_MIN_BOXES:
+                        workers = self._workers()
+                        outcomes = list(
+                            pool.map(
+                                _process_in_worker,
+                                batch,
+                                chunksize=max(1, len(batch) // (4 * workers)),
+                            )
+                        )
+                    else:
+                        outcomes = [processor(box) for box in batch]
+                    self.boxes += len(batch)
+                    for status, boxes, steps in outcomes:
+                        count(Evaluation.F, n * (1 + steps))
+                        count(Evaluation.DERIVATIVE, 2 * n * n * steps)
+                        if status == CERTIFIED:
+                            self.certified.extend(boxes)
+                        elif status == SPLIT_UP:
+                            frontier.extend(boxes)
+                        elif status == UNDECIDED:
+                            self.undecided.extend(boxes)
+                    logger.info(
+                        lambda: f"krawczyk: round {self.iterations}, {self.boxes} boxes, "
+                        f"{len(self.certified)} certified, {len(frontier)} pending"
+                    )
+                    if on_iteration:
+                        on_iteration(
+                            self._closest(self._to_solutions(system), start) or start,
+                            self.iterations,
+                        )
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        if frontier:
+            self.exhausted = True
+            self.undecided.extend(frontier)
+            logger.warning(
+                lambda: f"krawczyk: out of budget after {self.boxes} boxes, "
+                f"{len(frontier)} left undecided"
+            )
+        self.certified.sort()
+        self.solutions = self._to_solutions(system)
+        for box in self.certified:
+            logger.info(
+                "krawczyk: unique solution in "
+                + " x ".join(f"[{lo:.15g}, {hi:.15g}]" for lo, hi in box)
+            )
+        if self.undecided:
+            logger.info(lambda: f"krawczyk: {len(self.undecided)} boxes undecided")
+        return self.solutions
+
+    def _to_solutions(self, system: EquationSystem) -> List[EquationSystemSolution]:
+        return [
+            {symbol: sp.Float(v) for symbol, v in zip(system.symbols, _midpoint(box))}
+            for box in self.certified
+        ]
+
+    def _closest(
+        self,
+        solutions: List[EquationSystemSolution],
+        start: Dict[sp.Symbol, sp.Float],
+    ) -> EquationSystemSolution | None:
+        if not solutions:
+            return None
+        return min(
+            solutions,
+            key=lambda xs: max(abs(xs[symbol] - start[symbol]) for symbol in xs),
+        )
+
+    def solve(
+        self,
+        system: EquationSystem,
+        starting_xs: Dict[str, sp.Float],
+        precision: sp.Float,
+        on_iteration: Callable[[EquationSystemSolution, int], None] | None = None,
+        trace: TraceRecorder | None = None,
+    ) -> Tuple[EquationSystemSolution, int] | None:
+        """
+        @returns (the certified solution closest to starting_xs, rounds);
+        all of them are in self.solutions, their enclosures in self.certified.
+        the boxes are not traced
+        """
+        start = self._starting_xs_to_symbols(system, starting_xs)
+        solutions = self.find_solutions(system, starting_xs, precision, on_iteration)
+        closest = self._closest(solutions, start)
+        if closest is None:
+            return None
+        return closest, self.iterations
@@ -0,0 +1,110 @@
+from typing import Dict, Iterator
+
+import numpy as np
+import sympy as sp  # type: ignore
+
+from logger import GlobalLogger
+from solvers.system_solver import SystemIterationRecord, SystemSolver
+from utils.equations import EquationSystem, EquationSystemSolution
+
+# initial damping, relative to the largest diagonal entry of J^T J
+TAU = 1e-3
+# attempts to decrease the residual from one iterate before giving up
+MAX_REJECTIONS = 40
+
+logger = GlobalLogger()
+
+
+class LevenbergMarquardtRecord(SystemIterationRecord):
+    # ||F(x)||_2 in float64
+    residual_norm: float
+
+    def __init__(
+        self,
+        iteration: int,
+        xs: EquationSystemSolution,
+        step: sp.Float,
+        error: sp.Float,
+        system: EquationSystem,
+        residual_norm: float,
+    ):
+        super().__init__(iteration, xs, step, error, system)
+        self.residual_norm = residual_norm
+
+
+class LevenbergMarquardtSystemSolver(SystemSolver):
+    """
+    levenberg-marquardt on the residuals F of system.apply: minimizes ||F||^2
+    with steps (J^T J + mu I) h = -J^T F, adapting mu from how well the step
+    predicted the decrease (nielsen's update). far from a root the steps are
+    short gradient steps and near one they become gauss-newton steps, so it
+    converges from starting points where fixed point iteration does not.
+
+    F and J are compiled with numpy, so the iteration runs in float64 and
+    precisions below ~1e-14 are out of reach
+    """
+
+    MAX_ITERATIONS = 200
+
+    def iterate(
+        self,
+        system: EquationSystem,
+        starting_xs: Dict[str, sp.Float],
+        precision: sp.Float,
+    ) -> Iterator[SystemIterationRecord]:
+        symbols = system.symbols
+        xs = self._starting_xs_to_symbols(system, starting_xs)
+        F, J = self._compile_float64(system)
+        x = np.array([float(xs[symbol]) for symbol in symbols])
+        r, jac = F(x), J(x)
+        if not (np.all(np.isfinite(r)) and np.all(np.isfinite(jac))):
+            raise ValueError("the system is not defined at the starting point")
+        a, g = jac.T @ jac, jac.T @ r
+        mu, nu = TAU * max(float(np.max(np.diag(a))), 1.0), 2.0
+        identity = np.eye(len(symbols))
+        iterations = 0
+        while True:
+            iterations += 1
+            for _ in range(MAX_REJECTIONS):
+                try:
+                    h = np.linalg.solve(a + mu * identity, -g)
+                except np.linalg.LinAlgError:
+                    mu, nu = mu * nu, nu * 2
+                    continue
+                x_new = x + h
+                r_new = F(x_new)
+                # decrease of ||F||^2 the linear model predicts, and the actual one
+                predicted = float(h @ (mu * h - g))
+                actual = float(r @ r - r_new @ r_new)
+                if np.all(np.isfinite(r_new)) and predicted > 0 and actual > 0:
+                    rho = actual / predicted
+                    mu, nu = mu * max(1 / 3, 1 - (2 * rho - 1) ** 3), 2.0
+                    break
+                mu, nu = mu * nu, nu * 2
+            else:
+                # a local minimum of ||F|| that is not a root, or a flat region
+                logger.debug("levenberg-marquardt: residual stopped decreasing at", x)
+                return
+            jac_new = J(x_new)
+            if not np.all(np.isfinite(jac_new)):
+                logger.debug("levenberg-marquardt: jacobian is undefined at", x_new)
+                return
+            step = sp.Float(float(np.max(np.abs(h))))
+            x, r, jac = x_new, r_new, jac_new
+            a, g = jac.T @ jac, jac.T @ r
+            yield LevenbergMarquardtRecord(
+                iterations,
+                {symbol: sp.Float(float(v)) for symbol, v in zip(symbols, x)},
+                step,
+                step,
+                system,
+                float(np.linalg.norm(r)),
+            )
+
+    def is_converged(self, record: SystemIterationRecord, precision: sp.Float) -> bool:
+        # a small step alone may just be a local minimum of the residual
+        return bool(
+            record.step <= precision
+            and isinstance(record, LevenbergMarquardtRecord)
+            and record.residual_norm <= precision
+        )
@@ -0,0 +1,275 @@
+import math
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Sequence
+
+import sympy as sp  # type: ignore
+
+from config import GlobalConfig
+from utils.perf import PerfCounters, active
+
+# iterates this many times further from the origin than the start diverge
+DIVERGENCE_BOUND = 1e12
+# steps growing this many times in a row, by GROWTH_FACTOR overall, diverge
+GROWTH_STREAK = 10
+GROWTH_FACTOR = 1e3
+# x_k within CYCLE_TOLERANCE * step of x_(k-2), CYCLE_REPEATS times in a row
+CYCLE_TOLERANCE = 1e-3
+CYCLE_REPEATS = 4
+# steps below this relative to |x| are lost in the float64 rounding of the
+# iterates (at CYCLE_TOLERANCE), iterations at finer precisions than float64
+# are not checked for cycles or stagnation from there on
+FLOAT64_RESOLUTION = 1e-12
+# steps the rate is estimated over
+RATE_WINDOW = 20
+# the rate is only trusted if every step ratio in the window is within
+# RATE_SPREAD times of it, i.e. the convergence is linear
+RATE_SPREAD = 2.0
+# with predict, linear convergence slower than this is stagnation if the
+# steps left are STAGNATION_MARGIN times too few to reach the precision
+SLOW_RATE = 0.9
+STAGNATION_MARGIN = 2
+# a rate whose -log shrinks below SUBLINEAR_SHRINK times its value from when
+# the iterations were half as many, twice in a row, is sublinear convergence:
+# the steps fall like a power of the iteration count (e.g. fixed point
+# iteration at a multiple root) and the rate creeps towards 1. the power is
+# measured, so the prediction is held to the iterations left without a margin
+SUBLINEAR_SHRINK = 0.75
+
+
+class StopReason(Enum):
+    DIVERGED = "diverged"
+    CYCLING = "cycles between two points"
+    STAGNATED = "stagnated"
+    MAX_ITERATIONS = "no convergence in max iterations"
+    TIME_BUDGET = "time budget exceeded"
+    EVALUATION_BUDGET = "evaluation budget exceeded"
+
+
+def _to_float(v: Any) -> float:
+    try:
+        return float(v)
+    except TypeError:
+        # a complex iterate has left the real line
+        return math.nan
+
+
+class Budget:
+    """
+    wall-clock and evaluation limits of one solve, counted from its creation.
+    evaluations are only limited while perf counters are active
+    """
+
+    max_seconds: float | None
+    max_evaluations: int | None
+    _start: float
+    _counters: PerfCounters | None
+    _start_evaluations: int
+
+    def __init__(
+        self, max_seconds: float | None = None, max_evaluations: int | None = None
+    ) -> None:
+        self.max_seconds = max_seconds
+        self.max_evaluations = max_evaluations
+        self._start = time.perf_counter()
+        self._counters = active()
+        self._start_evaluations = self._evaluations()
+
+    @staticmethod
+    def from_config() -> "Budget":
+        return Budget(GlobalConfig().TIME_BUDGET, GlobalConfig().EVALUATION_BUDGET)
+
+    def _evaluations(self) -> int:
+        if self._counters is None:
+            return 0
+        return sum(self._counters.evaluations.values())
+
+    def exceeded(self) -> StopReason | None:
+        if (
+            self.max_seconds is not None
+            and time.perf_counter() - self._start > self.max_seconds
+        ):
+            return StopReason.TIME_BUDGET
+        if (
+            self.max_evaluations is not None
+            and self._evaluations() - self._start_evaluations > self.max_evaluations
+        ):
+            return StopReason.EVALUATION_BUDGET
+        return None
+
+
+class IterationMonitor:
+    """
+    watches the iterates of one run of a method and tells when to give up
+    before max_iterations: divergence (non-finite or far away iterates, steps
+    growing without bound), 2-cycles, stagnation (steps that stop shrinking),
+    and the budget. the iterates are looked at in float64, so cycles and
+    stagnation are only looked for while the steps are above its resolution.
+
+    with predict, linear or sublinear convergence too slow for the steps to
+    get below the precision in the iterations left is stagnation too, as is
+    slow convergence to a precision below float64's range. only for methods that
+    stop on the step alone: chord or newton on a multiple root have slowly
+    shrinking steps but stop on |f(x)| much sooner
+    """
+
+    precision: float
+    max_iterations: int
+    budget: Budget
+    predict: bool
+    # |step_k| / |step_(k-1)| over the last RATE_WINDOW steps, None before that
+    rate: float | None = None
+    # estimated order of convergence from the last three steps
+    order: float | None = None
+    # the rate has been creeping towards 1 since the iterations were half as many
+    sublinear: bool = False
+    reason: StopReason | None = None
+    # iterates observed
+    iterations: int = 0
+    _scale: float | None = None
+    _steps: Deque[float]
+    _xs: Deque[Sequence[float]]
+    _growth: int = 0
+    _growth_from: float = 0.0
+    _cycles: int = 0
+    # the rate when iterations last reached _checkpoint_at, which doubles
+    _checkpoint_rate: float | None = None
+    _checkpoint_at: int = RATE_WINDOW
+    _shrunk: bool = False
+
+    def __init__(
+        self,
+        precision: sp.Float,
+        max_iterations: int,
+        budget: Budget | None = None,
+        predict: bool = False,
+    ) -> None:
+        self.precision = float(precision)
+        self.max_iterations = max_iterations
+        self.budget = budget if budget is not None else Budget()
+        self.predict = predict
+        self._steps = deque(maxlen=RATE_WINDOW + 1)
+        self._xs = deque(maxlen=2)
+
+    @staticmethod
+    def from_config(
+        precision: sp.Float, max_iterations: int, predict: bool = False
+    ) -> "IterationMonitor":
+        return IterationMonitor(
+            precision, max_iterations, Budget.from_config(), predict
+        )
+
+    def observe(self, x: Sequence[Any], step: Any) -> StopReason | None:
+        """
+        x: the iterate, step: its distance from the previous one
+        @returns why to stop, None to go on
+        """
+        self.iterations += 1
+        self.reason = self._observe([_to_float(v) for v in x], abs(_to_float(step)))
+        return self.reason
+
+    def _observe(self, x: Sequence[float], step: float) -> StopReason | None:
+        if not all(math.isfinite(v) for v in x) or not math.isfinite(step):
+            return StopReason.DIVERGED
+        size = max((abs(v) for v in x), default=0.0)
+        if self._scale is None:
+            self._scale = 1 + size
+        if size > DIVERGENCE_BOUND * self._scale:
+            return StopReason.DIVERGED
+
+        if self._steps and step > self._steps[-1]:
+            if self._growth == 0:
+                self._growth_from = self._steps[-1]
+            self._growth += 1
+            if (
+                self._growth >= GROWTH_STREAK
+                and step > GROWTH_FACTOR * self._growth_from
+            ):
+                return StopReason.DIVERGED
+        else:
+            self._growth = 0
+
+        resolved = step > FLOAT64_RESOLUTION * size
+        if resolved and len(self._xs) == 2 and step > self.precision:
+            back = max(abs(a - b) for a, b in zip(x, self._xs[0]))
+            self._cycles = self._cycles + 1 if back <= CYCLE_TOLERANCE * step else 0
+            if self._cycles >= CYCLE_REPEATS:
+                return StopReason.CYCLING
+        self._xs.append(x)
+
+        if step > 0:
+            self._estimate(step)
+            if resolved and self._stagnated(step):
+                return StopReason.STAGNATED
+        else:
+            self._steps.clear()
+        return self.budget.exceeded()
+
+    def _estimate(self, step: float) -> None:
+        steps = self._steps
+        if len(steps) >= 2 and steps[-1] != steps[-2]:
+            ratio = math.log(step / steps[-1])
+            previous = math.log(steps[-1] / steps[-2])
+            self.order = abs(ratio / previous) if previous != 0 else None
+        steps.append(step)
+        if len(steps) == steps.maxlen:
+            self.rate = (steps[-1] / steps[0]) ** (1 / RATE_WINDOW)
+            if self.iterations >= self._checkpoint_at:
+                self._check_sublinear(self.rate)
+
+    def _check_sublinear(self, rate: float) -> None:
+        before = self._checkpoint_rate
+        shrunk = (
+            before is not None
+            and 0 < rate < 1
+            and before < 1
+            and math.log(rate) > SUBLINEAR_SHRINK * math.log(before)
+        )
+        self.sublinear = shrunk and self._shrunk
+        self._shrunk = shrunk
+        self._checkpoint_rate = rate
+        self._checkpoint_at = 2 * self.iterations
+
+    def _stagnated(self, step: float) -> bool:
+        rate, steps = self.rate, self._steps
+        if rate is None or len(steps) < RATE_WINDOW + 1 or step <= self.precision:
+            return False
+        ratios = [b / a for a, b in zip(steps, list(steps)[1:])]
+        if not all(rate / RATE_SPREAD <= q <= rate * RATE_SPREAD for q in ratios):
+            return False
+        if rate >= 1:
+            return True
+        if not self.predict or rate < SLOW_RATE:
+            return False
+        if self.precision <= 0:
+            # the precision underflows float64, slow steps won't get there
+            return True
+        left = self.max_iterations - self.iterations
+        if self.sublinear:
+            # steps ~ k^-a, a = -k log(rate), reach the precision at
+            # k * (step / precision)^(1 / a), compared in logs to not overflow
+            power = -self.iterations * math.log(rate)
+            needed = math.log(step / self.precision) / power
+            return needed > math.log1p(left / self.iterations)
+        needed = math.log(self.precision / step) / math.log(rate)
+        return needed > STAGNATION_MARGIN * left
+
+    def give_up(self) -> StopReason:
+        """
+        @returns why the run ended without converging: the monitor's reason,
+        else max_iterations, else the method ran out of iterates by itself
+        (e.g. at a local minimum of the residual), which counts as stagnation
+        """
+        if self.reason is None:
+            self.reason = (
+                StopReason.MAX_ITERATIONS
+                if self.iterations >= self.max_iterations
+                else StopReason.STAGNATED
+            )
+        return self.reason
+
+    def describe(self) -> str:
+        rate = f"{self.rate:.3g}" if self.rate is not None else "-"
+        order = f"{self.order:.3g}" if self.order is not None else "-"
+        return f"rate {rate}, order {order}"
@@ -1,19 +1,23 @@
-from typing import Tuple
+from typing import Iterator
 
 import sympy as sp  # type: ignore
 
-from solvers.solver import Solver
+from solvers.solver import IterationRecord, Solver
 from utils.equations import Equation
-from utils.math import d2f as _d2f
 from utils.math import keeps_sign
+from utils.perf import Evaluation, counted
 
 
 class NewtonSolver(Solver):
     MAX_ITERATIONS = 100
 
     def check_convergence(self, equation: Equation) -> bool:
-        df, l, r = equation.df, equation.interval_l, equation.interval_r
-        d2f = lambda x: _d2f(df, x)
+        df, d2f, l, r = (
+            counted(equation.df, Evaluation.DERIVATIVE),
+            counted(equation.d2f, Evaluation.DERIVATIVE),
+            equation.interval_l,
+            equation.interval_r,
+        )
 
         if not keeps_sign(df, l, r) or not keeps_sign(d2f, l, r):
             return False
@@ -29,24 +33,30 @@ class NewtonSolver(Solver):
     ) -> sp.Float:
         return l
 
-    def solve(
+    def iterate(
         self, equation: Equation, precision: sp.Float
-    ) -> Tuple[sp.Float, int] | None:
+    ) -> Iterator[IterationRecord]:
         interval_l, interval_r, f, df = (
             equation.interval_l,
             equation.interval_r,
-            equation.f,
-            equation.df,
+            counted(equation.f, Evaluation.F),
+            counted(equation.df, Evaluation.DERIVATIVE),
         )
         x = self.get_starting_point(equation, interval_l, interval_r)
+        fx, dfx = f(x), df(x)
         prev_x = x - 10 * precision
-        for i in range(self.MAX_ITERATIONS):
-            x = x - f(x) / df(x)
-            if (
-                x - prev_x <= precision
-                or abs(f(x) / df(x)) <= precision
-                or abs(f(x)) <= precision
-            ):
-                return x, i
+        i = 0
+        while True:
+            i += 1
+            x = x - fx / dfx
+            fx, dfx = f(x), df(x)
+            # the next newton step
+            yield IterationRecord(i, x, x - prev_x, abs(fx / dfx), f, fx)
             prev_x = x
-        return None
+
+    def is_converged(self, record: IterationRecord, precision: sp.Float) -> bool:
+        return bool(
+            abs(record.step) <= precision
+            or record.error <= precision
+            or abs(record.fx) <= precision
+        )
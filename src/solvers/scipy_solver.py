@@ -0,0 +1,170 @@
+from typing import Callable, Tuple
+
+import numpy as np
+import sympy as sp  # type: ignore
+from scipy import optimize  # type: ignore
+
+from logger import GlobalLogger
+from solvers.monitor import StopReason
+from solvers.solver import Solver
+from utils.equations import Equation, SolutionMethod
+from utils.numeric import FloatArray, lambdify_numpy
+from utils.perf import Evaluation, Stage, active, count, stage
+from utils.trace import TraceRecorder
+
+BRENTQ, NEWTON, HALLEY = "brentq", "newton", "halley"
+# the in-house method each scipy one stands in for, methods that are not here
+# (fixed point iteration, every root) always run in-house, so does auto, its
+# result has to name the racer that won
+SCIPY_METHODS = {
+    SolutionMethod.CHORD: BRENTQ,
+    SolutionMethod.NEWTON: NEWTON,
+    SolutionMethod.HIGH_PRECISION_NEWTON: HALLEY,
+}
+# smallest precision relative to the size of x that float64 solves reach;
+# eps is ~2.2e-16, the rest is left for rounding in f
+FLOAT64_PRECISION = 1e-12
+# newton and halley start from this many points of the interval at once
+BATCH_STARTS = 8
+
+logger = GlobalLogger()
+
+
+def fits_float64(precision: sp.Float, scale: float) -> bool:
+    """
+    @returns whether a root of size ~scale can be found to precision in float64
+    """
+    return float(precision) >= FLOAT64_PRECISION * max(1.0, abs(scale))
+
+
+class ScipySolver(Solver):
+    """
+    f(x) = 0 by scipy.optimize in float64: brentq on the interval, or newton /
+    halley from BATCH_STARTS points of the interval at once (array newton).
+    f and its derivatives are compiled with numpy, so this is only for
+    precisions that fits_float64(), the in-house solvers cover the rest.
+    the iterates are not traced
+    """
+
+    method: str
+
+    def __init__(self, method: str = BRENTQ) -> None:
+        super().__init__()
+        if method not in (BRENTQ, NEWTON, HALLEY):
+            raise ValueError(f"unknown scipy method {method}")
+        self.method = method
+
+    def _compile(
+        self, fn: sp.Lambda, evaluation: Evaluation
+    ) -> Callable[..., FloatArray]:
+        compiled = lambdify_numpy(fn)
+
+        def evaluate(x: FloatArray) -> FloatArray:
+            count(evaluation, np.size(x))
+            return compiled(x)
+
+        return evaluate
+
+    def check_convergence(self, equation: Equation) -> bool:
+        if self.method != BRENTQ:
+            return True
+        f = self._compile(equation.f, Evaluation.F)
+        l, r = float(equation.interval_l), float(equation.interval_r)
+        return bool(f(np.float64(l)) * f(np.float64(r)) <= 0)
+
+    def _brentq(
+        self, equation: Equation, precision: sp.Float
+    ) -> Tuple[float, int] | None:
+        f = self._compile(equation.f, Evaluation.F)
+        x, res = optimize.brentq(
+            lambda x: float(f(x)),
+            float(equation.interval_l),
+            float(equation.interval_r),
+            xtol=float(precision),
+            maxiter=self.MAX_ITERATIONS,
+            full_output=True,
+            disp=False,
+        )
+        if not res.converged:
+            self.stop_reason = StopReason.MAX_ITERATIONS
+            return None
+        return float(x), int(res.iterations)
+
+    def _newton(
+        self, equation: Equation, precision: sp.Float
+    ) -> Tuple[float, int] | None:
+        l, r = float(equation.interval_l), float(equation.interval_r)
+        f = self._compile(equation.f, Evaluation.F)
+        iterations = 0
+
+        def f_counted(x: FloatArray) -> FloatArray:
+            # array newton evaluates f once per iteration
+            nonlocal iterations
+            iterations += 1
+            return f(x)
+
+        x, converged, _ = optimize.newton(
+            f_counted,
+            np.linspace(l, r, BATCH_STARTS),
+            fprime=self._compile(equation.df, Evaluation.DERIVATIVE),
+            fprime2=(
+                self._compile(equation.d2f, Evaluation.DERIVATIVE)
+                if self.method == HALLEY
+                else None
+            ),
+            tol=float(precision),
+            maxiter=self.MAX_ITERATIONS,
+            full_output=True,
+            disp=False,
+        )
+        # the interval has exactly one root, any start that got to it will do
+        inside = converged & (x >= l - float(precision)) & (x <= r + float(precision))
+        if not np.any(inside):
+            # converged, but to roots outside of the interval
+            self.stop_reason = (
+                StopReason.DIVERGED if np.any(converged) else StopReason.MAX_ITERATIONS
+            )
+            return None
+        return float(x[np.argmax(inside)]), iterations
+
+    def solve(
+        self,
+        equation: Equation,
+        precision: sp.Float,
+        on_iteration: Callable[[sp.Float, int], None] | None = None,
+        trace: TraceRecorder | None = None,
+    ) -> Tuple[sp.Float, int] | None:
+        self.stop_reason = None
+        with stage(Stage.ITERATE):
+            with np.errstate(all="ignore"):
+                res = (
+                    self._brentq(equation, precision)
+                    if self.method == BRENTQ
+                    else self._newton(equation, precision)
+                )
+        if res is None:
+            return None
+        x, iterations = sp.Float(res[0]), res[1]
+        logger.debug(
+            lambda: f"scipy {self.method}: x = {res[0]}, {iterations} iterations"
+        )
+        counters = active()
+        if counters is not None:
+            counters.record_iteration(iterations)
+        if on_iteration:
+            on_iteration(x, iterations)
+        return x, iterations
+
+
+def scipy_solver(
+    method: SolutionMethod, equation: Equation, precision: sp.Float
+) -> ScipySolver | None:
+    """
+    @returns the scipy solver that stands in for method, None if method has
+    none or precision doesn't fit float64
+    """
+    name = SCIPY_METHODS.get(method)
+    scale = max(abs(float(equation.interval_l)), abs(float(equation.interval_r)))
+    if name is None or not fits_float64(precision, scale):
+        return None
+    return ScipySolver(name)
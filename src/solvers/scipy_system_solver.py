@@ -0,0 +1,109 @@
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import sympy as sp  # type: ignore
+from scipy import optimize  # type: ignore
+
+from logger import GlobalLogger
+from solvers.monitor import StopReason
+from solvers.scipy_solver import fits_float64
+from solvers.system_solver import SystemSolver
+from utils.equations import EquationSystem, EquationSystemSolution, SystemSolutionMethod
+from utils.perf import Stage, active, stage
+from utils.trace import TraceRecorder
+
+# minpack's powell hybrid method, the one fsolve runs, and levenberg-marquardt
+HYBR, LM = "hybr", "lm"
+# the in-house method each scipy one stands in for, the global methods
+# (homotopy, krawczyk) always run in-house
+SCIPY_SYSTEM_METHODS = {
+    SystemSolutionMethod.FIXED_POINT_ITERATION: HYBR,
+    SystemSolutionMethod.GAUSS_SEIDEL: HYBR,
+    SystemSolutionMethod.SOR: HYBR,
+    SystemSolutionMethod.LEVENBERG_MARQUARDT: LM,
+}
+
+logger = GlobalLogger()
+
+
+class ScipySystemSolver(SystemSolver):
+    """
+    F(x) = 0 for the residuals F of system.apply by scipy.optimize.root with
+    the jacobian, in float64 like LevenbergMarquardtSystemSolver. the solution
+    must have ||F|| <= precision, a small step alone may be a local minimum.
+    the iterates are not traced
+    """
+
+    method: str
+
+    def __init__(self, method: str = HYBR) -> None:
+        super().__init__()
+        if method not in (HYBR, LM):
+            raise ValueError(f"unknown scipy method {method}")
+        self.method = method
+
+    def solve(
+        self,
+        system: EquationSystem,
+        starting_xs: Dict[str, sp.Float],
+        precision: sp.Float,
+        on_iteration: Callable[[EquationSystemSolution, int], None] | None = None,
+        trace: TraceRecorder | None = None,
+    ) -> Tuple[EquationSystemSolution, int] | None:
+        symbols = system.symbols
+        xs = self._starting_xs_to_symbols(system, starting_xs)
+        self.stop_reason = None
+        F, J = self._compile_float64(system)
+        x0 = np.array([float(xs[symbol]) for symbol in symbols])
+        if not np.all(np.isfinite(F(x0))):
+            raise ValueError("the system is not defined at the starting point")
+        with stage(Stage.ITERATE):
+            with np.errstate(all="ignore"):
+                res = optimize.root(
+                    F,
+                    x0,
+                    jac=J,
+                    method=self.method,
+                    tol=float(precision),
+                    options={
+                        "maxfev" if self.method == HYBR else "maxiter": (
+                            self.MAX_ITERATIONS * (len(symbols) + 1)
+                        )
+                    },
+                )
+        # hybr and lm only report evaluations
+        iterations = int(res.get("nit", res.nfev))
+        residual = float(np.linalg.norm(F(res.x)))
+        logger.debug(
+            lambda: f"scipy {self.method}: {res.message}, ||F|| = {residual:.3e}"
+        )
+        if not res.success:
+            self.stop_reason = StopReason.MAX_ITERATIONS
+            return None
+        if not residual <= precision:
+            # a local minimum of ||F||
+            self.stop_reason = StopReason.STAGNATED
+            return None
+        solution = {symbol: sp.Float(float(v)) for symbol, v in zip(symbols, res.x)}
+        counters = active()
+        if counters is not None:
+            counters.record_iteration(iterations)
+        if on_iteration:
+            on_iteration(solution, iterations)
+        return solution, iterations
+
+
+def scipy_system_solver(
+    method: SystemSolutionMethod,
+    starting_xs: Dict[str, sp.Float],
+    precision: sp.Float,
+) -> ScipySystemSolver | None:
+    """
+    @returns the scipy solver that stands in for method, None if method has
+    none or precision doesn't fit float64
+    """
+    name = SCIPY_SYSTEM_METHODS.get(method)
+    scale = max((abs(float(x)) for x in starting_xs.values()), default=0.0)
+    if name is None or not fits_float64(precision, scale):
+        return None
+    return ScipySystemSolver(name)
@@ -1,25 +1,129 @@
-from typing import Tuple
+from itertools import islice
+from typing import Callable, Iterator, Tuple
 
 import sympy as sp  # type: ignore
 
+from logger import GlobalLogger
+from solvers.monitor import IterationMonitor, StopReason
 from utils.equations import Equation
+from utils.perf import Stage, active, stage
+from utils.trace import TraceRecorder
+
+logger = GlobalLogger()
+
+
+class IterationRecord:
+    """
+    one iterate of a solver. f(x) is computed on first access if the method
+    itself didn't need it
+    """
+
+    iteration: int
+    x: sp.Float
+    # x - previous x
+    step: sp.Float
+    # method specific estimate of |x - root|
+    error: sp.Float
+    _fx: sp.Float | None
+    _f: Callable[[sp.Float], sp.Float]
+
+    def __init__(
+        self,
+        iteration: int,
+        x: sp.Float,
+        step: sp.Float,
+        error: sp.Float,
+        f: Callable[[sp.Float], sp.Float],
+        fx: sp.Float | None = None,
+    ):
+        self.iteration = iteration
+        self.x = x
+        self.step = step
+        self.error = error
+        self._f = f
+        self._fx = fx
+
+    @property
+    def fx(self) -> sp.Float:
+        if self._fx is None:
+            self._fx = self._f(self.x)
+        return self._fx
 
 
 class Solver:
     SAMPLES_COUNT = 1000
+    MAX_ITERATIONS = 100
+    # check_convergence() is fast enough to run before racing, see AutoSolver
+    CHEAP_CONVERGENCE_CHECK = False
+
+    # why the last solve() gave up, None if it found a root
+    stop_reason: StopReason | None = None
 
     def __init__(self) -> None:
         pass
 
+    def iterate(
+        self, equation: Equation, precision: sp.Float
+    ) -> Iterator[IterationRecord]:
+        """
+        lazily yields the iterates of the method, without any stopping rule;
+        precision only seeds the initial "previous x"
+        """
+        return iter(())
+
+    def is_converged(self, record: IterationRecord, precision: sp.Float) -> bool:
+        """
+        the method's own stopping rule, used by solve()
+        """
+        return bool(abs(record.step) <= precision)
+
+    def stops_on_step(self) -> bool:
+        """
+        is_converged() is the step rule alone, so the steps tell how far off
+        convergence is
+        """
+        return type(self).is_converged is Solver.is_converged
+
     def solve(
         self,
         equation: Equation,
         precision: sp.Float,
+        on_iteration: Callable[[sp.Float, int], None] | None = None,
+        trace: TraceRecorder | None = None,
     ) -> Tuple[sp.Float, int] | None:
         """
-        @returns (x, iterations)
+        @returns (x, iterations); None if the method gave up, see stop_reason
         """
-        return 0, 0
+        counters = active()
+        monitor = IterationMonitor.from_config(
+            precision, self.MAX_ITERATIONS, self.stops_on_step()
+        )
+        self.stop_reason = None
+        records = self.iterate(equation, precision)
+        with stage(Stage.ITERATE):
+            for record in islice(records, self.MAX_ITERATIONS):
+                if counters is not None:
+                    counters.record_iteration(record.iteration)
+                if trace is not None:
+                    trace.add(
+                        record.iteration,
+                        [record.x],
+                        [record.fx] if trace.record_residuals else None,
+                        record.step,
+                        record.error,
+                    )
+                if on_iteration:
+                    on_iteration(record.x, record.iteration)
+                if self.is_converged(record, precision):
+                    return record.x, record.iteration
+                if monitor.observe([record.x], record.step):
+                    break
+        self.stop_reason = monitor.give_up()
+        logger.info(
+            lambda: f"{self.__class__.__name__} gave up: {self.stop_reason.value} "
+            f"({monitor.describe()})"
+        )
+        return None
 
     def check_convergence(self, equation: Equation) -> bool:
         return True
@@ -1,26 +1,161 @@
-from typing import Callable, Dict, Tuple
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Tuple
 
 import sympy as sp  # type: ignore
 
+from logger import GlobalLogger
+from solvers.monitor import IterationMonitor, StopReason
 from utils.equations import EquationSystem, EquationSystemSolution
+from utils.numeric import FloatArray, lambdify_vector
+from utils.perf import Evaluation, Stage, active, count, stage
+from utils.trace import TraceRecorder
+
+logger = GlobalLogger()
+
+
+class SystemIterationRecord:
+    """
+    one iterate of a system solver. the residuals are computed on first access
+    """
+
+    iteration: int
+    xs: EquationSystemSolution
+    # max |x_i - previous x_i|
+    step: sp.Float
+    # method specific estimate of max |x_i - root_i|
+    error: sp.Float
+    _ys: List[sp.Float] | None = None
+    _system: EquationSystem
+
+    def __init__(
+        self,
+        iteration: int,
+        xs: EquationSystemSolution,
+        step: sp.Float,
+        error: sp.Float,
+        system: EquationSystem,
+    ):
+        self.iteration = iteration
+        self.xs = xs
+        self.step = step
+        self.error = error
+        self._system = system
+
+    @property
+    def ys(self) -> List[sp.Float]:
+        if self._ys is None:
+            self._ys = self._system.apply(self.xs)
+        return self._ys
 
 
 class SystemSolver:
     SAMPLES_COUNT = 1000
+    MAX_ITERATIONS = 100
+
+    # why the last solve() gave up, None if it found a solution
+    stop_reason: StopReason | None = None
 
     def __init__(self) -> None:
         pass
 
+    def _starting_xs_to_symbols(
+        self, system: EquationSystem, starting_xs: Dict[str, sp.Float]
+    ) -> Dict[sp.Symbol, sp.Float]:
+        system_symbols_strs = [s.name for s in system.symbols]
+        if set(starting_xs.keys()) != set(system_symbols_strs):
+            raise ValueError("starting xs symbols do not match equation system symbols")
+        return {sp.Symbol(k): v for k, v in starting_xs.items()}
+
+    def _compile_float64(
+        self, system: EquationSystem
+    ) -> Tuple[Callable[[FloatArray], FloatArray], Callable[[FloatArray], FloatArray]]:
+        """
+        @returns (F, J) of the residuals of system.apply as numpy functions of
+        the values of system.symbols
+        """
+        symbols, n = system.symbols, len(system.equations)
+        residuals = lambdify_vector(symbols, [e.f.expr for e in system.equations])
+        jacobian = lambdify_vector(
+            symbols,
+            [
+                e.f_gradient().get(symbol, sp.Integer(0))
+                for e in system.equations
+                for symbol in symbols
+            ],
+        )
+
+        def F(x: FloatArray) -> FloatArray:
+            count(Evaluation.F, n)
+            return residuals(x)
+
+        def J(x: FloatArray) -> FloatArray:
+            count(Evaluation.DERIVATIVE, n * len(symbols))
+            return jacobian(x).reshape(n, len(symbols))
+
+        return F, J
+
+    def iterate(
+        self,
+        system: EquationSystem,
+        starting_xs: Dict[str, sp.Float],
+        precision: sp.Float,
+    ) -> Iterator[SystemIterationRecord]:
+        """
+        lazily yields the iterates of the method, without any stopping rule
+        """
+        return iter(())
+
+    def is_converged(self, record: SystemIterationRecord, precision: sp.Float) -> bool:
+        return bool(record.step <= precision)
+
+    def stops_on_step(self) -> bool:
+        """
+        is_converged() is the step rule alone, so the steps tell how far off
+        convergence is
+        """
+        return type(self).is_converged is SystemSolver.is_converged
+
     def solve(
         self,
         system: EquationSystem,
         starting_xs: Dict[str, sp.Float],
         precision: sp.Float,
         on_iteration: Callable[[EquationSystemSolution, int], None] | None = None,
+        trace: TraceRecorder | None = None,
     ) -> Tuple[EquationSystemSolution, int] | None:
         """
-        @returns (x, iterations)
+        @returns (x, iterations); None if the method gave up, see stop_reason
         """
+        trace_symbols = [sp.Symbol(name) for name in trace.x_names] if trace else []
+        counters = active()
+        monitor = IterationMonitor.from_config(
+            precision, self.MAX_ITERATIONS, self.stops_on_step()
+        )
+        self.stop_reason = None
+        records = self.iterate(system, starting_xs, precision)
+        with stage(Stage.ITERATE):
+            for record in islice(records, self.MAX_ITERATIONS):
+                if counters is not None:
+                    counters.record_iteration(record.iteration)
+                if trace is not None:
+                    trace.add(
+                        record.iteration,
+                        [record.xs[sym] for sym in trace_symbols],
+                        record.ys if trace.record_residuals else None,
+                        record.step,
+                        record.error,
+                    )
+                if on_iteration:
+                    on_iteration(record.xs, record.iteration)
+                if self.is_converged(record, precision):
+                    return record.xs, record.iteration
+                if monitor.observe(list(record.xs.values()), record.step):
+                    break
+        self.stop_reason = monitor.give_up()
+        logger.info(
+            lambda: f"{self.__class__.__name__} gave up: {self.stop_reason.value} "
+            f"({monitor.describe()})"
+        )
         return None
 
     def check_convergence(
@@ -0,0 +1,269 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import mpmath  # type: ignore
+import sympy as sp  # type: ignore
+
+from config import PRECISION
+
+# truncated taylor series of mpmath numbers: coefficient k is f^(k) / k!
+type Series = List[Any]
+type SeriesFn = Callable[[Sequence[Series], int], Series]
+type Number = int | float | sp.Float
+
+
+def _constant(c: Any, n: int) -> Series:
+    return [c] + [mpmath.mpf(0)] * (n - 1)
+
+
+def _mul(a: Series, b: Series) -> Series:
+    return [mpmath.fsum(a[j] * b[k - j] for j in range(k + 1)) for k in range(len(a))]
+
+
+def _div(a: Series, b: Series) -> Series:
+    if b[0] == 0:
+        raise ZeroDivisionError()
+    c: Series = []
+    for k in range(len(a)):
+        c.append((a[k] - mpmath.fsum(b[j] * c[k - j] for j in range(1, k + 1))) / b[0])
+    return c
+
+
+def _power(a: Series, n: int) -> Series:
+    """
+    a^n by squaring, also where a[0] = 0
+    """
+    res, base = _constant(mpmath.mpf(1), len(a)), a
+    for bit in bin(abs(n))[2:][::-1]:
+        if bit == "1":
+            res = _mul(res, base)
+        base = _mul(base, base)
+    return res if n >= 0 else _div(_constant(mpmath.mpf(1), len(a)), res)
+
+
+def _real_power(a: Series, r: Any) -> Series:
+    # (a^r)' a = r a' a^r
+    if a[0] == 0:
+        raise ZeroDivisionError()
+    p: Series = [mpmath.power(a[0], r)]
+    for k in range(1, len(a)):
+        p.append(
+            mpmath.fsum(((r + 1) * j - k) * a[j] * p[k - j] for j in range(1, k + 1))
+            / (k * a[0])
+        )
+    return p
+
+
+def _compose(a: Series, value: Any, derivative: Series) -> Series:
+    """
+    f(a) from f(a[0]) and the series of f'(a), which only needs to be
+    correct up to the second to last coefficient
+    """
+    f: Series = [value]
+    for k in range(1, len(a)):
+        f.append(mpmath.fsum(j * a[j] * derivative[k - j] for j in range(1, k + 1)) / k)
+    return f
+
+
+def _exp(a: Series) -> Series:
+    e: Series = [mpmath.exp(a[0])]
+    for k in range(1, len(a)):
+        e.append(mpmath.fsum(j * a[j] * e[k - j] for j in range(1, k + 1)) / k)
+    return e
+
+
+def _sin_cos(a: Series, sign: int) -> Tuple[Series, Series]:
+    """
+    (sin a, cos a) for sign = -1, (sinh a, cosh a) for sign = 1
+    """
+    if sign < 0:
+        s, c = [mpmath.sin(a[0])], [mpmath.cos(a[0])]
+    else:
+        s, c = [mpmath.sinh(a[0])], [mpmath.cosh(a[0])]
+    for k in range(1, len(a)):
+        s.append(mpmath.fsum(j * a[j] * c[k - j] for j in range(1, k + 1)) / k)
+        c.append(sign * mpmath.fsum(j * a[j] * s[k - j] for j in range(1, k + 1)) / k)
+    return s, c
+
+
+def _log(a: Series) -> Series:
+    return _compose(a, mpmath.log(a[0]), _div(_constant(mpmath.mpf(1), len(a)), a))
+
+
+def _atan(a: Series) -> Series:
+    # 1 / (1 + a^2)
+    square = _mul(a, a)
+    square[0] += 1
+    return _compose(
+        a, mpmath.atan(a[0]), _div(_constant(mpmath.mpf(1), len(a)), square)
+    )
+
+
+def _asin_derivative(a: Series) -> Series:
+    # (1 - a^2)^(-1/2)
+    square = [-c for c in _mul(a, a)]
+    square[0] += 1
+    return _real_power(square, mpmath.mpf(-0.5))
+
+
+_FUNCTIONS: Dict[Any, Callable[[Series], Series]] = {
+    sp.exp: _exp,
+    sp.sin: lambda a: _sin_cos(a, -1)[0],
+    sp.cos: lambda a: _sin_cos(a, -1)[1],
+    sp.tan: lambda a: _div(*_sin_cos(a, -1)),
+    sp.sinh: lambda a: _sin_cos(a, 1)[0],
+    sp.cosh: lambda a: _sin_cos(a, 1)[1],
+    sp.tanh: lambda a: _div(*_sin_cos(a, 1)),
+    sp.log: _log,
+    sp.atan: _atan,
+    sp.asin: lambda a: _compose(a, mpmath.asin(a[0]), _asin_derivative(a)),
+    sp.acos: lambda a: _compose(
+        a, mpmath.acos(a[0]), [-c for c in _asin_derivative(a)]
+    ),
+    sp.Abs: lambda a: a if a[0] > 0 else [-c for c in a],
+}
+
+
+def _number(expr: sp.Expr) -> Any:
+    value = expr.evalf(PRECISION)
+    if not value.is_Float:
+        raise ValueError(f"{expr} is not a real number")
+    return mpmath.mpf(value._mpf_)
+
+
+def _compile(expr: sp.Expr, index: Dict[sp.Symbol, int]) -> SeriesFn:
+    if expr.is_Symbol:
+        i = index[expr]
+        return lambda xs, n: xs[i]
+    if expr.is_Atom:
+        c = _number(expr)
+        return lambda xs, n: _constant(c, n)
+    args = [_compile(arg, index) for arg in expr.args]
+    if expr.is_Add:
+
+        def add(xs: Sequence[Series], n: int) -> Series:
+            terms = [arg(xs, n) for arg in args]
+            return [mpmath.fsum(t[k] for t in terms) for k in range(n)]
+
+        return add
+    if expr.is_Mul:
+
+        def mul(xs: Sequence[Series], n: int) -> Series:
+            res = args[0](xs, n)
+            for arg in args[1:]:
+                res = _mul(res, arg(xs, n))
+            return res
+
+        return mul
+    if expr.is_Pow:
+        base, power = args
+        exponent = expr.args[1]
+        if exponent.is_Integer:
+            k = int(exponent)
+            return lambda xs, n: _power(base(xs, n), k)
+        if exponent.is_number:
+            r = _number(exponent)
+            return lambda xs, n: _real_power(base(xs, n), r)
+        return lambda xs, n: _exp(_mul(power(xs, n), _log(base(xs, n))))
+    fn = _FUNCTIONS.get(expr.func)
+    if fn is not None and len(args) == 1:
+        arg = args[0]
+        return lambda xs, n: fn(arg(xs, n))
+    raise ValueError(f"{expr.func.__name__} is not supported by autodiff")
+
+
+@lru_cache(maxsize=1024)
+def _compiled(expr: sp.Expr, symbols: Tuple[sp.Symbol, ...]) -> SeriesFn:
+    return _compile(expr, {symbol: i for i, symbol in enumerate(symbols)})
+
+
+def taylor(
+    expr: sp.Expr,
+    symbols: Sequence[sp.Symbol],
+    point: Sequence[Number],
+    direction: Sequence[Number],
+    order: int,
+) -> Series:
+    """
+    taylor coefficients of expr(point + t * direction) in t, up to t^order,
+    at the current mpmath precision
+    @raises ValueError if expr has functions autodiff doesn't know or isn't
+    differentiable at the point
+    """
+    n = order + 1
+    xs = []
+    for p, d in zip(point, direction):
+        x = _constant(mpmath.mpf(p), n)
+        if n > 1:
+            x[1] = mpmath.mpf(d)
+        xs.append(x)
+    try:
+        return _compiled(expr, tuple(symbols))(xs, n)
+    except ZeroDivisionError:
+        raise ValueError(f"{expr} is not differentiable at {list(point)}")
+
+
+def derivatives(expr: sp.Expr, x: sp.Symbol, at: Number, order: int) -> List[sp.Float]:
+    """
+    expr and its derivatives by x at x = at, up to order
+    """
+    coefficients = taylor(expr, [x], [at], [1], order)
+    factorial = 1
+    res = []
+    for k, c in enumerate(coefficients):
+        factorial *= max(k, 1)
+        res.append(sp.Float(c * factorial, mpmath.mp.dps))
+    return res
+
+
+def partial_derivative(
+    expr: sp.Expr, xs: Dict[sp.Symbol, sp.Float], symbol: sp.Symbol
+) -> sp.Float:
+    """
+    d expr / d symbol at xs; like subs, xs may be keyed by symbol names
+    """
+    symbols = [sp.Symbol(s) if isinstance(s, str) else s for s in xs.keys()]
+    direction = [1 if s == symbol else 0 for s in symbols]
+    return sp.Float(
+        taylor(expr, symbols, list(xs.values()), direction, 1)[1], PRECISION
+    )
+
+
+class TaylorDerivative(sp.Function):  # type: ignore[misc]
+    """
+    TaylorDerivative(expr, x, order, at): the order-th derivative of expr by x
+    at x = at, computed by autodiff once at is a number. stands in for
+    sp.diff(expr, x, order) as a sympy expression of at; build it with
+    taylor_derivative()
+    """
+
+    nargs = 4
+
+    @classmethod
+    def eval(cls, expr: sp.Expr, x: sp.Symbol, order: sp.Integer, at: sp.Expr) -> Any:
+        if not at.is_number or expr.free_symbols - {x}:
+            return None
+        at = at if at.is_Float else at.evalf(PRECISION)
+        if not at.is_Float:
+            return None
+        # as precise as the point, e.g. for high precision newton
+        with mpmath.workprec(max(mpmath.mp.prec, at._prec)):
+            return derivatives(expr, x, at, int(order))[-1]
+
+    def _sympystr(self, printer: Any) -> str:
+        expr, x, order, at = self.args
+        if not at.is_Symbol:
+            return (
+                f"TaylorDerivative({', '.join(printer._print(a) for a in self.args)})"
+            )
+        return str(printer._print(sp.Derivative(expr.xreplace({x: at}), (at, order))))
+
+
+def taylor_derivative(expr: sp.Expr, x: sp.Symbol, order: int) -> sp.Expr:
+    """
+    the order-th derivative of expr by x as a sympy expression that autodiff
+    evaluates
+    """
+    # expr is kept in terms of its own symbol, so substituting x only sets the point
+    bound = sp.Dummy(x.name)
+    return TaylorDerivative(expr.xreplace({x: bound}), bound, sp.Integer(order), x)
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from threading import Lock
+from typing import Any, List, Tuple
+
+import numpy as np
+import sympy as sp  # type: ignore
+
+from config import PRECISION, GlobalConfig
+from logger import GlobalLogger
+
+# bump when the layout of the cached bundles or the way they are computed changes
+CACHE_VERSION = 4
+CACHE_SUFFIX = ".json"
+
+logger = GlobalLogger()
+
+
+def _library_version() -> str:
+    return ";".join(
+        [
+            f"cache={CACHE_VERSION}",
+            f"python={sys.version_info.major}.{sys.version_info.minor}",
+            f"sympy={sp.__version__}",
+            f"numpy={np.__version__}",
+            f"precision={PRECISION}",
+        ]
+    )
+
+
+def cache_key(kind: str, *parts: str) -> str:
+    """
+    content address of a bundle: kind, canonical parts (e.g. sp.srepr of the
+    expression) and the versions of everything that affects the result
+    """
+    h = hashlib.sha256(_library_version().encode())
+    for part in (kind, *parts):
+        h.update(b"\0")
+        h.update(part.encode())
+    return h.hexdigest()
+
+
+def encode_expr(expr: sp.Basic) -> Any:
+    """
+    json data of a sympy expression: symbols and numbers by value, anything
+    else as [class name, *args] of a class from the sympy namespace
+    @raises ValueError for expressions that can't be rebuilt that way
+    """
+    if type(expr) is sp.Symbol:
+        return ["Symbol", expr.name, expr.assumptions0]
+    if isinstance(expr, sp.Integer):
+        return ["Integer", int(expr)]
+    if isinstance(expr, sp.Rational):
+        return ["Rational", int(expr.p), int(expr.q)]
+    if isinstance(expr, sp.Float):
+        return ["Float", list(expr._mpf_), expr._prec]
+    name = type(expr).__name__
+    if not expr.args:
+        # pi, E, I, oo, ...; other atoms, like dummies, don't survive a rebuild
+        if getattr(sp.S, name, None) is not expr:
+            raise ValueError(f"can't encode {name}")
+        return ["S", name]
+    if getattr(sp, name, None) is not type(expr):
+        raise ValueError(f"can't encode {name}")
+    return [name, *(encode_expr(arg) for arg in expr.args)]
+
+
+def decode_expr(data: Any) -> sp.Basic:
+    """
+    the expression encode_expr() was given, nothing in data is executed
+    @raises ValueError for data that is not an encoded expression
+    """
+    if not isinstance(data, list) or not data or not isinstance(data[0], str):
+        raise ValueError(f"not an encoded expression: {data!r}")
+    name, args = data[0], data[1:]
+    if name == "Symbol":
+        return sp.Symbol(args[0], **args[1])
+    if name == "Integer":
+        return sp.Integer(args[0])
+    if name == "Rational":
+        return sp.Rational(args[0], args[1])
+    if name == "Float":
+        return sp.Float(tuple(args[0]), precision=args[1])
+    if name == "S":
+        value = getattr(sp.S, args[0], None)
+        if not isinstance(value, sp.Basic):
+            raise ValueError(f"unknown singleton {args[0]}")
+        return value
+    cls = getattr(sp, name, None)
+    if not isinstance(cls, type) or not issubclass(cls, sp.Basic):
+        raise ValueError(f"unknown expression class {name}")
+    decoded = [decode_expr(arg) for arg in args]
+    try:
+        # the args are already in canonical form
+        return cls(*decoded, evaluate=False)
+    except TypeError:
+        pass
+    try:
+        return cls(*decoded)
+    except Exception as e:
+        raise ValueError(f"can't rebuild {name}: {e}") from e
+
+
+class DiskCache:
+    """
+    content addressed json store, one file per key. values are plain data
+    (see encode_expr), never code. files are written atomically (temp file
+    + rename), reads bump the modification time, and once the total size
+    exceeds max_bytes the least recently used files go
+    """
+
+    directory: str
+    max_bytes: int
+    lock: Lock
+    # running estimate of the size of the directory, None until scanned
+    size: int | None = None
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        if max_bytes <= 0:
+            raise ValueError("cache size must be positive")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + CACHE_SUFFIX)
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # truncated by a crash of an old version...
+            logger.debug("dropping unreadable cache entry", path, e)
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        try:
+            data = json.dumps(value, separators=(",", ":")).encode()
+        except (TypeError, ValueError) as e:
+            logger.debug("not caching a value that is not plain data", key, e)
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(lambda: f"could not write cache entry {path}: {e}")
+            return
+        with self.lock:
+            if self.size is not None:
+                self.size += len(data)
+            if self.size is None or self.size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """
+        @returns [(mtime, size, path)]
+        """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(CACHE_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        size = sum(entry[1] for entry in entries)
+        if size > self.max_bytes:
+            entries.sort()
+            for _, entry_size, path in entries:
+                if size <= self.max_bytes:
+                    break
+                if self._remove(path):
+                    size -= entry_size
+        self.size = size
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+_global_cache: DiskCache | None = None
+
+
+def global_cache() -> DiskCache | None:
+    """
+    the cache configured in GlobalConfig, None if caching is disabled
+    """
+    global _global_cache
+    directory, max_bytes = GlobalConfig().CACHE_DIR, GlobalConfig().CACHE_MAX_BYTES
+    if directory is None:
+        return None
+    if (
+        _global_cache is None
+        or _global_cache.directory != directory
+        or _global_cache.max_bytes != max_bytes
+    ):
+        _global_cache = DiskCache(directory, max_bytes)
+    return _global_cache
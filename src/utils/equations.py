@@ -1,23 +1,39 @@
-import math
-import re
 from enum import Enum
-from typing import Dict, List, Set
+from functools import lru_cache
+from typing import Any, Dict, List, Set
 
 import sympy as sp  # type: ignore
 
-from config import PRECISION
+from config import PRECISION, GlobalConfig
 from logger import GlobalLogger
-from utils.math import d2f as _d2f
-from utils.math import df as _df
-from utils.math import get_phi_with_lambda
+from utils.autodiff import partial_derivative, taylor_derivative
+from utils.disk_cache import cache_key, decode_expr, encode_expr, global_cache
+from utils.math import build_phi, contraction_factor
+from utils.numeric import NumpyFn, lambdify_numpy
+from utils.parser import parse_expression
+from utils.perf import Evaluation, Stage, count, stage
 
 logger = GlobalLogger()
 
 
+@lru_cache(maxsize=4096)
+def expr_str(expr: sp.Expr) -> str:
+    """
+    printing sympy expressions is slow and writers print the same ones per result
+    """
+    return str(expr)
+
+
 class SolutionMethod(Enum):
     CHORD = "Chord"
     NEWTON = "Newton"
     FIXED_POINT_ITERATION = "Fixed point iteration"
+    # races the methods above, see solvers.auto_solver
+    AUTO = "Auto"
+    # precision follows the requested one, see solvers.high_precision_newton_solver
+    HIGH_PRECISION_NEWTON = "High precision Newton"
+    # every root in the interval, see solvers.deflated_newton_solver
+    DEFLATED_NEWTON = "Newton (all roots)"
 
 
 class Equation:
@@ -29,9 +45,15 @@ class Equation:
     # x = phi(x)
     phi: sp.Lambda
     dphi: sp.Lambda
+    # max |phi'| over the interval, phi is a contraction if q < 1
+    q: float
+    # see utils.math.PhiConstruction, "given" for a phi passed in
+    phi_form: str
 
     interval_l: sp.Float
     interval_r: sp.Float
+    # f for plotting and sampling, compiled from the parse tree if there is one
+    _f_numpy: NumpyFn | None = None
 
     def __init__(
         self,
@@ -47,80 +69,125 @@ class Equation:
         2. Equation(interval_l, interval_r, f=, phi=)
         3. Equation(interval_r, interval_r, equation_str=)
         """
-        if f is not None:
-            pass
-        elif equation_str is not None:
-            f = self._validate_and_parse_equation(equation_str)
-        else:
-            raise ValueError("either equation_str or f must be provided")
-        if phi is None:
-            phi, dphi = get_phi_with_lambda(f, interval_l, interval_r)
+        if f is None:
+            if equation_str is None:
+                raise ValueError("either equation_str or f must be provided")
+            with stage(Stage.PARSE):
+                f = self._validate_and_parse_equation(equation_str)
+        self.interval_l = interval_l
+        self.interval_r = interval_r
+        # only the derived phi is worth caching, a given one is cheap to prepare
+        cache = global_cache() if phi is None else None
+        if cache is None:
+            self._prepare(f, phi)
+            return
+        key = cache_key(
+            "equation-autodiff" if GlobalConfig().AUTODIFF else "equation",
+            sp.srepr(f),
+            str(interval_l),
+            str(interval_r),
+        )
+        bundle = cache.get(key)
+        if bundle is not None and self._load(f, bundle):
+            return
+        self._prepare(f, phi)
+        try:
+            cache.put(key, self._dump())
+        except ValueError as e:
+            logger.debug(lambda: f"not caching {self.f_str()}: {e}")
+
+    def _dump(self) -> Dict[str, Any]:
+        """
+        @raises ValueError if an expression can't be stored, see encode_expr
+        """
+        return {
+            "df": encode_expr(self.df),
+            "d2f": encode_expr(self.d2f),
+            "phi": encode_expr(self.phi),
+            "dphi": encode_expr(self.dphi),
+            "q": self.q,
+            "phi_form": self.phi_form,
+        }
+
+    def _load(self, f: sp.Lambda, bundle: Any) -> bool:
+        """
+        @returns False if bundle is not what _dump() stores
+        """
+        try:
+            self.df, self.d2f, self.phi, self.dphi = (
+                decode_expr(bundle[name]) for name in ("df", "d2f", "phi", "dphi")
+            )
+            self.q, self.phi_form = float(bundle["q"]), str(bundle["phi_form"])
+        except (ValueError, TypeError, KeyError, IndexError) as e:
+            logger.debug("dropping unreadable cached equation", e)
+            return False
         self.f = f
-        self.phi = phi
+        return True
+
+    def _prepare(self, f: sp.Lambda, phi: sp.Lambda | None) -> None:
+        """
+        derives phi if it is not given, differentiates
+        """
+        self.f = f
+        with stage(Stage.PHI):
+            if phi is None:
+                construction = build_phi(f, self.interval_l, self.interval_r)
+                self.phi, self.dphi = construction.phi, construction.dphi
+                self.q, self.phi_form = construction.q, construction.form
+            else:
+                x = sp.symbols("x")
+                self.phi = phi
+                self.dphi = sp.Lambda(x, sp.diff(phi.expr, x))
+                self.q = contraction_factor(self.dphi, self.interval_l, self.interval_r)
+                self.phi_form = "given"
+        with stage(Stage.DIFFERENTIATE):
+            self._differentiate()
+
+    def _differentiate(self) -> None:
+        f, interval_l, interval_r = self.f, self.interval_l, self.interval_r
+        x = sp.symbols("x")
+        if GlobalConfig().AUTODIFF:
+            self.df = sp.Lambda(x, taylor_derivative(f.expr, x, 1))
+            self.d2f = sp.Lambda(x, taylor_derivative(f.expr, x, 2))
+            return
         try:
-            self.df = sp.Lambda(sp.symbols("x"), sp.diff(f.expr, sp.symbols("x")))
+            self.df = sp.Lambda(x, sp.diff(f.expr, x))
         except sp.SympifyError as e:
             logger.warning(
-                f"sympy could not differentiate {self.f_str()}, {interval_l=}, {interval_r=}; falling back to stupid differentiation\n{e}"
+                lambda: f"sympy could not differentiate {self.f_str()}, {interval_l=}, {interval_r=}; falling back to autodiff\n{e}"
             )
-            self.df = sp.Lambda(sp.symbols("x"), lambda x: _df(f, x))
+            self.df = sp.Lambda(x, taylor_derivative(f.expr, x, 1))
         try:
-            self.d2f = sp.Lambda(
-                sp.symbols("x"), sp.diff(self.df.expr, sp.symbols("x"))
-            )
+            self.d2f = sp.Lambda(x, sp.diff(self.df.expr, x))
         except sp.SympifyError as e:
             logger.warning(
-                f"sympy could not differentiate {self.df_str()}, {interval_l=}, {interval_r=} (second derivative); falling back to stupid differentiation\n{e}"
+                lambda: f"sympy could not differentiate {self.df_str()}, {interval_l=}, {interval_r=} (second derivative); falling back to autodiff\n{e}"
             )
-            self.d2f = sp.Lambda(sp.symbols("x"), lambda x: _d2f(self.df, x))
-        if dphi is None:
-            dphi = sp.Lambda(sp.symbols("x"), sp.diff(phi, sp.symbols("x")))
-        self.dphi = dphi
-        self.interval_l = interval_l
-        self.interval_r = interval_r
+            self.d2f = sp.Lambda(x, taylor_derivative(f.expr, x, 2))
 
     def f_str(self) -> str:
-        return str(self.f.expr)
+        return expr_str(self.f.expr)
+
+    def f_numpy(self) -> NumpyFn:
+        if self._f_numpy is None:
+            self._f_numpy = lambdify_numpy(self.f)
+        return self._f_numpy
 
     def phi_str(self) -> str:
-        return str(self.phi.expr)
+        return expr_str(self.phi.expr)
 
     def df_str(self) -> str:
-        return str(self.df.expr)
+        return expr_str(self.df.expr)
 
     def dphi_str(self) -> str:
-        return str(self.dphi.expr)
+        return expr_str(self.dphi.expr)
 
     def _validate_and_parse_equation(self, equation_str: str) -> sp.Lambda:
-        equation_str = equation_str.replace(",", ".").replace("^", "**")
-        allowed_functions = (
-            "("
-            + "|".join(
-                filter(
-                    lambda s: not s.startswith("_")
-                    and not s.endswith("_")
-                    and s not in {"inf", "nan"},
-                    math.__dict__.keys(),
-                )
-            )
-            + ")"
-        )
-        allowed_pattern = r"^[0-9+\-*/().^ \s" + allowed_functions + "]+$"
-        if not re.match(allowed_pattern, equation_str):
-            raise ValueError("Invalid characters in the equation")
-        x = sp.symbols("x")
-        try:
-            expr = sp.sympify(equation_str)
-        except sp.SympifyError:
-            raise ValueError("Invalid equation format")
-        used_symbols = expr.free_symbols
-        if len(used_symbols) > 1:
-            raise ValueError(
-                f"Invalid variable(s) {used_symbols - {x}} in the equation. Only 'x' is allowed."
-            )
+        parsed = parse_expression(equation_str)
+        self._f_numpy = parsed.numeric()
+        expr = parsed.sympy()
         logger.debug("parsed expression", expr)
-        func = sp.Lambda(x, expr)
-        return func
+        return sp.Lambda(sp.symbols("x"), expr)
 
 
 # ----- systems -----
@@ -128,6 +195,13 @@ class Equation:
 
 class SystemSolutionMethod(Enum):
     FIXED_POINT_ITERATION = "Fixed point iteration"
+    GAUSS_SEIDEL = "Gauss-Seidel"
+    SOR = "Successive over-relaxation"
+    LEVENBERG_MARQUARDT = "Levenberg-Marquardt"
+    # every real solution of a polynomial system, see solvers.homotopy_system_solver
+    HOMOTOPY = "Homotopy continuation"
+    # every solution in a box, proven unique, see solvers.krawczyk_system_solver
+    KRAWCZYK = "Krawczyk (certified)"
 
 
 EquationSystemSolution = dict[sp.Symbol, sp.Float]
@@ -142,45 +216,124 @@ class MultivariableEquation:
     phi_lhs: sp.Symbol
     phi: sp.Lambda
 
+    # partial derivatives of f and phi, computed on first use
+    _gradients: Dict[str, Dict[sp.Symbol, sp.Expr]]
+
     def __init__(self, f: sp.Lambda, phi_lhs: sp.Symbol, phi: sp.Expr):
         self.f = f
         self.phi = sp.Lambda(tuple(f.expr.free_symbols), phi)
         self.phi_lhs = phi_lhs
+        self._gradients = {}
+
+    def _gradient(self, name: str, expr: sp.Expr) -> Dict[sp.Symbol, sp.Expr]:
+        gradient = self._gradients.get(name)
+        if gradient is not None:
+            return gradient
+
+        def compute() -> Dict[sp.Symbol, sp.Expr]:
+            with stage(Stage.DIFFERENTIATE):
+                try:
+                    return {
+                        symbol: sp.diff(expr, symbol) for symbol in expr.free_symbols
+                    }
+                except sp.SympifyError as e:
+                    logger.warning(
+                        lambda: f"sympy could not differentiate {expr}; falling back to autodiff\n{e}"
+                    )
+                    return {
+                        symbol: taylor_derivative(expr, symbol, 1)
+                        for symbol in expr.free_symbols
+                    }
+
+        cache = global_cache()
+        if cache is None:
+            gradient = compute()
+        else:
+            key = cache_key("gradient", sp.srepr(expr))
+            cached = self._load_gradient(cache.get(key))
+            if cached is not None:
+                gradient = cached
+            else:
+                gradient = compute()
+                try:
+                    cache.put(
+                        key,
+                        [[encode_expr(s), encode_expr(d)] for s, d in gradient.items()],
+                    )
+                except ValueError as e:
+                    logger.debug("not caching the gradient of", expr, e)
+        self._gradients[name] = gradient
+        return gradient
+
+    @staticmethod
+    def _load_gradient(data: Any) -> Dict[sp.Symbol, sp.Expr] | None:
+        """
+        @returns None if data is not a stored gradient
+        """
+        if data is None:
+            return None
+        try:
+            return {decode_expr(s): decode_expr(d) for s, d in data}
+        except (ValueError, TypeError) as e:
+            logger.debug("dropping unreadable cached gradient", e)
+            return None
+
+    def f_gradient(self) -> Dict[sp.Symbol, sp.Expr]:
+        """
+        partial derivatives of f by the symbols it depends on. always symbolic
+        unless sympy fails, the solvers that compile them need expressions
+        """
+        return self._gradient("f", self.f.expr)
 
     def compute(self, xs: Dict[sp.Symbol, sp.Float]) -> sp.Float:
+        count(Evaluation.F)
         return self.f(*xs.keys()).subs(xs).evalf(PRECISION)
 
     def df(self, symbol: sp.Symbol, xs: Dict[sp.Symbol, sp.Float]) -> sp.Float:
-        logger.debug(f"computing df {self.f_str()} {sp.diff(self.f.expr, symbol)}")
-        return sp.diff(self.f.expr, symbol).subs(xs.items())
+        count(Evaluation.DERIVATIVE)
+        if GlobalConfig().AUTODIFF:
+            return partial_derivative(self.f.expr, xs, symbol)
+        derivative = self.f_gradient().get(symbol, sp.Integer(0))
+        logger.debug("computing df", self.f.expr, derivative)
+        return derivative.subs(xs.items())
 
     def dphi(self, symbol: sp.Symbol, xs: Dict[sp.Symbol, sp.Float]) -> sp.Float:
-        logger.debug(
-            f"computing dphi {self.phi_str()} {sp.diff(self.phi.expr, symbol)}"
-        )
-        return sp.diff(self.phi.expr, symbol).subs(xs.items())
+        count(Evaluation.DERIVATIVE)
+        if GlobalConfig().AUTODIFF:
+            return partial_derivative(self.phi.expr, xs, symbol)
+        derivative = self._gradient("phi", self.phi.expr).get(symbol, sp.Integer(0))
+        logger.debug("computing dphi", self.phi.expr, derivative)
+        return derivative.subs(xs.items())
 
     def f_str(self) -> str:
-        return str(self.f.expr)
+        return expr_str(self.f.expr)
 
     def phi_str(self) -> str:
-        return str(self.phi.expr)
+        return expr_str(self.phi.expr)
 
 
 class EquationSystem:
     equations: List[MultivariableEquation]
-    symbols: Set[sp.Symbol]
+    # in the order of the equations whose phis define them, which is also the
+    # order of a gauss-seidel sweep
+    symbols: List[sp.Symbol]
 
     def __init__(self, equations: List[MultivariableEquation]):
         self.equations = equations
-        self.symbols = set.union(*[e.f.expr.free_symbols for e in equations])
+        free_symbols: Set[sp.Symbol] = set.union(
+            *[e.f.expr.free_symbols for e in equations]
+        )
 
         # symbols that are defined in terms of other symbols with phis
         expressed_symbols = set.union(*[e.phi_lhs.free_symbols for e in equations])
-        if len(expressed_symbols) != len(self.symbols):
+        if len(expressed_symbols) != len(free_symbols):
             raise ValueError(
-                f"Symbols {self.symbols - expressed_symbols} are not defined in terms of other symbols with phis"
+                f"Symbols {free_symbols - expressed_symbols} are not defined in terms of other symbols with phis"
             )
+        defined = [e.phi_lhs for e in equations if e.phi_lhs in free_symbols]
+        self.symbols = list(dict.fromkeys(defined)) + sorted(
+            free_symbols - set(defined), key=str
+        )
 
     def apply(self, xs: EquationSystemSolution) -> List[sp.Float]:
         return [e.compute(xs) for e in self.equations]
@@ -192,11 +345,29 @@ class EquationSystem:
         """
         applies the phi functions
         """
+        count(Evaluation.PHI, len(self.equations))
         return {
             phi_lhs: phi(*[xs[sym] for sym in phi.args[0]])
             for phi_lhs, phi in self.get_phi_map().items()
         }
 
+    def sweep_phi(
+        self, xs: EquationSystemSolution, omega: sp.Float | int = 1
+    ) -> EquationSystemSolution:
+        """
+        applies the phi functions one by one in the order of the equations, each
+        one seeing the components updated before it (gauss-seidel). omega != 1
+        relaxes every update: x_i += omega * (phi_i(x) - x_i)
+        """
+        count(Evaluation.PHI, len(self.equations))
+        xs = dict(xs)
+        for e in self.equations:
+            value = e.phi(*[xs[sym] for sym in e.phi.args[0]])
+            if omega != 1:
+                value = xs[e.phi_lhs] + omega * (value - xs[e.phi_lhs])
+            xs[e.phi_lhs] = value
+        return xs
+
 
 SYSTEM_PRESETS = [
     EquationSystem(
@@ -0,0 +1,126 @@
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import sympy as sp  # type: ignore
+from mpmath import iv  # type: ignore
+from mpmath.libmp import round_ceiling, round_floor, to_float  # type: ignore
+
+# an mpmath interval (iv.mpf), endpoints are rounded outward
+type Interval = Any
+# float endpoints of an interval; unlike intervals they can be pickled
+type Bounds = Tuple[float, float]
+type IntervalFn = Callable[[Sequence[Interval]], Interval]
+type IntervalVectorFn = Callable[[Sequence[Interval]], List[Interval]]
+
+_FUNCTIONS: Dict[Any, Callable[[Interval], Interval]] = {
+    sp.sin: iv.sin,
+    sp.cos: iv.cos,
+    sp.tan: iv.tan,
+    sp.exp: iv.exp,
+    sp.Abs: abs,
+}
+
+
+class EmptyDomainError(ValueError):
+    """
+    no point of the box is in the domain of the expression
+    """
+
+
+def interval(lo: float, hi: float) -> Interval:
+    return iv.mpf([lo, hi])
+
+
+def bounds(x: Interval) -> Bounds:
+    """
+    the smallest float interval that contains x
+    """
+    a, b = x._mpi_
+    return to_float(a, rnd=round_floor), to_float(b, rnd=round_ceiling)
+
+
+def _nonnegative(x: Interval, restrict: bool) -> Interval:
+    """
+    x for a function defined on [0, inf); restricted to [0, inf) if restrict,
+    otherwise mpmath raises on the negative part
+    """
+    if not restrict:
+        return x
+    if x.b < 0:
+        raise EmptyDomainError()
+    if x.a < 0:
+        return iv.mpf([0, x.b])
+    return x
+
+
+def _constant(expr: sp.Expr) -> Interval:
+    if expr == sp.pi:
+        return iv.pi
+    if expr == sp.E:
+        return iv.e
+    if expr.is_Rational or expr.is_Float:
+        # exact as a fraction, the division rounds outward
+        c = sp.Rational(expr)
+        return iv.mpf(c.p) / c.q
+    raise ValueError(f"{expr} is not supported in interval arithmetic")
+
+
+def _compile(expr: sp.Expr, index: Dict[sp.Symbol, int], restrict: bool) -> IntervalFn:
+    if expr.is_Symbol:
+        i = index[expr]
+        return lambda x: x[i]
+    if expr.is_Atom:
+        c = _constant(expr)
+        return lambda x: c
+    args = [_compile(arg, index, restrict) for arg in expr.args]
+    if expr.is_Add:
+
+        def add(x: Sequence[Interval]) -> Interval:
+            res = args[0](x)
+            for arg in args[1:]:
+                res = res + arg(x)
+            return res
+
+        return add
+    if expr.is_Mul:
+
+        def mul(x: Sequence[Interval]) -> Interval:
+            res = args[0](x)
+            for arg in args[1:]:
+                res = res * arg(x)
+            return res
+
+        return mul
+    if expr.is_Pow:
+        base, power = args
+        exponent = expr.args[1]
+        if exponent.is_Integer:
+            # x**2 is not x*x: [-1, 2]**2 is [0, 4]
+            n = int(exponent)
+            return lambda x: base(x) ** n
+        if exponent == sp.Rational(1, 2):
+            return lambda x: iv.sqrt(_nonnegative(base(x), restrict))
+        return lambda x: iv.exp(power(x) * iv.log(_nonnegative(base(x), restrict)))
+    if expr.func == sp.log and len(args) == 1:
+        arg = args[0]
+        return lambda x: iv.log(_nonnegative(arg(x), restrict))
+    fn = _FUNCTIONS.get(expr.func)
+    if fn is not None and len(args) == 1:
+        arg = args[0]
+        return lambda x: fn(arg(x))
+    raise ValueError(f"{expr.func.__name__} is not supported in interval arithmetic")
+
+
+def compile_interval(
+    symbols: Sequence[sp.Symbol], exprs: Sequence[sp.Expr], restrict: bool = False
+) -> IntervalVectorFn:
+    """
+    compiles exprs into one function of intervals of the symbols (in order)
+    that encloses the range of every expr over the box.
+    points of the box outside of the domain of an expr, e.g. log of a negative,
+    raise ArithmeticError or ValueError. with restrict they are left out
+    instead, and EmptyDomainError is raised only if no point is left
+    @raises ValueError if an expr can't be evaluated in interval arithmetic
+    """
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    fns = [_compile(sp.sympify(expr), index, restrict) for expr in exprs]
+    return lambda x: [fn(x) for fn in fns]
@@ -1,9 +1,13 @@
-from typing import Callable, Tuple
+import math
+from typing import Callable
 
+import numpy as np
 import sympy as sp  # type: ignore
 
 from config import PRECISION
 from logger import GlobalLogger
+from utils.numeric import FloatArray, lambdify_numpy
+from utils.perf import Evaluation, count
 
 SAMPLES_COUNT = 1000
 
@@ -19,11 +23,6 @@ def df(f: Callable[[Number], Number], x: Number) -> sp.Float:
     return (f(x + H) - f(x - H)) / (2 * H)
 
 
-def d2f(f: Callable[[Number], Number], x: Number) -> sp.Float:
-    H = sp.Float("0.0001")
-    return (f(x + H) - 2 * f(x) + f(x - H)) / H**2
-
-
 def keeps_sign(f: Callable[[Number], Number], l: Number, r: Number) -> bool:
     d = (r - l) / SAMPLES_COUNT
     x = l
@@ -82,23 +81,107 @@ def check_single_root(f: Callable[[Number], Number], l: Number, r: Number) -> bo
     return True
 
 
-def get_phi_with_lambda(
-    f: sp.Lambda, l: Number, r: Number
-) -> Tuple[sp.Lambda, sp.Lambda]:
+# ----- phi construction -----
+
+
+class PhiConstruction:
     """
-    returns phi and phi' for a single variable function with lambda method
+    phi for x = phi(x), its derivative and the contraction factor
+    q = max |phi'| over the interval
     """
-    x = sp.symbols("x")
-    f_expr = f(x)
 
-    _df = sp.diff(f_expr, x)
-    m = 1 / max_in_interval(lambda val: abs(_df.evalf(PRECISION).subs(x, val)), l, r)
-    logger.debug("m", m)
+    phi: sp.Lambda
+    dphi: sp.Lambda
+    q: float
+    # "relaxation" (x + m * f(x)) or "newton" (x - f(x) / f'(x))
+    form: str
+
+    def __init__(self, phi: sp.Lambda, dphi: sp.Lambda, q: float, form: str):
+        self.phi = phi
+        self.dphi = dphi
+        self.q = q
+        self.form = form
 
-    if _df.subs(x, (l + r) / 2) > 0:
-        m *= -1
 
-    phi = sp.Lambda(x, x + m * f_expr)
-    dphi = sp.Lambda(x, 1 + m * _df)
+def _grid(l: Number, r: Number) -> FloatArray:
+    return np.linspace(float(l), float(r), SAMPLES_COUNT + 1)
 
-    return phi, dphi
+
+def contraction_factor(dphi: sp.Lambda, l: Number, r: Number) -> float:
+    """
+    max |phi'| on a grid over [l, r], inf if phi' is undefined somewhere
+    """
+    grid = _grid(l, r)
+    count(Evaluation.DERIVATIVE, grid.size)
+    values = np.abs(lambdify_numpy(dphi)(grid))
+    if not np.isfinite(values).all():
+        return math.inf
+    return float(values.max())
+
+
+def build_phi(f: sp.Lambda, l: Number, r: Number) -> PhiConstruction:
+    """
+    phi(x) = x + m * f(x) with the m that minimizes max |phi'| = max |1 + m * f'|:
+    for f' of constant sign with values in [a, b] it is m = -2 / (a + b), which
+    gives q = |b - a| / |b + a|. if q >= 1 (f' changes sign or vanishes), the
+    newton form is tried too and the one with the smaller q is returned
+    """
+    x = sp.symbols("x")
+    f_expr = f(x)
+    df_expr = sp.diff(f_expr, x)
+
+    grid = _grid(l, r)
+    count(Evaluation.DERIVATIVE, grid.size)
+    dfs = lambdify_numpy(sp.Lambda(x, df_expr))(grid)
+    finite = dfs[np.isfinite(dfs)]
+    if finite.size == dfs.size and ((finite > 0).all() or (finite < 0).all()):
+        lo, hi = float(finite.min()), float(finite.max())
+        m = -2 / (lo + hi)
+        q = abs(hi - lo) / abs(hi + lo)
+    else:
+        # no m makes a contraction; keep the sign rule for the fallback comparison
+        scale = float(np.abs(finite).max()) if finite.size else 1.0
+        mid = float(finite[finite.size // 2]) if finite.size else 1.0
+        m = (-1 if mid > 0 else 1) / (scale or 1.0)
+        q = math.inf if finite.size < dfs.size else float(np.abs(1 + m * finite).max())
+    logger.debug("relaxation m", m, "q", q)
+    m_float = sp.Float(m, PRECISION)
+    best = PhiConstruction(
+        sp.Lambda(x, x + m_float * f_expr),
+        sp.Lambda(x, 1 + m_float * df_expr),
+        q,
+        "relaxation",
+    )
+    if q < 1:
+        return best
+
+    newton_expr = x - f_expr / df_expr
+    newton_dphi = sp.Lambda(x, sp.diff(newton_expr, x))
+    newton_q = contraction_factor(newton_dphi, l, r)
+    logger.debug("newton form q", newton_q)
+    if newton_q < best.q:
+        best = PhiConstruction(
+            sp.Lambda(x, newton_expr), newton_dphi, newton_q, "newton"
+        )
+    if best.q >= 1:
+        logger.debug("no contracting phi found on", [float(l), float(r)], "q", best.q)
+    return best
+
+
+def fixed_point_iteration_bound(
+    q: float, x0: Number, x1: Number, precision: Number
+) -> int | None:
+    """
+    a-priori bound n >= ln(precision * (1 - q) / |x1 - x0|) / ln(q) on the number
+    of iterations, where x1 = phi(x0)
+    @returns None if phi is not a contraction
+    """
+    if not q < 1:
+        return None
+    step = abs(float(x1) - float(x0))
+    if step == 0:
+        return 0
+    if q == 0:
+        return 1
+    bound = math.log(float(precision) * (1 - q) / step) / math.log(q)
+    return max(math.ceil(bound), 1)
@@ -0,0 +1,107 @@
+from typing import Any, Callable, Sequence, cast
+
+import numpy as np
+import numpy.typing as npt
+import sympy as sp  # type: ignore
+
+from logger import GlobalLogger
+
+type FloatArray = npt.NDArray[np.float64]
+type ComplexArray = npt.NDArray[np.complex128]
+type NumpyFn = Callable[..., FloatArray]
+
+# imaginary parts below this are treated as rounding noise
+IMAG_TOLERANCE = 1e-12
+
+
+logger = GlobalLogger()
+
+
+def _to_float_array(res: Any, shape: tuple[int, ...]) -> FloatArray:
+    arr = np.asarray(res)
+    if np.iscomplexobj(arr):
+        arr = np.where(np.abs(arr.imag) <= IMAG_TOLERANCE, arr.real, np.nan)
+    return np.array(np.broadcast_to(arr.astype(np.float64), shape))
+
+
+def _lambdify(f: sp.Lambda) -> Callable[..., Any]:
+    """
+    sp.lambdify into numpy. only expressions go to the disk cache, never the
+    generated code
+    """
+    return cast(Callable[..., Any], sp.lambdify(f.variables, f.expr, "numpy"))
+
+
+def lambdify_numpy(f: sp.Lambda) -> NumpyFn:
+    """
+    compiles a sympy lambda into a vectorized numpy function.
+    points outside of the domain evaluate to nan instead of raising
+    """
+    fn = _lambdify(f)
+
+    def evaluate_pointwise(*args: FloatArray) -> FloatArray:
+        shape = np.broadcast(*args).shape
+        flat = [np.broadcast_to(a, shape).ravel() for a in args]
+        out = np.empty(flat[0].size if flat else 1, dtype=np.float64)
+        for i in range(out.size):
+            try:
+                val = complex(f(*[a[i] for a in flat]))
+                out[i] = val.real if abs(val.imag) <= IMAG_TOLERANCE else np.nan
+            except (TypeError, ValueError, ZeroDivisionError):
+                out[i] = np.nan
+        return out.reshape(shape)
+
+    def evaluate(*args: FloatArray) -> FloatArray:
+        shape = np.broadcast(*args).shape
+        try:
+            with np.errstate(all="ignore"):
+                return _to_float_array(fn(*args), shape)
+        except (TypeError, ValueError, ZeroDivisionError, AttributeError) as e:
+            logger.debug("vectorized evaluation of", f.expr, "failed:", e)
+            return evaluate_pointwise(*args)
+
+    return evaluate
+
+
+def lambdify_vector(
+    symbols: Sequence[sp.Symbol], exprs: Sequence[sp.Expr]
+) -> Callable[[FloatArray], FloatArray]:
+    """
+    compiles exprs into one numpy function of a point (values of the symbols in
+    order), e.g. for residuals and flattened jacobians.
+    components that are undefined at the point evaluate to nan
+    """
+    fn = _lambdify(sp.Lambda(tuple(symbols), sp.Tuple(*exprs)))
+    shape = (len(exprs),)
+
+    def evaluate(x: FloatArray) -> FloatArray:
+        try:
+            with np.errstate(all="ignore"):
+                res = fn(*x)
+        except (TypeError, ValueError, ZeroDivisionError, OverflowError) as e:
+            logger.debug("evaluation of", exprs, "failed:", e)
+            return np.full(shape, np.nan)
+        return _to_float_array(np.array(res, dtype=np.complex128), shape)
+
+    return evaluate
+
+
+def lambdify_batch(
+    symbols: Sequence[sp.Symbol], exprs: Sequence[sp.Expr]
+) -> Callable[[ComplexArray], ComplexArray]:
+    """
+    compiles exprs into one numpy function of many complex points at once:
+    (points, len(symbols)) -> (points, len(exprs)). meant for polynomials and
+    other expressions that numpy can evaluate over the complex numbers
+    """
+    fn = _lambdify(sp.Lambda(tuple(symbols), sp.Tuple(*exprs)))
+
+    def evaluate(x: ComplexArray) -> ComplexArray:
+        out = np.empty((x.shape[0], len(exprs)), dtype=np.complex128)
+        with np.errstate(all="ignore"):
+            for i, component in enumerate(fn(*x.T)):
+                # constant components come back as scalars
+                out[:, i] = component
+        return out
+
+    return evaluate
@@ -0,0 +1,479 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import sympy as sp  # type: ignore
+from scipy import special  # type: ignore
+
+from utils.numeric import FloatArray, NumpyFn
+
+# inputs are rejected before any work is done on them if they are longer than this
+MAX_EXPRESSION_LENGTH = 2000
+# nesting of parentheses, calls, unary minuses and powers
+MAX_DEPTH = 64
+MAX_NUMBER_LENGTH = 100
+# sympy computes constant subexpressions exactly, e.g. 10**10**10 or
+# gamma(10**6); exact constants larger than this many bits are rejected
+MAX_CONSTANT_BITS = 4096
+# gamma(n) is (n - 1)!, 500! has ~3700 bits
+MAX_GAMMA_ARGUMENT = 500
+
+
+def _bits(value: sp.Rational) -> int:
+    return max(int(value.p).bit_length(), int(value.q).bit_length())
+
+
+def _check_constant(expr: sp.Expr) -> sp.Expr:
+    if expr.is_Rational and _bits(expr) > MAX_CONSTANT_BITS:
+        raise ValueError("Constant is too large")
+    return expr
+
+
+def _pow(base: sp.Expr, exponent: sp.Expr) -> sp.Expr:
+    # sympy evaluates rational ** integer exactly
+    if base.is_Rational and exponent.is_Integer:
+        if _bits(base) * abs(int(exponent)) > MAX_CONSTANT_BITS:
+            raise ValueError("Constant power is too large")
+    return sp.Pow(base, exponent)
+
+
+def _check_gamma_argument(a: sp.Expr) -> sp.Expr:
+    if a.is_Rational and abs(a) > MAX_GAMMA_ARGUMENT:
+        raise ValueError("Gamma argument is too large")
+    return a
+
+
+# name: sympy builder
+FUNCTIONS: Dict[str, Callable[[sp.Expr], sp.Expr]] = {
+    "sin": sp.sin,
+    "cos": sp.cos,
+    "tan": sp.tan,
+    "asin": sp.asin,
+    "acos": sp.acos,
+    "atan": sp.atan,
+    "sinh": sp.sinh,
+    "cosh": sp.cosh,
+    "tanh": sp.tanh,
+    "asinh": sp.asinh,
+    "acosh": sp.acosh,
+    "atanh": sp.atanh,
+    "exp": sp.exp,
+    "exp2": lambda a: _pow(sp.Integer(2), a),
+    "expm1": lambda a: sp.exp(a) - 1,
+    "log": sp.log,
+    "log2": lambda a: sp.log(a, 2),
+    "log10": lambda a: sp.log(a, 10),
+    "log1p": lambda a: sp.log(1 + a),
+    "sqrt": sp.sqrt,
+    "cbrt": sp.cbrt,
+    "fabs": sp.Abs,
+    "abs": sp.Abs,
+    "floor": sp.floor,
+    "ceil": sp.ceiling,
+    "gamma": lambda a: sp.gamma(_check_gamma_argument(a)),
+    "erf": sp.erf,
+    "erfc": sp.erfc,
+}
+
+# name: numpy builder, for the same function on float64. works on whole arrays
+# and gives nan outside of the domain
+NUMPY_FUNCTIONS: Dict[str, Callable[[FloatArray], FloatArray]] = {
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "asin": np.arcsin,
+    "acos": np.arccos,
+    "atan": np.arctan,
+    "sinh": np.sinh,
+    "cosh": np.cosh,
+    "tanh": np.tanh,
+    "asinh": np.arcsinh,
+    "acosh": np.arccosh,
+    "atanh": np.arctanh,
+    "exp": np.exp,
+    "exp2": np.exp2,
+    "expm1": np.expm1,
+    "log": np.log,
+    "log2": np.log2,
+    "log10": np.log10,
+    "log1p": np.log1p,
+    "sqrt": np.sqrt,
+    # sympy's cbrt is the principal root, complex for negative arguments
+    "cbrt": lambda a: np.power(a, 1 / 3),
+    "fabs": np.abs,
+    "abs": np.abs,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "gamma": special.gamma,
+    "erf": special.erf,
+    "erfc": special.erfc,
+}
+
+CONSTANTS: Dict[str, sp.Expr] = {
+    "pi": sp.pi,
+    "e": sp.E,
+    "tau": 2 * sp.pi,
+}
+
+# numbers accept a decimal comma, like the rest of the input fields
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<number>(?:\d+(?:[.,]\d*)?|[.,]\d+)(?:[eE][-+]?\d+)?)"
+    r"|(?P<name>[A-Za-z_][A-Za-z_0-9]*)"
+    r"|(?P<op>\*\*|[-+*/^()])"
+    r")"
+)
+
+# a compiled node: the values of the variables, in order, to its values
+type Evaluator = Callable[[Sequence[FloatArray]], FloatArray]
+
+
+class Node(ABC):
+    """
+    expression tree node
+    """
+
+    @abstractmethod
+    def to_sympy(self) -> sp.Expr: ...
+
+    @abstractmethod
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        """
+        compiles the node into float64 numpy closures. there are no exact
+        constants to bound here, the cost is one closure per node and one numpy
+        operation per node and evaluation, both bounded by the parser's limits
+        """
+
+
+class Number(Node):
+    text: str
+
+    def __init__(self, text: str):
+        self.text = text.replace(",", ".")
+
+    def to_sympy(self) -> sp.Expr:
+        if self.text.isdigit():
+            return sp.Integer(self.text)
+        return sp.Float(self.text)
+
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        value = np.array(float(self.text))
+        return lambda xs: value
+
+
+class Variable(Node):
+    name: str
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def to_sympy(self) -> sp.Expr:
+        return sp.Symbol(self.name)
+
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        index = list(variables).index(self.name)
+        return lambda xs: xs[index]
+
+
+class Constant(Node):
+    name: str
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def to_sympy(self) -> sp.Expr:
+        return CONSTANTS[self.name]
+
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        value = np.array(float(CONSTANTS[self.name]))
+        return lambda xs: value
+
+
+class Negation(Node):
+    operand: Node
+
+    def __init__(self, operand: Node):
+        self.operand = operand
+
+    def to_sympy(self) -> sp.Expr:
+        return -self.operand.to_sympy()
+
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        operand = self.operand.to_numpy(variables)
+        return lambda xs: -operand(xs)
+
+
+class Sum(Node):
+    """
+    flat chain of + and -, so that long sums don't nest
+    """
+
+    terms: List[Tuple[str, Node]]
+
+    def __init__(self, terms: List[Tuple[str, Node]]):
+        self.terms = terms
+
+    def to_sympy(self) -> sp.Expr:
+        return sp.Add(
+            *[t.to_sympy() if op == "+" else -t.to_sympy() for op, t in self.terms]
+        )
+
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        terms = [(op, t.to_numpy(variables)) for op, t in self.terms]
+
+        def evaluate(xs: Sequence[FloatArray]) -> FloatArray:
+            total = terms[0][1](xs)
+            for op, term in terms[1:]:
+                total = total + term(xs) if op == "+" else total - term(xs)
+            return total
+
+        return evaluate
+
+
+class Product(Node):
+    """
+    flat chain of * and /, evaluated left to right
+    """
+
+    factors: List[Tuple[str, Node]]
+
+    def __init__(self, factors: List[Tuple[str, Node]]):
+        self.factors = factors
+
+    def to_sympy(self) -> sp.Expr:
+        return _check_constant(
+            sp.Mul(
+                *[
+                    f.to_sympy() if op == "*" else 1 / f.to_sympy()
+                    for op, f in self.factors
+                ]
+            )
+        )
+
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        factors = [(op, f.to_numpy(variables)) for op, f in self.factors]
+
+        def evaluate(xs: Sequence[FloatArray]) -> FloatArray:
+            product = factors[0][1](xs)
+            for op, factor in factors[1:]:
+                product = product * factor(xs) if op == "*" else product / factor(xs)
+            return product
+
+        return evaluate
+
+
+class Power(Node):
+    base: Node
+    exponent: Node
+
+    def __init__(self, base: Node, exponent: Node):
+        self.base = base
+        self.exponent = exponent
+
+    def to_sympy(self) -> sp.Expr:
+        return _pow(self.base.to_sympy(), self.exponent.to_sympy())
+
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        base = self.base.to_numpy(variables)
+        exponent = self.exponent.to_numpy(variables)
+        # negative ** fractional is nan on floats, as sympy's complex result
+        # is for lambdify_numpy
+        return lambda xs: np.power(base(xs), exponent(xs))
+
+
+class Call(Node):
+    function: str
+    argument: Node
+
+    def __init__(self, function: str, argument: Node):
+        self.function = function
+        self.argument = argument
+
+    def to_sympy(self) -> sp.Expr:
+        return FUNCTIONS[self.function](self.argument.to_sympy())
+
+    def to_numpy(self, variables: Sequence[str]) -> Evaluator:
+        function = NUMPY_FUNCTIONS[self.function]
+        argument = self.argument.to_numpy(variables)
+        return lambda xs: function(argument(xs))
+
+
+def tokenize(s: str) -> List[Tuple[str, str]]:
+    """
+    @returns [(kind, text)] with kind in "number", "name", "op"
+    """
+    tokens = []
+    pos = 0
+    s = s.rstrip()
+    while pos < len(s):
+        match = _TOKEN_RE.match(s, pos)
+        if match is None or match.end() == pos:
+            raise ValueError("Invalid characters in the equation")
+        kind = match.lastgroup
+        if kind is None:
+            raise ValueError("Invalid characters in the equation")
+        text = match.group(kind)
+        if kind == "number" and len(text) > MAX_NUMBER_LENGTH:
+            raise ValueError("Number is too long")
+        tokens.append((kind, text))
+        pos = match.end()
+    return tokens
+
+
+class Parser:
+    """
+    recursive descent parser of
+
+    expr    := product (("+" | "-") product)*
+    product := unary (("*" | "/") unary)*
+    unary   := ("+" | "-") unary | power
+    power   := atom (("**" | "^") unary)?
+    atom    := number | constant | variable | function "(" expr ")" | "(" expr ")"
+    """
+
+    tokens: List[Tuple[str, str]]
+    variables: Sequence[str]
+    pos: int = 0
+    depth: int = 0
+
+    def __init__(self, tokens: List[Tuple[str, str]], variables: Sequence[str]):
+        self.tokens = tokens
+        self.variables = variables
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.pos][1] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise ValueError("Invalid equation format")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _expect(self, text: str) -> None:
+        if self._next()[1] != text:
+            raise ValueError("Invalid equation format")
+
+    def _enter(self) -> None:
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ValueError("Equation is nested too deeply")
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise ValueError("Equation is empty")
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise ValueError("Invalid equation format")
+        return node
+
+    def expr(self) -> Node:
+        terms = [("+", self.product())]
+        while self._peek() in ("+", "-"):
+            op = self._next()[1]
+            terms.append((op, self.product()))
+        return terms[0][1] if len(terms) == 1 else Sum(terms)
+
+    def product(self) -> Node:
+        factors = [("*", self.unary())]
+        while self._peek() in ("*", "/"):
+            op = self._next()[1]
+            factors.append((op, self.unary()))
+        return factors[0][1] if len(factors) == 1 else Product(factors)
+
+    def unary(self) -> Node:
+        if self._peek() in ("+", "-"):
+            op = self._next()[1]
+            self._enter()
+            operand = self.unary()
+            self.depth -= 1
+            return operand if op == "+" else Negation(operand)
+        return self.power()
+
+    def power(self) -> Node:
+        base = self.atom()
+        if self._peek() in ("**", "^"):
+            self._next()
+            self._enter()
+            exponent = self.unary()
+            self.depth -= 1
+            return Power(base, exponent)
+        return base
+
+    def atom(self) -> Node:
+        kind, text = self._next()
+        if kind == "number":
+            return Number(text)
+        if kind == "name":
+            if self._peek() == "(":
+                if text not in FUNCTIONS:
+                    raise ValueError(f"Unknown function {text}")
+                self._next()
+                self._enter()
+                argument = self.expr()
+                self.depth -= 1
+                self._expect(")")
+                return Call(text, argument)
+            if text in self.variables:
+                return Variable(text)
+            if text in CONSTANTS:
+                return Constant(text)
+            allowed = ", ".join(repr(v) for v in self.variables)
+            raise ValueError(
+                f"Invalid variable(s) {{{text}}} in the equation. "
+                f"Only {allowed} {'is' if len(self.variables) == 1 else 'are'} allowed."
+            )
+        if text == "(":
+            self._enter()
+            node = self.expr()
+            self.depth -= 1
+            self._expect(")")
+            return node
+        raise ValueError("Invalid equation format")
+
+
+class ParsedExpression:
+    """
+    parse tree of an expression; the sympy expression and the numpy evaluator
+    are only built when asked for
+    """
+
+    tree: Node
+    variables: Tuple[str, ...]
+    _sympy: sp.Expr | None = None
+    _numeric: NumpyFn | None = None
+
+    def __init__(self, tree: Node, variables: Tuple[str, ...]):
+        self.tree = tree
+        self.variables = variables
+
+    def sympy(self) -> sp.Expr:
+        if self._sympy is None:
+            self._sympy = self.tree.to_sympy()
+        return self._sympy
+
+    def numeric(self) -> NumpyFn:
+        """
+        vectorized float64 evaluator of the variables in order, compiled from
+        the tree without going through sympy. like lambdify_numpy, points
+        outside of the domain evaluate to nan instead of raising
+        """
+        if self._numeric is None:
+            fn = self.tree.to_numpy(self.variables)
+
+            def evaluate(*args: FloatArray) -> FloatArray:
+                shape = np.broadcast(*args).shape
+                xs = [np.asarray(a, dtype=np.float64) for a in args]
+                with np.errstate(all="ignore"):
+                    return np.array(np.broadcast_to(fn(xs), shape), dtype=np.float64)
+
+            self._numeric = evaluate
+        return self._numeric
+
+
+def parse_expression(s: str, variables: Sequence[str] = ("x",)) -> ParsedExpression:
+    if len(s) > MAX_EXPRESSION_LENGTH:
+        raise ValueError("Equation is too long")
+    tokens = tokenize(s)
+    return ParsedExpression(Parser(tokens, variables).parse(), tuple(variables))
@@ -0,0 +1,106 @@
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator
+
+
+class Stage(Enum):
+    PARSE = "parse"
+    DIFFERENTIATE = "differentiate"
+    PHI = "phi construction"
+    CONVERGENCE_CHECK = "convergence check"
+    ITERATE = "iterate"
+
+
+class Evaluation(Enum):
+    F = "f"
+    # f', f'', phi' (including the finite difference ones)
+    DERIVATIVE = "derivative"
+    PHI = "phi"
+
+
+class PerfCounters:
+    """
+    evaluation counts and per stage wall times of a solve. counting only
+    happens while the counters are activated on the current thread
+    """
+
+    evaluations: Dict[Evaluation, int]
+    # seconds
+    stage_times: Dict[Stage, float]
+    peak_iterations: int = 0
+
+    def __init__(self) -> None:
+        self.evaluations = {evaluation: 0 for evaluation in Evaluation}
+        self.stage_times = {stage: 0.0 for stage in Stage}
+
+    def count(self, evaluation: Evaluation, n: int = 1) -> None:
+        self.evaluations[evaluation] += n
+
+    def record_iteration(self, iteration: int) -> None:
+        if iteration > self.peak_iterations:
+            self.peak_iterations = iteration
+
+    @contextmanager
+    def stage(self, stage: Stage) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[stage] += time.perf_counter() - start
+
+    @contextmanager
+    def activate(self) -> Iterator["PerfCounters"]:
+        previous = active()
+        _local.counters = self
+        try:
+            yield self
+        finally:
+            _local.counters = previous
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "evaluations": {e.value: n for e, n in self.evaluations.items()},
+            "stage_times": {s.value: t for s, t in self.stage_times.items()},
+            "peak_iterations": self.peak_iterations,
+        }
+
+
+_local = threading.local()
+
+
+def active() -> PerfCounters | None:
+    return getattr(_local, "counters", None)
+
+
+def count(evaluation: Evaluation, n: int = 1) -> None:
+    counters = active()
+    if counters is not None:
+        counters.count(evaluation, n)
+
+
+@contextmanager
+def stage(stage: Stage) -> Iterator[None]:
+    counters = active()
+    if counters is None:
+        yield
+        return
+    with counters.stage(stage):
+        yield
+
+
+def counted[F: Callable[..., Any]](fn: F, evaluation: Evaluation) -> F:
+    """
+    wraps fn to count its calls in the active counters; without active counters
+    fn is returned as is, so solves that aren't measured pay nothing
+    """
+    counters = active()
+    if counters is None:
+        return fn
+
+    def wrapper(*args: Any) -> Any:
+        counters.count(evaluation)
+        return fn(*args)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,307 @@
+import math
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable, Iterator, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from utils.numeric import FloatArray, NumpyFn
+
+INITIAL_SAMPLES = 400
+MAX_SAMPLES = 8000
+MAX_REFINE_DEPTH = 8
+# turning angle (radians, in view-normalized coordinates) that triggers refinement
+MAX_TURN_ANGLE = 0.1
+# a sign-changing jump bigger than this many view heights is treated as a pole
+POLE_JUMP = 2.0
+
+
+def _view_scale(ys: FloatArray) -> float:
+    """
+    y extent of the "interesting" part of the plot, ignoring blow-ups near poles
+    """
+    finite = ys[np.isfinite(ys)]
+    if finite.size < 2:
+        return 1.0
+    lo, hi = np.percentile(finite, [5, 95])
+    scale = float(hi - lo)
+    return scale if scale > 0 else max(float(np.abs(finite).max()), 1.0)
+
+
+def _segments_to_refine(xs: FloatArray, ys: FloatArray) -> npt.NDArray[np.bool_]:
+    """
+    mask over segments [xs[i], xs[i+1]] that need a midpoint
+    """
+    finite = np.isfinite(ys)
+    # domain boundaries: one end defined, the other one is not
+    mark: npt.NDArray[np.bool_] = finite[:-1] != finite[1:]
+
+    x_scale = float(xs[-1] - xs[0]) or 1.0
+    y_scale = _view_scale(ys)
+    dx = np.diff(xs) / x_scale
+    dy = np.diff(ys) / y_scale
+    with np.errstate(invalid="ignore"):
+        angles = np.arctan2(dy, dx)
+        turn = np.abs(np.diff(angles))
+    bent = np.nan_to_num(turn, nan=0.0) > MAX_TURN_ANGLE
+    # a bend at a point refines both of its segments
+    mark[:-1] |= bent
+    mark[1:] |= bent
+    # poles: huge jumps keep getting refined until they are one segment wide
+    mark |= np.nan_to_num(np.abs(dy), nan=0.0) > POLE_JUMP
+    return mark
+
+
+def _break_poles(xs: FloatArray, ys: FloatArray) -> Tuple[FloatArray, FloatArray]:
+    """
+    inserts nan between the sides of a pole so that it is not drawn as a vertical line
+    """
+    y_scale = _view_scale(ys)
+    with np.errstate(invalid="ignore"):
+        jump = (np.abs(np.diff(ys)) > POLE_JUMP * y_scale) & (
+            np.sign(ys[:-1]) != np.sign(ys[1:])
+        )
+    idx = np.nonzero(jump)[0]
+    if idx.size == 0:
+        return xs, ys
+    mids = (xs[idx] + xs[idx + 1]) / 2
+    return np.insert(xs, idx + 1, mids), np.insert(ys, idx + 1, np.nan)
+
+
+def adaptive_sample(
+    fn: NumpyFn,
+    l: float,
+    r: float,
+    initial_samples: int = INITIAL_SAMPLES,
+    max_samples: int = MAX_SAMPLES,
+) -> Tuple[FloatArray, FloatArray]:
+    """
+    samples fn on [l, r], refining where the curve bends and around singularities
+    @returns (xs, ys)
+    """
+    xs = np.linspace(l, r, initial_samples)
+    ys = fn(xs)
+    for _ in range(MAX_REFINE_DEPTH):
+        mark = _segments_to_refine(xs, ys)
+        count = int(mark.sum())
+        if count == 0 or xs.size + count > max_samples:
+            break
+        idx = np.nonzero(mark)[0]
+        mids = (xs[idx] + xs[idx + 1]) / 2
+        xs = np.insert(xs, idx + 1, mids)
+        ys = np.insert(ys, idx + 1, fn(mids))
+    return _break_poles(xs, ys)
+
+
+# ----- tiled sampling -----
+
+# a view is covered by roughly this many tiles
+TILES_PER_VIEW = 8
+TILE_SAMPLES = 64
+TILE_MAX_SAMPLES = 1024
+TILE_CACHE_SIZE = 512
+
+type TileKey = Tuple[Hashable, int, int]
+
+
+class TileCache:
+    """
+    samples of functions over x tiles. tile widths are powers of two, so zooming
+    back to an already seen scale reuses every tile in view
+    """
+
+    tiles: OrderedDict[TileKey, Tuple[FloatArray, FloatArray]]
+    max_tiles: int
+    lock: Lock
+
+    def __init__(self, max_tiles: int = TILE_CACHE_SIZE) -> None:
+        self.tiles = OrderedDict()
+        self.max_tiles = max_tiles
+        self.lock = Lock()
+
+    def _get(self, key: TileKey) -> Tuple[FloatArray, FloatArray] | None:
+        with self.lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+            return tile
+
+    def _put(self, key: TileKey, tile: Tuple[FloatArray, FloatArray]) -> None:
+        with self.lock:
+            self.tiles[key] = tile
+            self.tiles.move_to_end(key)
+            while len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+
+    def has_view(self, fn_key: Hashable, l: float, r: float) -> bool:
+        return all(self._get(key) is not None for key, _, _ in _tiles(fn_key, l, r))
+
+    def sample(
+        self, fn_key: Hashable, fn: NumpyFn, l: float, r: float
+    ) -> Tuple[FloatArray, FloatArray]:
+        """
+        samples fn on [l, r], computing only the tiles that are not cached yet
+        @returns (xs, ys)
+        """
+        xs_parts: List[FloatArray] = []
+        ys_parts: List[FloatArray] = []
+        for key, tile_l, tile_r in _tiles(fn_key, l, r):
+            tile = self._get(key)
+            if tile is None:
+                tile = adaptive_sample(
+                    fn, tile_l, tile_r, TILE_SAMPLES, TILE_MAX_SAMPLES
+                )
+                self._put(key, tile)
+            # neighbouring tiles share their boundary point
+            skip = 1 if xs_parts else 0
+            xs_parts.append(tile[0][skip:])
+            ys_parts.append(tile[1][skip:])
+        return _break_poles(np.concatenate(xs_parts), np.concatenate(ys_parts))
+
+
+def _tiles(
+    fn_key: Hashable, l: float, r: float
+) -> Iterator[Tuple[TileKey, float, float]]:
+    level = math.ceil(math.log2(max(r - l, 1e-12) / TILES_PER_VIEW))
+    width = 2.0**level
+    for i in range(math.floor(l / width), math.floor(r / width) + 1):
+        yield (fn_key, level, i), i * width, (i + 1) * width
+
+
+# ----- zero level set grids -----
+
+CONTOUR_COARSE_SAMPLES = 49
+# every level doubles the resolution around the zero level set
+CONTOUR_REFINE_LEVELS = 3
+CONTOUR_CACHE_SIZE = 16
+
+type Viewport = Tuple[float, float, float, float]
+type ContourGrid = Tuple[FloatArray, FloatArray, List[FloatArray]]
+
+DEFAULT_VIEWPORT: Viewport = (-10.0, 10.0, -10.0, 10.0)
+MIN_VIEWPORT_HALF = 2.0
+VIEWPORT_MARGIN = 1.5
+
+
+def _upsample(z: FloatArray) -> FloatArray:
+    """
+    bilinear 2x upsampling, (n, m) -> (2n - 1, 2m - 1)
+    """
+    n, m = z.shape
+    out = np.empty((2 * n - 1, 2 * m - 1), dtype=np.float64)
+    out[::2, ::2] = z
+    out[1::2, ::2] = (z[:-1] + z[1:]) / 2
+    out[::2, 1::2] = (z[:, :-1] + z[:, 1:]) / 2
+    out[1::2, 1::2] = (z[:-1, :-1] + z[1:, :-1] + z[:-1, 1:] + z[1:, 1:]) / 4
+    return out
+
+
+def _zero_cells(z: FloatArray) -> npt.NDArray[np.bool_]:
+    """
+    mask over grid cells the zero level set (or a domain boundary) may pass through,
+    grown by one cell so that the refined curve doesn't run out of the evaluated area
+    """
+    corners = [z[:-1, :-1], z[1:, :-1], z[:-1, 1:], z[1:, 1:]]
+    with np.errstate(invalid="ignore"):
+        positive = np.sum([c > 0 for c in corners], axis=0)
+        finite = np.sum([np.isfinite(c) for c in corners], axis=0)
+    cells: npt.NDArray[np.bool_] = ((positive > 0) & (positive < finite)) | (
+        (finite > 0) & (finite < 4)
+    )
+    grown = cells.copy()
+    grown[1:] |= cells[:-1]
+    grown[:-1] |= cells[1:]
+    grown[:, 1:] |= grown[:, :-1].copy()
+    grown[:, :-1] |= grown[:, 1:].copy()
+    return grown
+
+
+def adaptive_zero_grid(
+    fn: NumpyFn,
+    viewport: Viewport,
+    coarse_samples: int = CONTOUR_COARSE_SAMPLES,
+    levels: int = CONTOUR_REFINE_LEVELS,
+) -> Tuple[FloatArray, FloatArray, FloatArray]:
+    """
+    evaluates fn(x, y) on a grid that is exact only near its zero level set;
+    everywhere else the values are interpolated from coarser levels, which keeps
+    their sign, so a 0-level contour of the result matches the fully evaluated one
+    @returns (xs, ys, Z) with Z[i, j] = fn(xs[j], ys[i])
+    """
+    x_l, x_r, y_l, y_r = viewport
+    n = coarse_samples
+    X, Y = np.meshgrid(np.linspace(x_l, x_r, n), np.linspace(y_l, y_r, n))
+    z = fn(X, Y)
+    exact = np.ones(z.shape, dtype=np.bool_)
+    for _ in range(levels):
+        cells = _zero_cells(z)
+        n = 2 * n - 1
+        X, Y = np.meshgrid(np.linspace(x_l, x_r, n), np.linspace(y_l, y_r, n))
+        z = _upsample(z)
+        was_exact = exact
+        exact = np.zeros(z.shape, dtype=np.bool_)
+        exact[::2, ::2] = was_exact
+        # fine points covered by the marked coarse cells
+        near = np.zeros(z.shape, dtype=np.bool_)
+        last = n - 2
+        for di in range(3):
+            for dj in range(3):
+                near[di : di + last : 2, dj : dj + last : 2] |= cells
+        need = near & ~exact
+        z[need] = fn(X[need], Y[need])
+        exact |= need
+    return X[0], Y[:, 0], z
+
+
+def viewport_around(points: List[Tuple[float, float]]) -> Viewport:
+    """
+    square viewport around the points of interest. its size is a power of two and its
+    center is snapped to a quarter of the size, so that close requests share a viewport
+    """
+    finite = [(x, y) for x, y in points if math.isfinite(x) and math.isfinite(y)]
+    if not finite:
+        return DEFAULT_VIEWPORT
+    xs, ys = [p[0] for p in finite], [p[1] for p in finite]
+    extent = max(max(xs) - min(xs), max(ys) - min(ys))
+    half = 2.0 ** math.ceil(
+        math.log2(max(extent / 2 * VIEWPORT_MARGIN, MIN_VIEWPORT_HALF))
+    )
+    step = half / 2
+    cx = round((max(xs) + min(xs)) / 2 / step) * step
+    cy = round((max(ys) + min(ys)) / 2 / step) * step
+    return (cx - half, cx + half, cy - half, cy + half)
+
+
+class ContourCache:
+    """
+    adaptive zero grids of equation systems, keyed on the system and the viewport
+    """
+
+    grids: OrderedDict[Tuple[Hashable, Viewport], ContourGrid]
+    max_grids: int
+
+    def __init__(self, max_grids: int = CONTOUR_CACHE_SIZE) -> None:
+        self.grids = OrderedDict()
+        self.max_grids = max_grids
+
+    def get(
+        self,
+        system_key: Hashable,
+        compile_fns: Callable[[], List[NumpyFn]],
+        viewport: Viewport,
+    ) -> ContourGrid:
+        """
+        compile_fns is only called on a cache miss
+        @returns (xs, ys, [Z for every fn])
+        """
+        key = (system_key, viewport)
+        grid = self.grids.get(key)
+        if grid is None:
+            zs = [adaptive_zero_grid(fn, viewport) for fn in compile_fns()]
+            grid = (zs[0][0], zs[0][1], [z for _, _, z in zs])
+            self.grids[key] = grid
+            while len(self.grids) > self.max_grids:
+                self.grids.popitem(last=False)
+        self.grids.move_to_end(key)
+        return grid
@@ -0,0 +1,138 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from utils.numeric import FloatArray
+
+INITIAL_CAPACITY = 1024
+
+
+class TraceRecorder:
+    """
+    columnar history of solver iterates (stored as float64). grows by doubling,
+    or, with max_size, keeps only the last max_size iterates in a ring buffer
+    """
+
+    x_names: List[str]
+    y_names: List[str]
+    max_size: int | None
+    record_residuals: bool
+
+    iterations: npt.NDArray[np.int64]
+    xs: FloatArray
+    ys: FloatArray
+    steps: FloatArray
+    errors: FloatArray
+    # rows currently stored
+    size: int = 0
+    # rows ever recorded, including the ones overwritten in the ring buffer
+    total: int = 0
+
+    def __init__(
+        self,
+        x_names: List[str],
+        y_names: List[str],
+        max_size: int | None = None,
+        record_residuals: bool = True,
+    ) -> None:
+        if max_size is not None and max_size <= 0:
+            raise ValueError("trace max size must be positive")
+        self.x_names = x_names
+        self.y_names = y_names
+        self.max_size = max_size
+        self.record_residuals = record_residuals
+        capacity = INITIAL_CAPACITY if max_size is None else max_size
+        self.iterations = np.zeros(capacity, dtype=np.int64)
+        self.xs = np.full((capacity, len(x_names)), np.nan)
+        self.ys = np.full((capacity, len(y_names)), np.nan)
+        self.steps = np.full(capacity, np.nan)
+        self.errors = np.full(capacity, np.nan)
+
+    def _grow(self) -> None:
+        capacity = 2 * self.iterations.size
+        self.iterations = np.resize(self.iterations, capacity)
+        self.steps = np.resize(self.steps, capacity)
+        self.errors = np.resize(self.errors, capacity)
+        self.xs = np.resize(self.xs, (capacity, len(self.x_names)))
+        self.ys = np.resize(self.ys, (capacity, len(self.y_names)))
+
+    def _next_row(self) -> int:
+        if self.max_size is not None and self.size == self.max_size:
+            row = self.total % self.max_size
+        else:
+            if self.size == self.iterations.size:
+                self._grow()
+            row = self.size
+            self.size += 1
+        self.total += 1
+        return row
+
+    def add(
+        self,
+        iteration: int,
+        xs: Sequence[Any],
+        ys: Sequence[Any] | None,
+        step: Any,
+        error: Any,
+    ) -> None:
+        row = self._next_row()
+        self.iterations[row] = iteration
+        self.xs[row] = [float(x) for x in xs]
+        if ys is not None:
+            self.ys[row] = [float(y) for y in ys]
+        else:
+            self.ys[row] = np.nan
+        self.steps[row] = float(step)
+        self.errors[row] = float(error)
+
+    def _ordered(self, arr: npt.NDArray[np.generic]) -> npt.NDArray[np.generic]:
+        arr = arr[: self.size]
+        if self.max_size is not None and self.total > self.max_size:
+            # oldest row is the one to be overwritten next
+            arr = np.roll(arr, -(self.total % self.max_size), axis=0)
+        return arr
+
+    def columns(self) -> Dict[str, npt.NDArray[np.generic]]:
+        return {
+            "iteration": self._ordered(self.iterations),
+            "x": self._ordered(self.xs),
+            "residual": self._ordered(self.ys),
+            "step": self._ordered(self.steps),
+            "error": self._ordered(self.errors),
+        }
+
+    def save_npz(self, file_path: str) -> None:
+        columns = self.columns()
+        np.savez_compressed(
+            file_path,
+            iteration=columns["iteration"],
+            x=columns["x"],
+            residual=columns["residual"],
+            step=columns["step"],
+            error=columns["error"],
+            x_names=np.array(self.x_names),
+            residual_names=np.array(self.y_names),
+            total=np.array(self.total),
+        )
+
+    def save_csv(self, file_path: str) -> None:
+        columns = self.columns()
+        header = ["iteration", *self.x_names, *self.y_names, "step", "error"]
+        table = np.column_stack(
+            [
+                columns["iteration"],
+                columns["x"],
+                columns["residual"],
+                columns["step"],
+                columns["error"],
+            ]
+        )
+        np.savetxt(
+            file_path,
+            table,
+            delimiter=",",
+            header=",".join(header),
+            comments="",
+            fmt=["%d"] + ["%.17g"] * (table.shape[1] - 1),
+        )
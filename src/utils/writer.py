@@ -1,8 +1,13 @@
+import csv
 import json
+import math
 import os
 from enum import Enum
 from io import TextIOWrapper
-from typing import Any, List
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple, Type, cast
+
+import numpy as np
+import numpy.typing as npt
 
 # sympy has no types :(
 import sympy as sp  # type: ignore
@@ -15,6 +20,8 @@ from utils.equations import (
     SolutionMethod,
     SystemSolutionMethod,
 )
+from utils.perf import PerfCounters
+from utils.trace import TraceRecorder
 
 logger = GlobalLogger()
 
@@ -22,14 +29,44 @@ logger = GlobalLogger()
 class FileFormat(Enum):
     JSON = "json"
     PLAIN = "plain"
+    JSON_LINES = "jsonl"
+    CSV = "csv"
+    NPZ = "npz"
+
+
+def file_format_from_path(file_path: str) -> FileFormat:
+    file_ext = os.path.splitext(file_path)[1].lstrip(".").lower()
+    for file_format in FileFormat:
+        if file_format.value == file_ext:
+            return file_format
+    return FileFormat.PLAIN
+
+
+# stream writers flush after this many records (and on destroy)
+FLUSH_EVERY = 1000
 
 
 class SolutionResult:
+    __slots__ = (
+        "equation",
+        "x",
+        "y",
+        "iterations",
+        "solution_method",
+        "trace",
+        "perf",
+        "roots",
+    )
+
     equation: Equation
     x: sp.Float
     y: sp.Float
     iterations: int
-    solution_method: SolutionMethod | None = None
+    solution_method: SolutionMethod | None
+    trace: TraceRecorder | None
+    perf: PerfCounters | None
+    # [(x, multiplicity)] of every root in the interval, for methods that find them
+    roots: List[Tuple[sp.Float, int]] | None
 
     def __init__(
         self,
@@ -38,20 +75,41 @@ class SolutionResult:
         y: sp.Float,
         iterations: int,
         solution_method: SolutionMethod | None = None,
+        trace: TraceRecorder | None = None,
+        perf: PerfCounters | None = None,
+        roots: List[Tuple[sp.Float, int]] | None = None,
     ):
         self.equation = equation
         self.x = x
         self.y = y
         self.iterations = iterations
         self.solution_method = solution_method
+        self.trace = trace
+        self.perf = perf
+        self.roots = roots
 
 
 class SystemSolutionResult:
+    __slots__ = (
+        "system",
+        "solution",
+        "ys",
+        "iterations",
+        "solution_method",
+        "trace",
+        "perf",
+        "solutions",
+    )
+
     system: EquationSystem
     solution: EquationSystemSolution
     ys: List[sp.Float]
     iterations: int
-    solution_method: SystemSolutionMethod | None = None
+    solution_method: SystemSolutionMethod | None
+    trace: TraceRecorder | None
+    perf: PerfCounters | None
+    # every solution, for methods that find them
+    solutions: List[EquationSystemSolution] | None
 
     def __init__(
         self,
@@ -60,72 +118,330 @@ class SystemSolutionResult:
         ys: List[sp.Float],
         iterations: int,
         solution_method: SystemSolutionMethod | None = None,
+        trace: TraceRecorder | None = None,
+        perf: PerfCounters | None = None,
+        solutions: List[EquationSystemSolution] | None = None,
     ):
         self.system = system
         self.solution = solution
         self.ys = ys
         self.iterations = iterations
         self.solution_method = solution_method
+        self.trace = trace
+        self.perf = perf
+        self.solutions = solutions
+
+    def residual_norm(self) -> sp.Float:
+        """
+        euclidean norm of ys
+        """
+        return sp.sqrt(sum(y**2 for y in self.ys))
+
+
+# ----- columnar results -----
+
+TABLE_INITIAL_CAPACITY = 1024
+
+
+class Columns:
+    """
+    typed numpy columns that grow by doubling
+    """
+
+    arrays: Dict[str, npt.NDArray[Any]]
+    size: int = 0
+
+    def __init__(self, dtypes: Dict[str, Any]) -> None:
+        self.arrays = {
+            name: np.empty(TABLE_INITIAL_CAPACITY, dtype=dtype)
+            for name, dtype in dtypes.items()
+        }
+
+    def append(self, **values: Any) -> None:
+        if self.size == len(next(iter(self.arrays.values()))):
+            for name, arr in self.arrays.items():
+                self.arrays[name] = np.resize(arr, 2 * arr.size)
+        for name, value in values.items():
+            self.arrays[name][self.size] = value
+        self.size += 1
+
+    def __getitem__(self, name: str) -> npt.NDArray[Any]:
+        return self.arrays[name][: self.size]
+
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for arr in self.arrays.values())
+
+
+# sympy compares and hashes expressions by structure, so separately parsed
+# copies of an equation or a system get the same key
+type EquationKey = Tuple[sp.Lambda, sp.Lambda, sp.Float, sp.Float]
+type SystemKey = Tuple[Tuple[sp.Lambda, sp.Symbol, sp.Lambda], ...]
+
+
+def equation_key(equation: Equation) -> EquationKey:
+    return (equation.f, equation.phi, equation.interval_l, equation.interval_r)
+
+
+def system_key(system: EquationSystem) -> SystemKey:
+    return tuple((e.f, e.phi_lhs, e.phi) for e in system.equations)
+
+
+class ResultTable:
+    """
+    compact storage for many single equation results: each equation is kept
+    once, x and y are stored as float64, the trace and roots are dropped
+    """
+
+    equations: List[Equation]
+    equation_index: Dict[EquationKey, int]
+    rows: Columns
+
+    def __init__(self) -> None:
+        self.equations = []
+        self.equation_index = {}
+        self.rows = Columns(
+            {
+                "equation": np.int32,
+                "x": np.float64,
+                "y": np.float64,
+                "iterations": np.int32,
+                "solution_method": np.int8,
+            }
+        )
+
+    def append(self, result: SolutionResult) -> None:
+        key = equation_key(result.equation)
+        index = self.equation_index.get(key)
+        if index is None:
+            index = self.equation_index[key] = len(self.equations)
+            self.equations.append(result.equation)
+        self.rows.append(
+            equation=index,
+            x=float(result.x),
+            y=float(result.y),
+            iterations=result.iterations,
+            solution_method=_method_code(SolutionMethod, result.solution_method),
+        )
+
+    def __len__(self) -> int:
+        return self.rows.size
+
+    def __getitem__(self, i: int) -> SolutionResult:
+        method = int(self.rows["solution_method"][i])
+        return SolutionResult(
+            self.equations[self.rows["equation"][i]],
+            sp.Float(self.rows["x"][i]),
+            sp.Float(self.rows["y"][i]),
+            int(self.rows["iterations"][i]),
+            list(SolutionMethod)[method] if method >= 0 else None,
+        )
+
+    def __iter__(self) -> Iterator[SolutionResult]:
+        return (self[i] for i in range(len(self)))
+
+
+class SystemResultTable:
+    """
+    compact storage for many system results. solutions (in sorted symbol order)
+    and residuals are flattened; row i owns values[offset[i]:offset[i] + count[i]]
+    """
+
+    systems: List[EquationSystem]
+    system_index: Dict[SystemKey, int]
+    system_symbols: List[List[sp.Symbol]]
+    rows: Columns
+    xs: Columns
+    ys: Columns
+
+    def __init__(self) -> None:
+        self.systems = []
+        self.system_index = {}
+        self.system_symbols = []
+        self.rows = Columns(
+            {
+                "system": np.int32,
+                "x_offset": np.int64,
+                "y_offset": np.int64,
+                "iterations": np.int32,
+                "solution_method": np.int8,
+            }
+        )
+        self.xs = Columns({"value": np.float64})
+        self.ys = Columns({"value": np.float64})
+
+    def append(self, result: SystemSolutionResult) -> None:
+        key = system_key(result.system)
+        index = self.system_index.get(key)
+        if index is None:
+            index = self.system_index[key] = len(self.systems)
+            self.systems.append(result.system)
+            self.system_symbols.append(sorted(result.system.symbols, key=str))
+        self.rows.append(
+            system=index,
+            x_offset=self.xs.size,
+            y_offset=self.ys.size,
+            iterations=result.iterations,
+            solution_method=_method_code(SystemSolutionMethod, result.solution_method),
+        )
+        for symbol in self.system_symbols[index]:
+            self.xs.append(value=float(result.solution[symbol]))
+        for y in result.ys:
+            self.ys.append(value=float(y))
+
+    def __len__(self) -> int:
+        return self.rows.size
+
+    def __getitem__(self, i: int) -> SystemSolutionResult:
+        index = int(self.rows["system"][i])
+        system, symbols = self.systems[index], self.system_symbols[index]
+        x_offset, y_offset = self.rows["x_offset"][i], self.rows["y_offset"][i]
+        xs = self.xs["value"][x_offset : x_offset + len(symbols)]
+        ys = self.ys["value"][y_offset : y_offset + len(system.equations)]
+        method = int(self.rows["solution_method"][i])
+        return SystemSolutionResult(
+            system,
+            {symbol: sp.Float(x) for symbol, x in zip(symbols, xs)},
+            [sp.Float(y) for y in ys],
+            int(self.rows["iterations"][i]),
+            list(SystemSolutionMethod)[method] if method >= 0 else None,
+        )
+
+    def __iter__(self) -> Iterator[SystemSolutionResult]:
+        return (self[i] for i in range(len(self)))
+
+
+def _method_code(methods: Type[Enum], method: Enum | None) -> int:
+    return list(methods).index(method) if method is not None else -1
 
 
 class ResWriter:
+    """
+    ResWriter(path) picks the format by the file extension once and forwards
+    records to the matching writer; use it as a context manager (or call
+    destroy()) to flush and close the file
+    """
+
     out_stream: TextIOWrapper | Any
     file_path: str | None = None
+    delegate: "ResWriter | None" = None
+    records_written: int = 0
+    flush_every: int = FLUSH_EVERY
 
     def __init__(self, out_stream: TextIOWrapper | Any | str):
         if type(out_stream) == str:
             self.file_path = out_stream
-            out_stream = self._get_out_stream(out_stream)
+            file_format = file_format_from_path(out_stream)
+            out_stream = self._get_out_stream(out_stream, file_format)
+            self.delegate = WRITERS[file_format](out_stream)
+            logger.debug("using writer", self.delegate.__class__.__name__)
         self.out_stream = out_stream
 
-    def _get_out_stream(self, file_path: str) -> TextIOWrapper | Any:
+    def __enter__(self) -> "ResWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.destroy()
+
+    def _get_out_stream(
+        self, file_path: str, file_format: FileFormat = FileFormat.PLAIN
+    ) -> TextIOWrapper | Any:
         if not file_path:
             raise ValueError("no file specified")
         if os.path.exists(file_path) and not os.access(
             os.path.dirname(file_path), os.W_OK
         ):
             raise PermissionError(f"no write permission for {file_path}")
+        if file_format == FileFormat.NPZ:
+            return open(file_path, "wb")
+        if file_format == FileFormat.CSV:
+            # the csv module writes its own line endings
+            return open(file_path, "w", newline="")
         return open(file_path, "w")
 
+    def _record_written(self) -> None:
+        self.records_written += 1
+        if self.records_written % self.flush_every == 0:
+            self.out_stream.flush()
+
     def write_solution(self, result: SolutionResult) -> None:
-        if not self.file_path:
+        if self.delegate is None:
             raise ValueError("no file specified")
-        file_ext = os.path.splitext(self.file_path)[1]
-        res_writer: ResWriter = PlainWriter(self.out_stream)
-        if file_ext == ".json":
-            res_writer = JsonWriter(self.out_stream)
-        logger.debug("using writer", res_writer.__class__.__name__)
-        res_writer.write_solution(result)
+        self.delegate.write_solution(result)
+        self.write_trace(result.trace)
 
     def write_system_solution(self, result: SystemSolutionResult) -> None:
-        if not self.file_path:
+        if self.delegate is None:
             raise ValueError("no file specified")
-        file_ext = os.path.splitext(self.file_path)[1]
-        res_writer: ResWriter = PlainWriter(self.out_stream)
-        if file_ext == ".json":
-            res_writer = JsonWriter(self.out_stream)
-        logger.debug("using writer", res_writer.__class__.__name__)
-        res_writer.write_system_solution(result)
+        self.delegate.write_system_solution(result)
+        self.write_trace(result.trace)
+
+    def write_results(self, table: ResultTable | SystemResultTable) -> None:
+        if self.delegate is not None:
+            self.delegate.write_results(table)
+            return
+        for result in table:
+            if isinstance(result, SolutionResult):
+                self.write_solution(result)
+            else:
+                self.write_system_solution(result)
+
+    def write_trace(self, trace: TraceRecorder | None) -> None:
+        """
+        saves the iteration trace next to the result file:
+        result.json -> result.trace.npz, anything else -> <file>.trace.csv;
+        traces of the following records in the same file get a record number
+        """
+        if trace is None or not self.file_path or self.delegate is None:
+            return
+        base, file_ext = os.path.splitext(self.file_path)
+        n = self.delegate.records_written - 1
+        suffix = f".trace.{n}" if n > 0 else ".trace"
+        if file_ext in (".json", ".jsonl", ".npz"):
+            trace_path = base + suffix + ".npz"
+            trace.save_npz(trace_path)
+        else:
+            trace_path = self.file_path + suffix + ".csv"
+            trace.save_csv(trace_path)
+        logger.info(
+            lambda: f"saved {trace.size} of {trace.total} iterates to {trace_path}"
+        )
+
+    def close(self) -> None:
+        """
+        writes whatever the writer keeps buffered
+        """
+        self.out_stream.flush()
 
     def destroy(self) -> None:
+        if self.delegate is not None:
+            self.delegate.close()
         self.out_stream.close()
 
 
 class PlainWriter(ResWriter):
     def write_solution(self, result: SolutionResult) -> None:
         self.out_stream.write(f"Equation: {result.equation.f_str()} = 0\n")
-        self.out_stream.write(f"phi(x) = {result.equation.dphi_str()}\n")
+        self.out_stream.write(f"phi(x) = {result.equation.phi_str()}\n")
         self.out_stream.write(f"f'(x) = {result.equation.df_str()}\n")
         self.out_stream.write(f"phi'(x) = {result.equation.dphi_str()}\n")
+        self.out_stream.write(
+            f"q = max|phi'| = {result.equation.q} ({result.equation.phi_form})\n"
+        )
         self.out_stream.write(
             f"Interval: [{str(result.equation.interval_l)}, {str(result.equation.interval_r)}]\n"
         )
         self.out_stream.write(f"x: {str(result.x)}\n")
         self.out_stream.write(f"y: {str(result.y)}\n")
+        if result.roots is not None:
+            self.out_stream.write(f"Roots:\n")
+            for x, multiplicity in result.roots:
+                self.out_stream.write(f"    {str(x)} (multiplicity {multiplicity})\n")
         self.out_stream.write(f"Iterations: {result.iterations}\n")
         if result.solution_method:
             self.out_stream.write(f"solution_method: {result.solution_method.value}\n")
-        self.out_stream.flush()
+        if result.perf:
+            self._write_perf(result.perf)
+        self._record_written()
 
     def write_system_solution(self, result: SystemSolutionResult) -> None:
         self.out_stream.write(f"System:\n")
@@ -144,44 +460,64 @@ class PlainWriter(ResWriter):
             self.out_stream.write(
                 f"    {result.system.equations[i].f_str()} = {str(result.ys[i])}\n"
             )
+        self.out_stream.write(f"Residual norm: {str(result.residual_norm())}\n")
+        if result.solutions is not None:
+            self.out_stream.write(f"All solutions:\n")
+            for solution in result.solutions:
+                self.out_stream.write(
+                    "    "
+                    + ", ".join(f"{k}: {str(v)}" for k, v in solution.items())
+                    + "\n"
+                )
         self.out_stream.write(f"Iterations: {result.iterations}\n")
         if result.solution_method:
             self.out_stream.write(f"solution_method: {result.solution_method.value}\n")
-        self.out_stream.flush()
+        if result.perf:
+            self._write_perf(result.perf)
+        self._record_written()
+
+    def _write_perf(self, perf: PerfCounters) -> None:
+        self.out_stream.write(f"Evaluations:\n")
+        for evaluation, n in perf.evaluations.items():
+            self.out_stream.write(f"    {evaluation.value}: {n}\n")
+        self.out_stream.write(f"Stage times:\n")
+        for stage, seconds in perf.stage_times.items():
+            self.out_stream.write(f"    {stage.value}: {seconds * 1000:.3f} ms\n")
+        self.out_stream.write(f"Peak iterations: {perf.peak_iterations}\n")
 
 
 class JsonWriter(ResWriter):
-    def write_solution(self, result: SolutionResult) -> None:
+    indent: int | None = 4
 
-        obj = {
+    def _solution_obj(self, result: SolutionResult) -> Dict[str, Any]:
+        return {
             "equation": result.equation.f_str(),
             "phi": result.equation.phi_str(),
             "f'": result.equation.df_str(),
             "phi'": result.equation.dphi_str(),
+            # inf is not valid json
+            "q": result.equation.q if math.isfinite(result.equation.q) else None,
+            "phi_form": result.equation.phi_form,
             "interval": [
                 str(result.equation.interval_l),
                 str(result.equation.interval_r),
             ],
             "x": str(result.x),
             "y": str(result.y),
+            "roots": (
+                [{"x": str(x), "multiplicity": m} for x, m in result.roots]
+                if result.roots is not None
+                else None
+            ),
             "iterations": result.iterations,
             "solution_method": (
                 result.solution_method.name if result.solution_method else None
             ),
+            "perf": result.perf.to_dict() if result.perf else None,
         }
-        logger.debug("dumping json", obj)
-
-        json.dump(
-            obj,
-            self.out_stream,
-            indent=4,
-        )
-        self.out_stream.write("\n")
-        self.out_stream.flush()
-
-    def write_system_solution(self, result: SystemSolutionResult) -> None:
 
-        obj = {
+    def _system_solution_obj(self, result: SystemSolutionResult) -> Dict[str, Any]:
+        return {
             "symbols": [str(s) for s in result.system.symbols],
             "system": [
                 {
@@ -193,17 +529,274 @@ class JsonWriter(ResWriter):
             ],
             "solution": {str(k): str(v) for k, v in result.solution.items()},
             "ys": [str(y) for y in result.ys],
+            "residual_norm": str(result.residual_norm()),
+            "solutions": (
+                [{str(k): str(v) for k, v in s.items()} for s in result.solutions]
+                if result.solutions is not None
+                else None
+            ),
             "iterations": result.iterations,
             "solution_method": (
                 result.solution_method.name if result.solution_method else None
             ),
+            "perf": result.perf.to_dict() if result.perf else None,
         }
-        logger.debug("dumping json", obj)
 
+    def _dump(self, obj: Dict[str, Any]) -> None:
+        logger.debug("dumping json", obj)
         json.dump(
             obj,
             self.out_stream,
-            indent=4,
+            indent=self.indent,
         )
         self.out_stream.write("\n")
+        self._record_written()
+
+    def write_solution(self, result: SolutionResult) -> None:
+        self._dump(self._solution_obj(result))
+
+    def write_system_solution(self, result: SystemSolutionResult) -> None:
+        self._dump(self._system_solution_obj(result))
+
+
+class JsonLinesWriter(JsonWriter):
+    """
+    one compact json object per line
+    """
+
+    indent = None
+
+
+class CsvWriter(ResWriter):
+    """
+    one row per result; a file holds either single equation or system results
+    """
+
+    csv_writer: Any = None
+    kind: str | None = None
+
+    def _write_row(self, kind: str, header: List[str], row: List[Any]) -> None:
+        if self.csv_writer is None:
+            self.csv_writer = csv.writer(self.out_stream)
+            self.csv_writer.writerow(header)
+            self.kind = kind
+        elif self.kind != kind:
+            raise ValueError(f"cannot write {kind} results to a csv of {self.kind}")
+        self.csv_writer.writerow(row)
+        self._record_written()
+
+    def write_solution(self, result: SolutionResult) -> None:
+        self._write_row(
+            "equation",
+            [
+                "equation",
+                "interval_l",
+                "interval_r",
+                "x",
+                "y",
+                "iterations",
+                "solution_method",
+            ],
+            [
+                result.equation.f_str(),
+                str(result.equation.interval_l),
+                str(result.equation.interval_r),
+                str(result.x),
+                str(result.y),
+                result.iterations,
+                result.solution_method.name if result.solution_method else "",
+            ],
+        )
+
+    def write_system_solution(self, result: SystemSolutionResult) -> None:
+        self._write_row(
+            "system",
+            ["system", "solution", "ys", "iterations", "solution_method"],
+            [
+                "; ".join(e.f_str() for e in result.system.equations),
+                "; ".join(f"{k}={v}" for k, v in result.solution.items()),
+                "; ".join(str(y) for y in result.ys),
+                result.iterations,
+                result.solution_method.name if result.solution_method else "",
+            ],
+        )
+
+
+def _offsets(counts: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+    offsets = np.zeros(counts.size + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+class NpzWriter(ResWriter):
+    """
+    binary columnar output (float64 values). equations and systems are stored
+    once in a string table and referenced by index; system solutions and
+    residuals are flattened: record i owns values[offsets[i]:offsets[i + 1]]
+    and ys[y_offsets[i]:y_offsets[i + 1]], a system may have more equations
+    than unknowns
+    """
+
+    equations: Dict[str, int]
+    methods: Dict[str, int]
+    columns: Dict[str, List[Any]]
+    chunks: Dict[str, List[npt.NDArray[Any]]]
+
+    def __init__(self, out_stream: TextIOWrapper | Any | str):
+        super().__init__(out_stream)
+        self.equations = {}
+        self.methods = {}
+        self.columns = {name: [] for name in NPZ_COLUMNS}
+        self.chunks = {name: [] for name in NPZ_COLUMNS}
+
+    def _index(self, table: Dict[str, int], key: str) -> int:
+        if key not in table:
+            table[key] = len(table)
+        return table[key]
+
+    def _method_index(self, method: Enum | None) -> int:
+        return self._index(self.methods, method.name) if method else -1
+
+    def _record_written(self) -> None:
+        self.records_written += 1
+        if self.records_written % self.flush_every == 0:
+            self._flush_chunk()
+
+    def _flush_chunk(self) -> None:
+        for name, values in self.columns.items():
+            dtype = np.float64 if name in NPZ_FLOAT_COLUMNS else np.int64
+            self.chunks[name].append(np.array(values, dtype=dtype))
+            values.clear()
+
+    def write_solution(self, result: SolutionResult) -> None:
+        self.columns["equation"].append(
+            self._index(self.equations, result.equation.f_str())
+        )
+        self.columns["interval_l"].append(float(result.equation.interval_l))
+        self.columns["interval_r"].append(float(result.equation.interval_r))
+        self.columns["iterations"].append(result.iterations)
+        self.columns["solution_method"].append(
+            self._method_index(result.solution_method)
+        )
+        self.columns["values"].append(float(result.x))
+        self.columns["ys"].append(float(result.y))
+        self.columns["counts"].append(1)
+        self.columns["y_counts"].append(1)
+        self._record_written()
+
+    def write_system_solution(self, result: SystemSolutionResult) -> None:
+        system_str = "; ".join(e.f_str() for e in result.system.equations)
+        self.columns["equation"].append(self._index(self.equations, system_str))
+        self.columns["interval_l"].append(np.nan)
+        self.columns["interval_r"].append(np.nan)
+        self.columns["iterations"].append(result.iterations)
+        self.columns["solution_method"].append(
+            self._method_index(result.solution_method)
+        )
+        symbols = sorted(result.solution.keys(), key=str)
+        self.columns["values"].extend(float(result.solution[s]) for s in symbols)
+        self.columns["ys"].extend(float(y) for y in result.ys)
+        self.columns["counts"].append(len(symbols))
+        self.columns["y_counts"].append(len(result.ys))
+        self._record_written()
+
+    def write_results(self, table: ResultTable | SystemResultTable) -> None:
+        """
+        copies the table's columns without going through result objects
+        """
+        self._flush_chunk()
+        n = len(table)
+        methods: List[Enum]
+        if isinstance(table, ResultTable):
+            owners = table.rows["equation"]
+            keys = [e.f_str() for e in table.equations]
+            interval_l = np.array([float(e.interval_l) for e in table.equations])
+            interval_r = np.array([float(e.interval_r) for e in table.equations])
+            chunk = {
+                "interval_l": interval_l[owners] if n else np.empty(0),
+                "interval_r": interval_r[owners] if n else np.empty(0),
+                "values": table.rows["x"],
+                "ys": table.rows["y"],
+                "counts": np.ones(n),
+                "y_counts": np.ones(n),
+            }
+            methods = list(SolutionMethod)
+        else:
+            owners = table.rows["system"]
+            keys = ["; ".join(e.f_str() for e in s.equations) for s in table.systems]
+            counts = np.array([len(symbols) for symbols in table.system_symbols])
+            y_counts = np.array([len(s.equations) for s in table.systems])
+            chunk = {
+                "interval_l": np.full(n, np.nan),
+                "interval_r": np.full(n, np.nan),
+                "values": table.xs["value"],
+                "ys": table.ys["value"],
+                "counts": counts[owners] if n else np.empty(0),
+                "y_counts": y_counts[owners] if n else np.empty(0),
+            }
+            methods = list(SystemSolutionMethod)
+        equation_ids = np.array(
+            [self._index(self.equations, key) for key in keys], dtype=np.int64
+        )
+        codes = table.rows["solution_method"]
+        # index -1 (no method) maps to the appended -1
+        method_ids = np.array(
+            [
+                self._method_index(method) if np.any(codes == i) else -1
+                for i, method in enumerate(methods)
+            ]
+            + [-1],
+            dtype=np.int64,
+        )
+        chunk["equation"] = equation_ids[owners]
+        chunk["solution_method"] = method_ids[codes]
+        chunk["iterations"] = table.rows["iterations"]
+        for name, values in chunk.items():
+            dtype = np.float64 if name in NPZ_FLOAT_COLUMNS else np.int64
+            self.chunks[name].append(np.array(values, dtype=dtype))
+        self.records_written += n
+
+    def close(self) -> None:
+        self._flush_chunk()
+        data = {name: np.concatenate(chunks) for name, chunks in self.chunks.items()}
+        offsets, y_offsets = (
+            _offsets(data.pop("counts")),
+            _offsets(data.pop("y_counts")),
+        )
+        np.savez(
+            cast(BinaryIO, self.out_stream),
+            equation=data["equation"],
+            interval_l=data["interval_l"],
+            interval_r=data["interval_r"],
+            iterations=data["iterations"],
+            solution_method=data["solution_method"],
+            values=data["values"],
+            ys=data["ys"],
+            offsets=offsets,
+            y_offsets=y_offsets,
+            equations=np.array(list(self.equations.keys()), dtype=str),
+            methods=np.array(list(self.methods.keys()), dtype=str),
+        )
         self.out_stream.flush()
+
+
+NPZ_COLUMNS = [
+    "equation",
+    "interval_l",
+    "interval_r",
+    "iterations",
+    "solution_method",
+    "values",
+    "ys",
+    "counts",
+    "y_counts",
+]
+NPZ_FLOAT_COLUMNS = {"interval_l", "interval_r", "values", "ys"}
+
+WRITERS: Dict[FileFormat, Type[ResWriter]] = {
+    FileFormat.PLAIN: PlainWriter,
+    FileFormat.JSON: JsonWriter,
+    FileFormat.JSON_LINES: JsonLinesWriter,
+    FileFormat.CSV: CsvWriter,
+    FileFormat.NPZ: NpzWriter,
+}
@@ -0,0 +1,51 @@
+import pytest
+import sympy as sp  # type: ignore
+
+from config import GlobalConfig
+from solvers.newton_solver import NewtonSolver
+from utils.autodiff import derivatives, partial_derivative, taylor_derivative
+from utils.equations import Equation
+from utils.validation import to_sp_float
+
+x, y = sp.symbols("x, y")
+AT = to_sp_float("0.7")
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        x**3 - x - 1,
+        sp.cos(x) - x,
+        x * sp.exp(x) - 1,
+        sp.log(x) + sp.sqrt(x),
+        sp.atan(x) / (1 + x**2),
+        sp.asin(x) ** 2,
+        x**x,
+    ],
+)
+def test_derivatives_match_sympy(expr: sp.Expr) -> None:
+    res = derivatives(expr, x, AT, 3)
+    for k, value in enumerate(res):
+        exact = sp.diff(expr, x, k).evalf(60, subs={x: AT})
+        assert abs(value - exact) <= sp.Float("1e-50") * (1 + abs(exact))
+
+
+def test_taylor_derivative_evaluates_at_numbers() -> None:
+    d2 = taylor_derivative(sp.sin(x) * x, x, 2)
+    exact = sp.diff(sp.sin(x) * x, x, 2).evalf(60, subs={x: AT})
+    assert abs(d2.subs(x, AT) - exact) <= sp.Float("1e-50")
+
+
+def test_partial_derivative() -> None:
+    expr = 0.2 * x**2 + y + 0.1 * x * y - 0.7
+    xs = {"x": to_sp_float("0.5"), "y": to_sp_float("2")}
+    assert partial_derivative(expr, xs, x) == pytest.approx(0.2 + 0.2)
+    assert partial_derivative(expr, xs, y) == pytest.approx(1.05)
+
+
+def test_newton_converges_with_autodiff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(GlobalConfig(), "AUTODIFF", True)
+    equation = Equation(to_sp_float("1"), to_sp_float("2"), equation_str="x**3 - x - 1")
+    res = NewtonSolver().solve(equation, to_sp_float("1e-30"))
+    assert res is not None
+    assert abs(res[0] - to_sp_float("1.3247179572447460259609088544780973")) <= 1e-30
@@ -0,0 +1,23 @@
+import pytest
+
+from bench.problems import PROBLEMS
+from bench.runner import _solve_single
+from utils.equations import SolutionMethod
+from utils.validation import to_sp_float
+
+PROBLEMS_BY_NAME = {problem.name: problem for problem in PROBLEMS}
+
+
+@pytest.mark.parametrize("name", ["double_root", "triple_root", "close_roots"])
+def test_deflated_newton_runs_on_several_roots(name: str) -> None:
+    record = _solve_single(
+        PROBLEMS_BY_NAME[name], SolutionMethod.DEFLATED_NEWTON, to_sp_float("1e-8")
+    )
+    assert record.status == "ok"
+
+
+def test_single_root_methods_are_checked() -> None:
+    record = _solve_single(
+        PROBLEMS_BY_NAME["double_root"], SolutionMethod.NEWTON, to_sp_float("1e-8")
+    )
+    assert record.status == "there is not exactly 1 root in the interval"
@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+import pytest
+import sympy as sp  # type: ignore
+
+from config import GlobalConfig
+from utils.disk_cache import decode_expr, encode_expr
+from utils.equations import Equation
+
+x = sp.Symbol("x")
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        sp.Lambda(x, x**3 - x - 1),
+        sp.Lambda(x, sp.sqrt(x) + sp.Abs(x) * sp.pi - sp.exp(-x / 3) + sp.E),
+        sp.Lambda(x, sp.Float("0.1", 80) * sp.log(x) + sp.Rational(2, 3)),
+    ],
+)
+def test_expressions_round_trip(expr: sp.Lambda) -> None:
+    assert decode_expr(encode_expr(expr)) == expr
+
+
+@pytest.mark.parametrize(
+    "expr", [sp.Dummy("x") + 1, sp.Function("g")(x), sp.Wild("w") * x]
+)
+def test_encoding_refuses_what_it_cannot_rebuild(expr: sp.Expr) -> None:
+    with pytest.raises(ValueError):
+        encode_expr(expr)
+
+
+@pytest.mark.parametrize(
+    "data", [["sympify", "x"], ["__import__", "os"], ["Lambda"], "x", []]
+)
+def test_decoding_refuses_anything_but_expressions(data: object) -> None:
+    with pytest.raises(ValueError):
+        decode_expr(data)
+
+
+def test_cached_equation_matches_prepared(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    l, r = sp.Float(0), sp.Float(1)
+    fresh = Equation(l, r, equation_str="cos(x) - x")
+    monkeypatch.setattr(GlobalConfig(), "CACHE_DIR", str(tmp_path))
+    Equation(l, r, equation_str="cos(x) - x")
+    assert any(files for _, _, files in os.walk(tmp_path))
+    # the key is the parsed expression, not the input
+    cached = Equation(l, r, equation_str="cos( x )-x")
+    for name in ("f", "df", "d2f", "phi", "dphi", "q", "phi_form"):
+        assert getattr(cached, name) == getattr(fresh, name)
+
+
+def test_cache_is_off_by_default() -> None:
+    assert GlobalConfig().CACHE_DIR is None
@@ -0,0 +1,19 @@
+import io
+
+from logger import Logger, LogLevel
+
+
+def test_disabled_levels_build_nothing() -> None:
+    calls = []
+    logger = Logger(io.StringIO(), LogLevel.INFO)
+    logger.debug(lambda: calls.append("built") or "message")
+    assert not calls
+    assert not logger.is_enabled(LogLevel.DEBUG)
+    assert logger.is_enabled(LogLevel.WARNING)
+
+
+def test_lazy_messages_are_built_when_enabled() -> None:
+    out = io.StringIO()
+    logger = Logger(out, LogLevel.DEBUG)
+    logger.debug("x =", lambda: f"{1 + 1}")
+    assert out.getvalue() == "[DEBUG] x = 2\n"
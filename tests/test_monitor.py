@@ -0,0 +1,86 @@
+import pytest
+import sympy as sp  # type: ignore
+
+from solvers.chord_solver import ChordSolver
+from solvers.fixed_point_iteration_solver import FixedPointIterationSolver
+from solvers.fixed_point_iteration_system_solver import FixedPointIterationSystemSolver
+from solvers.gauss_seidel_system_solver import GaussSeidelSystemSolver
+from solvers.high_precision_newton_solver import HighPrecisionNewtonSolver
+from solvers.monitor import IterationMonitor, StopReason
+from solvers.newton_solver import NewtonSolver
+from solvers.solver import Solver
+from solvers.system_solver import SystemSolver
+from utils.equations import SYSTEM_PRESETS, Equation
+from utils.validation import to_sp_float
+
+
+@pytest.mark.parametrize(
+    "solver", [ChordSolver, NewtonSolver, FixedPointIterationSolver]
+)
+@pytest.mark.parametrize(
+    "equation_str, l, r", [("cos(x) - x", "0", "1"), ("x**3 - x - 1", "1", "2")]
+)
+def test_converges_past_float64(
+    solver: type[Solver], equation_str: str, l: str, r: str
+) -> None:
+    equation = Equation(to_sp_float(l), to_sp_float(r), equation_str=equation_str)
+    precision = to_sp_float("1e-30")
+    s = solver()
+    res = s.solve(equation, precision)
+    assert res is not None, s.stop_reason
+    assert abs(equation.f(res[0])) <= 10 * precision
+
+
+@pytest.mark.parametrize("precision", ["1e-500", "1e-2000"])
+def test_high_precision_newton_converges(precision: str) -> None:
+    equation = Equation(to_sp_float("0"), to_sp_float("1"), equation_str="cos(x) - x")
+    s = HighPrecisionNewtonSolver()
+    res = s.solve(equation, to_sp_float(precision))
+    assert res is not None, s.stop_reason
+    assert abs(equation.f(res[0])) <= 10 * to_sp_float(precision)
+
+
+@pytest.mark.parametrize(
+    "solver", [FixedPointIterationSystemSolver, GaussSeidelSystemSolver]
+)
+def test_system_converges_past_float64(solver: type[SystemSolver]) -> None:
+    start = {"x1": to_sp_float("0.5"), "x2": to_sp_float("0.5")}
+    s = solver()
+    res = s.solve(SYSTEM_PRESETS[0], start, to_sp_float("1e-30"))
+    assert res is not None, s.stop_reason
+
+
+def test_two_cycle_is_detected() -> None:
+    monitor = IterationMonitor(sp.Float("1e-8"), 100)
+    reasons = [monitor.observe([(-1) ** i], 2) for i in range(10)]
+    assert StopReason.CYCLING in reasons
+
+
+def test_divergence_is_detected() -> None:
+    monitor = IterationMonitor(sp.Float("1e-8"), 100)
+    reasons = [monitor.observe([10.0**i], 10.0**i) for i in range(20)]
+    assert StopReason.DIVERGED in reasons
+
+
+def test_sublinear_convergence_stagnates_early() -> None:
+    # at the triple root the steps fall like k^-1.5, 1e-8 takes ~2e5 iterations
+    equation = Equation(to_sp_float("0"), to_sp_float("3"), equation_str="(x-1)**3")
+    s = FixedPointIterationSolver()
+    iterations: list[int] = []
+    res = s.solve(equation, to_sp_float("1e-8"), lambda _, i: iterations.append(i))
+    assert res is None
+    assert s.stop_reason == StopReason.STAGNATED
+    assert iterations[-1] < 1000
+
+
+def test_slow_linear_convergence_is_not_sublinear() -> None:
+    monitor = IterationMonitor(sp.Float("1e-12"), 2000, predict=True)
+    reasons = [monitor.observe([1 + 0.95**i], 0.95**i) for i in range(500)]
+    assert not monitor.sublinear
+    assert not any(reasons)
+
+
+def test_precision_below_float64_is_unreachable() -> None:
+    monitor = IterationMonitor(sp.Float("1e-400"), 1000, predict=True)
+    reasons = [monitor.observe([1 + 0.95**i], 0.95**i) for i in range(50)]
+    assert StopReason.STAGNATED in reasons
@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+import pytest
+import sympy as sp  # type: ignore
+
+from utils.equations import Equation
+from utils.numeric import lambdify_numpy
+from utils.parser import FUNCTIONS, NUMPY_FUNCTIONS, Node, parse_expression
+from utils.validation import to_sp_float
+
+x, y = sp.symbols("x, y")
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("x**3 - x - 1", x**3 - x - 1),
+        ("cos(x) - x", sp.cos(x) - x),
+        ("2^x + 3*x/4", 2**x + sp.Rational(3, 4) * x),
+        ("-x ** 2", -(x**2)),
+        ("x*exp(x) - 1", x * sp.exp(x) - 1),
+        ("log(x) + x", sp.log(x) + x),
+        ("sqrt(4 - x**2)", sp.sqrt(4 - x**2)),
+        ("0,5*x - pi", sp.Float("0.5") * x - sp.pi),
+        ("exp2(x) + log10(x)", 2**x + sp.log(x, 10)),
+        ("gamma(5) - abs(x)", 24 - sp.Abs(x)),
+    ],
+)
+def test_parses_like_sympy(text: str, expected: sp.Expr) -> None:
+    assert sp.simplify(parse_expression(text).sympy() - expected) == 0
+
+
+def test_round_trips_through_str() -> None:
+    expr = parse_expression("0.1*x**2 + x + 0.2*y**2 - 0.3", ("x", "y")).sympy()
+    assert parse_expression(str(expr), ("x", "y")).sympy() == expr
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "x +",
+        "(x",
+        "y",
+        "foo(x)",
+        "x; import os",
+        "__import__('os')",
+        "x" + "+x" * 1000,
+        "(" * 100 + "x" + ")" * 100,
+        "1" * 101,
+    ],
+)
+def test_rejects_invalid_input(text: str) -> None:
+    with pytest.raises(ValueError):
+        parse_expression(text).sympy()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "10**10**10 + x",
+        "gamma(3000000) + x",
+        "gamma(200000) + x",
+        "gamma(500)*gamma(500) + x",
+        "exp2(10**50) + x",
+    ],
+)
+def test_constant_work_is_bounded(text: str) -> None:
+    start = time.perf_counter()
+    with pytest.raises(ValueError):
+        parse_expression(text).sympy()
+    assert time.perf_counter() - start < 1
+
+
+def test_node_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        Node()  # type: ignore[abstract]
+
+
+# no integers, gamma has poles there and log(0) is -inf on one side only
+XS = np.linspace(-3.1, 3.1, 32)
+
+
+def assert_numeric_matches_sympy(text: str, *args: np.ndarray) -> None:
+    variables = ("x", "y")[: len(args)]
+    parsed = parse_expression(text, variables)
+    expected = lambdify_numpy(sp.Lambda(sp.symbols(variables), parsed.sympy()))
+    np.testing.assert_allclose(
+        parsed.numeric()(*args), expected(*args), rtol=1e-9, atol=1e-12
+    )
+
+
+def test_every_function_compiles_to_numpy() -> None:
+    assert NUMPY_FUNCTIONS.keys() == FUNCTIONS.keys()
+
+
+@pytest.mark.parametrize("name", list(FUNCTIONS))
+def test_numeric_functions_match_sympy(name: str) -> None:
+    assert_numeric_matches_sympy(f"{name}(x) + 0.5*x", XS)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "x**3 - x - 1",
+        "-x ** 2 + 2^x - 3*x/4/2",
+        "x**(1/3) - x**-2",
+        "pi*x - e + tau",
+        "1 - x - x + 2*x - 0,5",
+    ],
+)
+def test_numeric_matches_sympy(text: str) -> None:
+    assert_numeric_matches_sympy(text, XS)
+
+
+def test_numeric_of_two_variables_matches_sympy() -> None:
+    xs, ys = np.meshgrid(XS, XS)
+    assert_numeric_matches_sympy("0.1*x**2 + x*y - cos(y)/x", xs, ys)
+
+
+def test_numeric_work_is_bounded() -> None:
+    # floats overflow to inf where sympy would compute the exact constant
+    start = time.perf_counter()
+    parsed = parse_expression("10**10**10 + x*" + "*".join(["exp(x)"] * 200))
+    assert np.isinf(parsed.numeric()(np.array([1.0]))).all()
+    assert time.perf_counter() - start < 1
+
+
+def test_equation_plots_the_parse_tree() -> None:
+    equation = Equation(
+        to_sp_float("0"), to_sp_float("2"), equation_str="sqrt(x) - cos(x)"
+    )
+    np.testing.assert_allclose(
+        equation.f_numpy()(XS), lambdify_numpy(equation.f)(XS), rtol=1e-9
+    )
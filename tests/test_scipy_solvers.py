@@ -0,0 +1,67 @@
+import pytest
+import sympy as sp  # type: ignore
+
+from bench.problems import PROBLEMS, SYSTEM_PROBLEMS, Problem, SystemProblem
+from solvers.scipy_solver import SCIPY_METHODS, scipy_solver
+from solvers.scipy_system_solver import SCIPY_SYSTEM_METHODS, scipy_system_solver
+from utils.equations import Equation, SolutionMethod, SystemSolutionMethod
+from utils.validation import to_sp_float
+
+PRECISION = to_sp_float("1e-10")
+SINGLE_ROOT = [p for p in PROBLEMS if p.category in ("polynomial", "transcendental")]
+
+
+def equation_of(problem: Problem) -> Equation:
+    return Equation(
+        to_sp_float(problem.interval_l),
+        to_sp_float(problem.interval_r),
+        equation_str=problem.equation_str,
+    )
+
+
+@pytest.mark.parametrize("method", list(SCIPY_METHODS))
+@pytest.mark.parametrize("problem", SINGLE_ROOT, ids=lambda p: p.name)
+def test_converges_to_root(method: SolutionMethod, problem: Problem) -> None:
+    equation = equation_of(problem)
+    solver = scipy_solver(method, equation, PRECISION)
+    assert solver is not None
+    assert solver.check_convergence(equation)
+    res = solver.solve(equation, PRECISION)
+    assert res is not None, solver.stop_reason
+    assert problem.root is not None
+    assert abs(float(res[0]) - float(problem.root)) <= 10 * float(PRECISION)
+
+
+def test_falls_back_past_float64() -> None:
+    equation = equation_of(SINGLE_ROOT[0])
+    assert scipy_solver(SolutionMethod.NEWTON, equation, to_sp_float("1e-30")) is None
+    assert (
+        scipy_solver(SolutionMethod.FIXED_POINT_ITERATION, equation, PRECISION) is None
+    )
+
+
+def test_auto_runs_in_house() -> None:
+    # auto's result names the racer that won, a scipy stand-in has none
+    equation = equation_of(SINGLE_ROOT[0])
+    assert scipy_solver(SolutionMethod.AUTO, equation, PRECISION) is None
+
+
+@pytest.mark.parametrize("method", list(SCIPY_SYSTEM_METHODS))
+@pytest.mark.parametrize("problem", SYSTEM_PROBLEMS, ids=lambda p: p.name)
+def test_system_converges(method: SystemSolutionMethod, problem: SystemProblem) -> None:
+    start = {k: to_sp_float(v) for k, v in problem.starting_xs.items()}
+    solver = scipy_system_solver(method, start, PRECISION)
+    assert solver is not None
+    res = solver.solve(problem.system, start, PRECISION)
+    assert res is not None, solver.stop_reason
+    solution = res[0]
+    for e in problem.system.equations:
+        assert abs(e.f.expr.subs(solution)) <= PRECISION
+
+
+def test_system_falls_back_past_float64() -> None:
+    problem = SYSTEM_PROBLEMS[0]
+    start = {k: to_sp_float(v) for k, v in problem.starting_xs.items()}
+    method = SystemSolutionMethod.LEVENBERG_MARQUARDT
+    assert scipy_system_solver(method, start, to_sp_float("1e-30")) is None
+    assert scipy_system_solver(SystemSolutionMethod.HOMOTOPY, start, PRECISION) is None
@@ -0,0 +1,92 @@
+import pytest
+import sympy as sp  # type: ignore
+
+from bench.problems import PROBLEMS
+from solvers.auto_solver import AutoSolver
+from solvers.chord_solver import ChordSolver
+from solvers.deflated_newton_solver import DeflatedNewtonSolver
+from solvers.high_precision_newton_solver import HighPrecisionNewtonSolver
+from solvers.newton_solver import NewtonSolver
+from solvers.solver import Solver
+from utils.equations import Equation
+from utils.validation import to_sp_float
+
+PRECISION = to_sp_float("1e-8")
+PROBLEMS_BY_NAME = {problem.name: problem for problem in PROBLEMS}
+
+
+def equation_of(name: str) -> Equation:
+    problem = PROBLEMS_BY_NAME[name]
+    return Equation(
+        to_sp_float(problem.interval_l),
+        to_sp_float(problem.interval_r),
+        equation_str=problem.equation_str,
+    )
+
+
+def solve(solver: Solver, name: str, precision: sp.Float = PRECISION) -> sp.Float:
+    equation = equation_of(name)
+    assert solver.check_convergence(equation)
+    res = solver.solve(equation, precision)
+    assert res is not None, solver.stop_reason
+    return res[0]
+
+
+def error(x: sp.Float, name: str) -> sp.Float:
+    return abs(x - to_sp_float(PROBLEMS_BY_NAME[name].root))
+
+
+@pytest.mark.parametrize("solver", [ChordSolver, NewtonSolver])
+@pytest.mark.parametrize("name", ["cubic", "cos_fixed_point", "omega"])
+def test_converges_to_root(solver: type[Solver], name: str) -> None:
+    # the iterates approach these roots from above, the steps are negative
+    assert error(solve(solver(), name), name) <= 10 * PRECISION
+
+
+@pytest.mark.parametrize(
+    "name", ["cubic", "quintic", "cos_fixed_point", "omega", "sin_linear"]
+)
+def test_auto_converges_to_root(name: str) -> None:
+    assert error(solve(AutoSolver(), name), name) <= 10 * PRECISION
+
+
+@pytest.mark.parametrize("name", ["cubic", "quintic", "cos_fixed_point", "omega"])
+def test_high_precision_newton_converges_to_root(name: str) -> None:
+    assert error(solve(HighPrecisionNewtonSolver(), name), name) <= 10 * PRECISION
+
+
+@pytest.mark.parametrize("name", ["cubic", "cos_fixed_point"])
+def test_high_precision_newton_gets_every_digit(name: str) -> None:
+    precision = to_sp_float("1e-300")
+    x = solve(HighPrecisionNewtonSolver(), name, precision)
+    f = equation_of(name).f
+    root = sp.nsolve(
+        f.expr, f.variables[0], to_sp_float(PROBLEMS_BY_NAME[name].root), prec=320
+    )
+    assert abs(x - root) <= precision
+
+
+@pytest.mark.parametrize(
+    "equation_str, l, r, roots",
+    [
+        ("(x - 1)*(x - 2)*(x - 3)*(x - 4)*(x - 5)", "0.5", "5.5", [1, 2, 3, 4, 5]),
+        ("(x - 1)**3*(x + 1)", "-2", "2", [-1, 1]),
+        ("sin(x)", "-1", "7", [0, sp.pi, 2 * sp.pi]),
+    ],
+)
+def test_deflated_newton_finds_every_root(
+    equation_str: str, l: str, r: str, roots: list[sp.Expr]
+) -> None:
+    equation = Equation(to_sp_float(l), to_sp_float(r), equation_str=equation_str)
+    found = DeflatedNewtonSolver().find_roots(equation, PRECISION)
+    assert len(found) == len(roots)
+    for (x, _), root in zip(found, roots):
+        assert abs(x - root) <= 10 * PRECISION
+
+
+def test_deflated_newton_finds_multiplicities() -> None:
+    equation = Equation(
+        to_sp_float("-2"), to_sp_float("2"), equation_str="(x - 1)**3*(x + 1)"
+    )
+    found = DeflatedNewtonSolver().find_roots(equation, PRECISION)
+    assert [m for _, m in found] == [1, 3]
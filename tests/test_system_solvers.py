@@ -0,0 +1,176 @@
+import threading
+import warnings
+from typing import Dict, List
+
+import pytest
+import sympy as sp  # type: ignore
+
+from bench.problems import SYSTEM_PROBLEMS, SystemProblem
+from solvers.gauss_seidel_system_solver import GaussSeidelSystemSolver, SORSystemSolver
+from solvers.homotopy_system_solver import HomotopySystemSolver
+import solvers.krawczyk_system_solver as krawczyk
+from solvers.krawczyk_system_solver import RADIUS, KrawczykSystemSolver
+from solvers.levenberg_marquardt_system_solver import LevenbergMarquardtSystemSolver
+from solvers.system_solver import SystemSolver
+from utils.equations import (
+    EquationSystem,
+    EquationSystemSolution,
+    MultivariableEquation,
+)
+from utils.validation import to_sp_float
+
+PRECISION = to_sp_float("1e-8")
+PRESETS = [problem for problem in SYSTEM_PROBLEMS if problem.category == "preset"]
+# the phi of preset_2 is no contraction around its start
+CONTRACTIONS = [problem for problem in SYSTEM_PROBLEMS if problem.name != "preset_2"]
+
+
+def starting_xs(problem: SystemProblem) -> Dict[str, sp.Float]:
+    return {k: to_sp_float(v) for k, v in problem.starting_xs.items()}
+
+
+def assert_solves(
+    system: EquationSystem, solution: EquationSystemSolution, tolerance: sp.Float
+) -> None:
+    """
+    solution is within tolerance of the root sympy polishes it to
+    """
+    symbols = system.symbols
+    root = sp.nsolve(
+        [e.f.expr for e in system.equations],
+        symbols,
+        [solution[s] for s in symbols],
+        prec=30,
+    )
+    for symbol, x in zip(symbols, root):
+        assert abs(solution[symbol] - x) <= tolerance, symbol
+
+
+def solve(solver: SystemSolver, problem: SystemProblem) -> EquationSystemSolution:
+    start = starting_xs(problem)
+    assert solver.check_convergence(problem.system, start)
+    res = solver.solve(problem.system, start, PRECISION)
+    assert res is not None, solver.stop_reason
+    return res[0]
+
+
+@pytest.mark.parametrize("solver", [GaussSeidelSystemSolver, SORSystemSolver])
+@pytest.mark.parametrize("problem", CONTRACTIONS, ids=lambda p: p.name)
+def test_gauss_seidel_and_sor_converge(
+    solver: type[SystemSolver], problem: SystemProblem
+) -> None:
+    assert_solves(problem.system, solve(solver(), problem), 10 * PRECISION)
+
+
+def test_sor_takes_a_given_omega() -> None:
+    problem = PRESETS[0]
+    solver = SORSystemSolver(to_sp_float("1.1"))
+    assert_solves(problem.system, solve(solver, problem), 10 * PRECISION)
+    with pytest.raises(ValueError):
+        SORSystemSolver(to_sp_float("2"))
+
+
+@pytest.mark.parametrize("problem", SYSTEM_PROBLEMS, ids=lambda p: p.name)
+def test_levenberg_marquardt_converges(problem: SystemProblem) -> None:
+    solution = solve(LevenbergMarquardtSystemSolver(), problem)
+    assert_solves(problem.system, solution, 10 * PRECISION)
+
+
+def test_levenberg_marquardt_reports_a_local_minimum() -> None:
+    x, y = sp.symbols("x, y")
+    # x**2 + 1 has no real root, ||F|| has a minimum at x = 0
+    system = EquationSystem(
+        [
+            MultivariableEquation(sp.Lambda((x, y), x**2 + 1), x, x - x**2 - 1),
+            MultivariableEquation(sp.Lambda((x, y), y - x), y, x),
+        ]
+    )
+    solver = LevenbergMarquardtSystemSolver()
+    start = {"x": to_sp_float("1"), "y": to_sp_float("1")}
+    assert solver.solve(system, start, PRECISION) is None
+    assert solver.stop_reason is not None
+
+
+def real_solutions(system: EquationSystem) -> list[tuple[float, ...]]:
+    """
+    the real solutions of a polynomial system, by sympy
+    """
+    exprs = [sp.nsimplify(e.f.expr, rational=True) for e in system.equations]
+    solutions = sp.solve_poly_system(exprs, *system.symbols)
+    return sorted(
+        tuple(float(sp.re(sp.N(v))) for v in solution)
+        for solution in solutions
+        if all(abs(sp.im(sp.N(v))) < 1e-20 for v in solution)
+    )
+
+
+@pytest.mark.parametrize("problem", PRESETS, ids=lambda p: p.name)
+def test_homotopy_finds_every_real_solution(problem: SystemProblem) -> None:
+    system = problem.system
+    found = HomotopySystemSolver().find_solutions(system)
+    expected = real_solutions(system)
+    assert len(found) == len(expected)
+    for solution, point in zip(found, expected):
+        assert [float(solution[s]) for s in system.symbols] == pytest.approx(
+            point, abs=1e-10
+        )
+
+
+@pytest.mark.parametrize("problem", PRESETS, ids=lambda p: p.name)
+def test_homotopy_returns_the_solution_nearest_to_the_start(
+    problem: SystemProblem,
+) -> None:
+    solver = HomotopySystemSolver()
+    solution = solve(solver, problem)
+    start = starting_xs(problem)
+
+    def distance(s: EquationSystemSolution) -> sp.Float:
+        return sum((s[k] - start[str(k)]) ** 2 for k in s)
+
+    assert distance(solution) == min(distance(s) for s in solver.solutions)
+
+
+@pytest.mark.parametrize("problem", PRESETS, ids=lambda p: p.name)
+def test_krawczyk_certifies_every_solution_in_the_box(problem: SystemProblem) -> None:
+    system = problem.system
+    start = [float(v) for v in starting_xs(problem).values()]
+    inside = [
+        point
+        for point in real_solutions(system)
+        if all(abs(x - c) < RADIUS for x, c in zip(point, start))
+    ]
+    solver = KrawczykSystemSolver(workers=1)
+    found = solver.find_solutions(system, starting_xs(problem), PRECISION)
+    assert len(found) == len(solver.certified) == len(inside)
+    assert not solver.undecided
+    for box, point in zip(sorted(solver.certified), inside):
+        assert all(lo <= x <= hi for (lo, hi), x in zip(box, point))
+
+
+def test_krawczyk_workers_match_a_single_process(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # every round goes to the pool, from a thread like the gui's solve worker
+    monkeypatch.setattr(krawczyk, "PARALLEL_MIN_BOXES", 1)
+    problem = PRESETS[0]
+    serial = KrawczykSystemSolver(workers=1)
+    serial.find_solutions(problem.system, starting_xs(problem), PRECISION)
+    parallel = KrawczykSystemSolver(workers=2)
+    errors: List[BaseException] = []
+
+    def run() -> None:
+        try:
+            parallel.find_solutions(problem.system, starting_xs(problem), PRECISION)
+        except BaseException as e:
+            errors.append(e)
+
+    # forking a multi-threaded process warns, it can deadlock the child
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", DeprecationWarning)
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    assert not errors
+    assert not [w for w in caught if "fork" in str(w.message)]
+    assert sorted(parallel.certified) == sorted(serial.certified)
+    assert parallel.boxes == serial.boxes
@@ -0,0 +1,238 @@
+import csv
+import json
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+import sympy as sp  # type: ignore
+
+from utils.equations import (
+    SYSTEM_PRESETS,
+    EquationSystem,
+    MultivariableEquation,
+    Equation,
+    SolutionMethod,
+    SystemSolutionMethod,
+)
+from utils.validation import to_sp_float
+from utils.writer import (
+    TABLE_INITIAL_CAPACITY,
+    ResultTable,
+    ResWriter,
+    SolutionResult,
+    SystemResultTable,
+    SystemSolutionResult,
+)
+
+X = to_sp_float("0.7390851332151607")
+
+
+@pytest.fixture(scope="module")
+def results() -> List[SolutionResult]:
+    equation = Equation(to_sp_float("0"), to_sp_float("1"), equation_str="cos(x) - x")
+    return [
+        SolutionResult(equation, X, equation.f(X), i, SolutionMethod.NEWTON)
+        for i in range(3)
+    ]
+
+
+@pytest.fixture(scope="module")
+def system_result() -> SystemSolutionResult:
+    system = SYSTEM_PRESETS[0]
+    solution = {sp.Symbol("x1"): sp.Float("0.2"), sp.Symbol("x2"): sp.Float("0.6")}
+    ys = [e.f(*[solution[s] for s in e.f.args[0]]) for e in system.equations]
+    return SystemSolutionResult(
+        system, solution, ys, 7, SystemSolutionMethod.GAUSS_SEIDEL
+    )
+
+
+def write(path: Path, results: List[SolutionResult]) -> None:
+    with ResWriter(str(path)) as writer:
+        for result in results:
+            writer.write_solution(result)
+
+
+def test_json_lines(tmp_path: Path, results: List[SolutionResult]) -> None:
+    path = tmp_path / "out.jsonl"
+    write(path, results)
+    lines = path.read_text().splitlines()
+    assert len(lines) == len(results)
+    objs = [json.loads(line) for line in lines]
+    assert [obj["iterations"] for obj in objs] == [0, 1, 2]
+    assert objs[0]["equation"] == "-x + cos(x)"
+    assert objs[0]["solution_method"] == "NEWTON"
+    assert float(objs[0]["x"]) == pytest.approx(float(X))
+
+
+def test_csv(tmp_path: Path, results: List[SolutionResult]) -> None:
+    path = tmp_path / "out.csv"
+    write(path, results)
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(results)
+    assert rows[2]["iterations"] == "2"
+    assert rows[0]["interval_l"] == str(to_sp_float("0"))
+    assert float(rows[0]["x"]) == pytest.approx(float(X))
+
+
+def test_csv_rejects_mixed_records(
+    tmp_path: Path, results: List[SolutionResult], system_result: SystemSolutionResult
+) -> None:
+    with ResWriter(str(tmp_path / "out.csv")) as writer:
+        writer.write_solution(results[0])
+        with pytest.raises(ValueError):
+            writer.write_system_solution(system_result)
+
+
+def test_npz(
+    tmp_path: Path, results: List[SolutionResult], system_result: SystemSolutionResult
+) -> None:
+    path = tmp_path / "out.npz"
+    with ResWriter(str(path)) as writer:
+        for result in results:
+            writer.write_solution(result)
+        writer.write_system_solution(system_result)
+    data = np.load(path)
+    assert list(data["equations"]) == [
+        "-x + cos(x)",
+        "; ".join(e.f_str() for e in system_result.system.equations),
+    ]
+    assert list(data["equation"]) == [0, 0, 0, 1]
+    assert list(data["offsets"]) == [0, 1, 2, 3, 5]
+    assert list(data["methods"]) == ["NEWTON", "GAUSS_SEIDEL"]
+    assert data["values"][3:] == pytest.approx([0.2, 0.6])
+    assert data["values"][0] == pytest.approx(float(X))
+
+
+def test_plain_and_json(
+    tmp_path: Path, results: List[SolutionResult], system_result: SystemSolutionResult
+) -> None:
+    with ResWriter(str(tmp_path / "out.txt")) as writer:
+        writer.write_solution(results[0])
+        writer.write_system_solution(system_result)
+    text = (tmp_path / "out.txt").read_text()
+    assert "Equation: -x + cos(x) = 0" in text
+    assert "Iterations: 7" in text
+    with ResWriter(str(tmp_path / "out.json")) as writer:
+        writer.write_system_solution(system_result)
+    obj = json.loads((tmp_path / "out.json").read_text())
+    assert obj["solution"] == {"x1": "0.200000000000000", "x2": "0.600000000000000"}
+    assert obj["solution_method"] == "GAUSS_SEIDEL"
+
+
+def test_result_table_round_trips(results: List[SolutionResult]) -> None:
+    table = ResultTable()
+    n = TABLE_INITIAL_CAPACITY + 10
+    for i in range(n):
+        table.append(results[i % len(results)])
+    assert len(table) == n
+    assert len(table.equations) == 1
+    assert [r.iterations for r in table][:4] == [0, 1, 2, 0]
+    row = table[n - 1]
+    assert row.equation is results[0].equation
+    assert float(row.x) == float(X)
+    assert row.solution_method == SolutionMethod.NEWTON
+
+
+def test_system_result_table_round_trips(
+    system_result: SystemSolutionResult,
+) -> None:
+    table = SystemResultTable()
+    for _ in range(3):
+        table.append(system_result)
+    row = table[2]
+    assert len(table) == 3
+    assert {str(k): float(v) for k, v in row.solution.items()} == {
+        "x1": 0.2,
+        "x2": 0.6,
+    }
+    assert [float(y) for y in row.ys] == [float(y) for y in system_result.ys]
+    assert row.iterations == 7
+
+
+def test_tables_write_like_records(
+    tmp_path: Path, results: List[SolutionResult], system_result: SystemSolutionResult
+) -> None:
+    table, system_table = ResultTable(), SystemResultTable()
+    for result in results:
+        table.append(result)
+    system_table.append(system_result)
+    with ResWriter(str(tmp_path / "records.npz")) as writer:
+        for result in results:
+            writer.write_solution(result)
+        writer.write_system_solution(system_result)
+    with ResWriter(str(tmp_path / "tables.npz")) as writer:
+        writer.write_results(table)
+        writer.write_results(system_table)
+    records, tables = np.load(tmp_path / "records.npz"), np.load(
+        tmp_path / "tables.npz"
+    )
+    assert set(records.files) == set(tables.files)
+    for name in records.files:
+        # nan intervals of system rows compare equal here
+        np.testing.assert_array_equal(records[name], tables[name], err_msg=name)
+
+
+def test_tables_merge_equal_equations(results: List[SolutionResult]) -> None:
+    table = ResultTable()
+    for text in ("cos(x) - x", "cos( x )-x"):
+        equation = Equation(to_sp_float("0"), to_sp_float("1"), equation_str=text)
+        table.append(SolutionResult(equation, X, equation.f(X), 1))
+    other = Equation(to_sp_float("0"), to_sp_float("2"), equation_str="cos(x) - x")
+    table.append(SolutionResult(other, X, other.f(X), 1))
+    assert len(table) == 3
+    assert len(table.equations) == 2
+    assert list(table.rows["equation"]) == [0, 0, 1]
+
+
+def test_system_tables_merge_equal_systems(
+    system_result: SystemSolutionResult,
+) -> None:
+    table = SystemResultTable()
+    table.append(system_result)
+    copy = EquationSystem(
+        [
+            MultivariableEquation(e.f, e.phi_lhs, e.phi.expr)
+            for e in system_result.system.equations
+        ]
+    )
+    table.append(
+        SystemSolutionResult(
+            copy, system_result.solution, system_result.ys, system_result.iterations
+        )
+    )
+    assert len(table.systems) == 1
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_npz_offsets_of_non_square_systems(tmp_path: Path, bulk: bool) -> None:
+    x1, x2 = sp.symbols("x1, x2")
+    square = SYSTEM_PRESETS[0]
+    # three equations in two unknowns, as levenberg-marquardt takes them
+    system = EquationSystem(
+        [
+            *square.equations,
+            MultivariableEquation(sp.Lambda((x1, x2), x1 + x2 - 0.9), x1, 0.9 - x2),
+        ]
+    )
+    solution = {x1: sp.Float("0.2"), x2: sp.Float("0.6")}
+    results = [
+        SystemSolutionResult(system, solution, [sp.Float(v) for v in (1, 2, 3)], 1),
+        SystemSolutionResult(square, solution, [sp.Float(v) for v in (4, 5)], 2),
+    ]
+    path = tmp_path / "out.npz"
+    with ResWriter(str(path)) as writer:
+        if bulk:
+            table = SystemResultTable()
+            for result in results:
+                table.append(result)
+            writer.write_results(table)
+        else:
+            for result in results:
+                writer.write_system_solution(result)
+    data = np.load(path)
+    assert list(data["offsets"]) == [0, 2, 4]
+    assert list(data["y_offsets"]) == [0, 3, 5]
+    ys, offsets = data["ys"], data["y_offsets"]
+    assert list(ys[offsets[1] : offsets[2]]) == [4, 5]